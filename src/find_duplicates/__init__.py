@@ -1 +1,4 @@
 from . import modules
+from .modules.api import Finder, find
+
+__all__ = ["Finder", "find"]
@@ -0,0 +1,74 @@
+# Файл: benchmarks/bench_startup.py
+"""
+Бенчмарк запуска CLI.
+
+Замеряется время `find_duplicates.py --help` (лучшее из нескольких запусков, в отдельном процессе)
+и выводятся самые дорогие импорты по данным `python -X importtime`. Запуск не должен подгружать
+модули конвейера: справка и ошибки аргументов выводятся до их импорта.
+
+Запуск из каталога src:
+    python -m find_duplicates.benchmarks.bench_startup --repeat 10
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "find_duplicates.py")
+
+# Целевое время запуска `--help` в секундах (с запасом на медленные машины CI)
+STARTUP_TARGET = 0.5
+
+# Модули, которые не должны загружаться при `--help`
+HEAVY_MODULES = ("colorama", "concurrent.futures", "multiprocessing", "sqlite3", "tempfile",
+                 "modules.hasher", "modules.comparer", "modules.output")
+
+
+def startup_time(args=("--help",), repeat=5) -> float:
+    """
+    Возвращает лучшее время запуска CLI с аргументами args в секундах.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, SCRIPT, *args], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       check=True)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def import_times(args=("--help",)) -> dict:
+    """
+    Запускает CLI с `-X importtime` и возвращает { модуль: суммарное время импорта в мкс }.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", SCRIPT, *args], stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк запуска CLI: время --help и дорогие импорты.")
+    parser.add_argument("--repeat", type=int, default=5, help="Количество запусков для замера времени")
+    parser.add_argument("--top", type=int, default=15, help="Количество выводимых импортов")
+    args = parser.parse_args()
+
+    seconds = startup_time(repeat=args.repeat)
+    print(f"Запуск --help: {seconds * 1000:.1f} мс (цель: {STARTUP_TARGET * 1000:.0f} мс)")
+    times = import_times()
+    print("Самые дорогие импорты (суммарно, мс):")
+    for name, micros in sorted(times.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {micros / 1000:8.1f}  {name}")
+    loaded = [name for name in HEAVY_MODULES if name in times]
+    if loaded:
+        print(f"Загружены лишние модули: {', '.join(loaded)}")
+
+
+if __name__ == "__main__":
+    main()
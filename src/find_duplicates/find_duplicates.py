@@ -1,5 +1,12 @@
-from modules import scanner, grouper, comparer, output, logger, utils
+# Модули конвейера импортируются в функциях после разбора аргументов,
+# чтобы --help и ошибки аргументов не загружали хэширование, вывод и SQLite
+from modules import logger, utils
+import os
+import sys
+import itertools
+import signal
 import logging
+import threading
 
 logging.root = logger.logger.logger
 
@@ -9,12 +16,16 @@ def main():
     Логика:
       1) Парсинг аргументов.
       2) Настройка логгера.
-      3) Валидация директории.
-      4) Сканирование с учетом флагов.
+      3) Валидация директорий.
+      4) Сканирование с учетом флагов (несколько директорий — одновременно, плюс --files-from).
       5) Группировка по размеру.
       6) Поиск потенциальных дубликатов.
-      7) Вывод результатов в CSV.
-         Если дубликатов не найдено, создается CSV только с заголовком.
+      7) Вывод результатов в CSV по мере подтверждения групп.
+         Если дубликатов не найдено, создается CSV только с заголовком (или пустой файл JSONL/SQLite).
+      8) Итоги запуска: счётчики, освобождаемый объём, время этапов и крупнейшие группы.
+    При --action (hardlink, reflink, dedupe, delete, move) действие выполняется над группами
+    по мере их подтверждения.
+    Ошибки проверки аргументов и директорий завершают процесс с кодом 1.
     """
     # 1. Парсинг аргументов
     args = utils.parse_arguments()
@@ -24,49 +35,272 @@ def main():
 
     logging.debug(f"Аргументы: {args}")
 
-    # 3. Валидация директории
+    # 3. Валидация директорий и списка файлов
     try:
-        if not utils.validate_directory(args.directory):
-            logging.error(f"Директория '{args.directory}' не найдена или недоступна.")
-            return
+        for directory in args.directories:
+            if not utils.validate_directory(directory):
+                logging.error(f"Директория '{directory}' не найдена или недоступна.")
+                sys.exit(1)
     except Exception as e:
         logging.error(f"Ошибка при проверке директории: {e}")
+        sys.exit(1)
+    # Список может быть не обычным файлом: FIFO, подстановка процесса (/dev/fd/N), /dev/stdin
+    if args.files_from not in (None, "-") and not os.path.exists(args.files_from):
+        logging.error(f"Список файлов '{args.files_from}' не найден.")
+        sys.exit(1)
+
+    from modules import compress, stats
+
+    try:
+        if args.output_format != "sqlite":
+            compress.resolve_compression(args.output, args.compress)
+    except ValueError as e:
+        logging.error(str(e))
+        sys.exit(1)
+
+    if args.action == "move" and not args.move_to:
+        logging.error("Для --action move укажите директорию назначения (--move-to).")
+        sys.exit(1)
+
+    if args.watch:
+        if len(args.directories) != 1 or args.files_from is not None:
+            logging.error("Режим --watch поддерживает одну директорию (--directory) без --files-from.")
+            sys.exit(1)
+        # Наблюдение только обновляет отчёт: действия, сортировка и подбор блоков в нём не выполняются
+        unsupported = [option for option, used in (("--action", args.action != "report"),
+                                                   ("--sort-output", args.sort_output),
+                                                   ("--chunk-size auto", args.chunk_size == "auto")) if used]
+        if unsupported:
+            logging.error(f"Режим --watch несовместим с {', '.join(unsupported)}.")
+            sys.exit(1)
+        run_watch(args)
         return
 
-    # 4. Сканирование директорий (если обнаружена ошибка доступа и флаг не установлен – будет исключение)
-    files = scanner.scan_directory(
-        directory=args.directory,
-        include_hidden=args.include_hidden,
-        skip_inaccessible=args.skip_inaccessible,
-        exclude=args.exclude
-    )
+    run_stats = stats.RunStats(top_count=args.summary_top)
+    # Контрольная точка (--checkpoint/--resume): завершённые этапы при возобновлении пропускаются
+    run_checkpoint = open_run_checkpoint(args)
+    if run_checkpoint is None:
+        run_search(args, run_stats=run_stats)
+    else:
+        # SIGTERM завершает работу через SystemExit, чтобы контрольная точка была зафиксирована
+        previous_handler = signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+        try:
+            run_search(args, run_checkpoint, run_stats)
+        except BaseException:
+            run_checkpoint.close()
+            logging.warning(f"Работа прервана. Продолжить можно с --resume "
+                            f"(контрольная точка '{run_checkpoint.path}').")
+            raise
+        finally:
+            signal.signal(signal.SIGTERM, previous_handler)
+        run_checkpoint.remove()
+
+    # 8. Итоги запуска
+    run_stats.log_summary()
+
+
+def open_run_checkpoint(args):
+    """
+    Открывает контрольную точку для --checkpoint или --resume.
+    Без --resume, а также если точка создана с другими параметрами, она начинается заново.
+    """
+    if not (args.checkpoint or args.resume):
+        return None
+    from modules import checkpoint
+
+    run_key = {
+        'directories': [os.path.abspath(directory) for directory in args.directories],
+        'files_from': os.path.abspath(args.files_from) if args.files_from not in (None, "-") else args.files_from,
+        'include_hidden': args.include_hidden,
+        'exclude': args.exclude,
+        'include': args.include,
+        'min_size': args.min_size,
+        'max_size': args.max_size,
+        'hash_type': args.hash_type,
+        'merkle': args.merkle,
+        'chunk_size': args.chunk_size,
+    }
+    output_name = args.output if args.output != "-" else "duplicates"
+    run_checkpoint = checkpoint.open_checkpoint(args.checkpoint_file or f"{output_name}.checkpoint", run_key,
+                                                interval=args.checkpoint_interval)
+    if run_checkpoint is None:
+        return None
+    if args.resume and run_checkpoint.resume():
+        logging.info(f"Продолжение с контрольной точки '{run_checkpoint.path}'.")
+    else:
+        run_checkpoint.reset()
+    return run_checkpoint
+
+
+def run_search(args, run_checkpoint=None, run_stats=None):
+    """
+    Шаги 4–7: сканирование, группировка, поиск дубликатов и запись результатов.
+    При переданной контрольной точке сохраняет результаты этапов и берёт из неё уже готовые.
+    Счётчики и время этапов накапливаются в run_stats.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from modules import scanner, grouper, comparer, output, tuning, cache, snapshot, stats, actions
+
+    run_stats = run_stats if run_stats is not None else stats.RunStats()
+    deduplicator = None
+    if args.action != "report":
+        deduplicator = actions.Deduplicator(args.action, keep=args.keep, priority=args.keep_priority,
+                                            move_to=args.move_to, dry_run=args.dry_run)
+    # 4. Сканирование директорий (одновременно, без вложенных друг в друга) и чтение --files-from
+    #    (если обнаружена ошибка доступа и флаг не установлен – будет исключение)
+    files = run_checkpoint.load_files() if run_checkpoint else None
+    if files is None:
+        scan_snapshot = snapshot.open_snapshot(args.snapshot_file or snapshot.DEFAULT_SNAPSHOT_PATH) \
+            if args.snapshot else None
+        try:
+            with run_stats.stage("сканирование"):
+                files = scanner.collect_files(
+                    args.directories,
+                    files_from=scanner.read_file_list(args.files_from) if args.files_from is not None else None,
+                    include_hidden=args.include_hidden,
+                    skip_inaccessible=args.skip_inaccessible,
+                    exclude=args.exclude,
+                    min_size=args.min_size,
+                    max_size=args.max_size,
+                    include=args.include,
+                    snapshot=scan_snapshot
+                )
+        finally:
+            if scan_snapshot:
+                scan_snapshot.close()
+        if run_checkpoint:
+            run_checkpoint.save_files(files)
+    run_stats.files_scanned = len(files)
     if not files:
-        logging.info("Файлы не найдены в указанной директории.")
+        logging.info("Файлы не найдены в указанных директориях.")
         # Создаем CSV с заголовком, чтобы файл существовал
-        output.write_duplicates_to_csv({}, args.output)
+        output.write_duplicates({}, args.output, args.output_format, compress=args.compress)
         return
 
     # 5. Группировка по размеру
-    grouped_files = grouper.group_files_by_size(files)
+    grouped_files = run_checkpoint.load_groups() if run_checkpoint else None
+    if grouped_files is None:
+        with run_stats.stage("группировка"):
+            grouped_files = grouper.group_files_by_size(files)
+        if run_checkpoint:
+            run_checkpoint.save_groups(grouped_files)
+    run_stats.size_groups = len(grouped_files)
+    run_stats.candidate_files = sum(len(group) for group in grouped_files.values())
     if not grouped_files:
         logging.info("Нет групп файлов с одинаковым размером — дубликаты не обнаружены.")
         # Создаем CSV с заголовком
-        output.write_duplicates_to_csv({}, args.output)
+        output.write_duplicates({}, args.output, args.output_format, compress=args.compress)
         return
 
-    # 6. Поиск потенциальных дубликатов
-    duplicates = comparer.find_potential_duplicates(grouped_files, args.hash_type)
-    if not duplicates:
-        logging.info("Дубликаты не обнаружены.")
-        # Создаем CSV с заголовком
-        output.write_duplicates_to_csv({}, args.output)
-        return
+    # 6. Поиск потенциальных дубликатов (при --chunk-size auto размер блока подбирается по устройствам)
+    chunk_size, device_chunk_sizes = args.chunk_size, None
+    if chunk_size == "auto":
+        chunk_size = tuning.DEFAULT_CHUNK_SIZE
+        device_chunk_sizes = tuning.tune_chunk_sizes(grouped_files,
+                                                     profile_path=args.chunk_profile or tuning.DEFAULT_PROFILE_PATH)
+    hash_cache = cache.open_cache(args.cache_file or cache.DEFAULT_CACHE_PATH) if args.cache else None
+    search_cache, completed_groups, on_group_done = hash_cache, [], None
+    if run_checkpoint:
+        # Готовые группы берутся из контрольной точки, хэши без --cache хранятся в ней же
+        search_cache = hash_cache or run_checkpoint.hash_cache
+        completed = run_checkpoint.completed()
+        for size_duplicates in completed.values():
+            completed_groups.extend(size_duplicates)
+        for file_hash, files in completed_groups:
+            run_stats.add_group(file_hash, files)
+        grouped_files = {size: files for size, files in grouped_files.items() if size not in completed}
+        if completed:
+            logging.info(f"Из контрольной точки взято готовых групп: {len(completed)}, осталось: {len(grouped_files)}")
+        on_group_done = run_checkpoint.record_group
+    # Один пул потоков на весь поиск: небольшие файлы всех групп читаются им пакетами
+    small_file_pool = ThreadPoolExecutor(thread_name_prefix="small-files")
+    duplicates = comparer.iter_duplicates(grouped_files, args.hash_type,
+                                          drop_cache=not args.keep_page_cache,
+                                          direct_io=args.direct_io,
+                                          prehash=args.prehash,
+                                          chunk_size=chunk_size,
+                                          device_chunk_sizes=device_chunk_sizes,
+                                          partial_size=args.partial_size,
+                                          small_file_threshold=args.small_file_threshold,
+                                          merkle=args.merkle,
+                                          cache=search_cache,
+                                          on_group_done=on_group_done,
+                                          stats=run_stats,
+                                          verify=args.action != "dedupe",
+                                          executor=small_file_pool)
 
-    # 7. Вывод результатов в CSV
-    if output.write_duplicates_to_csv(duplicates, args.output):
+    # 7. Вывод результатов (CSV, JSONL или SQLite): группы записываются по мере подтверждения
+    #    (с --sort-output — после сортировки); время поиска и записи учитывается вместе
+    groups = itertools.chain(completed_groups, duplicates)
+    if deduplicator:
+        # Действие выполняется пачками над группами по мере подтверждения, до записи в отчёт
+        groups = deduplicator.process(groups)
+    try:
+        with run_stats.stage("поиск дубликатов"):
+            written = output.write_duplicates(groups, args.output,
+                                              args.output_format, top=args.top, sort=args.sort_output,
+                                              compress=args.compress)
+    finally:
+        small_file_pool.shutdown(wait=True, cancel_futures=True)
+        if hash_cache:
+            hash_cache.close()
+    if deduplicator:
+        deduplicator.summary.log()
+    if written:
         logging.info(f"Поиск завершён. Результаты сохранены в '{args.output}'.")
     else:
-        logging.error("Ошибка при записи результатов в файл CSV.")
+        logging.error("Ошибка при записи результатов в файл.")
+
+
+def run_watch(args):
+    """
+    Режим --watch: первичный поиск и дальнейшее обновление результатов по событиям inotify.
+    Работает до Ctrl+C или SIGTERM; результаты перезаписываются в args.output после каждого пересчёта.
+    """
+    from modules import watcher, output, tuning, cache
+
+    hash_cache = cache.open_cache(args.cache_file or cache.DEFAULT_CACHE_PATH) if args.cache else None
+    tracker = watcher.DuplicateTracker(
+        args.directory,
+        scan_options={
+            'include_hidden': args.include_hidden,
+            'skip_inaccessible': args.skip_inaccessible,
+            'exclude': args.exclude,
+            'min_size': args.min_size,
+            'max_size': args.max_size,
+            'include': args.include,
+        },
+        find_options={
+            'hash_type': args.hash_type,
+            'drop_cache': not args.keep_page_cache,
+            'direct_io': args.direct_io,
+            'prehash': args.prehash,
+            'chunk_size': args.chunk_size if args.chunk_size != "auto" else tuning.DEFAULT_CHUNK_SIZE,
+            'partial_size': args.partial_size,
+            'small_file_threshold': args.small_file_threshold,
+            'merkle': args.merkle,
+        },
+        cache=hash_cache
+    )
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    try:
+        watcher.watch(tracker,
+                      lambda duplicates: output.write_duplicates(duplicates, args.output, args.output_format,
+                                                                 top=args.top, compress=args.compress),
+                      interval=args.watch_interval, stop_event=stop_event)
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        logging.error(f"Режим наблюдения недоступен: {e}")
+        sys.exit(1)
+    except Exception as e:
+        logging.error(f"Ошибка в режиме наблюдения: {e}")
+        sys.exit(1)
+    finally:
+        tracker.cache.close()
+    logging.info(f"Наблюдение остановлено. Последние результаты — в '{args.output}'.")
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,423 @@
+import os
+import stat
+import struct
+import shutil
+import itertools
+from .logger import logger
+from .utils import human_readable_size
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - не POSIX
+    fcntl = None
+
+ACTIONS = ("report", "hardlink", "reflink", "dedupe", "delete", "move")
+
+KEEP_POLICIES = ("oldest", "newest", "shortest")
+
+# ioctl FICLONE из <linux/fs.h>: целевой файл разделяет блоки с исходным (btrfs, XFS)
+FICLONE = 0x40049409
+
+# ioctl FIDEDUPERANGE из <linux/fs.h>: ядро сравнивает диапазоны и делает их общими, только если они совпадают
+FIDEDUPERANGE = 0xC0189436
+FILE_DEDUPE_RANGE_SAME = 0
+FILE_DEDUPE_RANGE_DIFFERS = 1
+
+# struct file_dedupe_range (src_offset, src_length, dest_count, reserved1, reserved2)
+# и struct file_dedupe_range_info (dest_fd, dest_offset, bytes_deduped, status, reserved)
+DEDUPE_RANGE = struct.Struct("=QQHHI")
+DEDUPE_RANGE_INFO = struct.Struct("=qQQiI")
+
+# Длина диапазона в одном запросе (btrfs обрабатывает не больше 16 МиБ за вызов)
+DEDUPE_CHUNK = 16 * 1024 * 1024
+
+# Количество файлов-получателей в одном запросе (аргумент ioctl должен помещаться в страницу памяти)
+DEDUPE_MAX_DESTS = 120
+
+# Количество операций, накапливаемых перед выполнением пачкой (с группировкой по директориям)
+DEFAULT_BATCH_SIZE = 1000
+
+_temp_counter = itertools.count()
+
+
+class FileChanged(Exception):
+    """
+    Файл изменился или исчез после сравнения — действие над ним пропускается.
+    """
+
+
+def choose_keeper(files, keep="oldest", priority=()):
+    """
+    Выбирает файл группы, который будет сохранён.
+    Сначала учитывается список приоритетных директорий (файл из более ранней директории списка
+    предпочтительнее), затем политика: oldest — наименьший mtime, newest — наибольший,
+    shortest — самый короткий путь. При равенстве выбирается меньший путь.
+
+    :param files: Список {'path', 'size', 'mtime_ns'} группы.
+    :param keep: Политика выбора: 'oldest', 'newest' или 'shortest'.
+    :param priority: Список директорий по убыванию приоритета.
+    :return: Пара (сохраняемый файл, список остальных).
+    """
+    prefixes = [os.path.join(os.path.abspath(directory), "") for directory in priority]
+
+    def rank(file_info):
+        path = file_info['path']
+        level = next((idx for idx, prefix in enumerate(prefixes) if path.startswith(prefix)), len(prefixes))
+        mtime = file_info.get('mtime_ns') or 0
+        if keep == "oldest":
+            policy = mtime
+        elif keep == "newest":
+            policy = -mtime
+        else:
+            policy = len(path)
+        return level, policy, path
+
+    ordered = sorted(files, key=rank)
+    return ordered[0], ordered[1:]
+
+
+def verify_unchanged(file_info):
+    """
+    Проверяет перед действием, что файл всё ещё обычный файл того же размера и с тем же mtime,
+    что и при сравнении (защита от изменений между поиском и действием).
+
+    :return: os.stat_result файла.
+    :raises FileChanged: Файл исчез или изменился.
+    """
+    try:
+        st = os.stat(file_info['path'], follow_symlinks=False)
+    except OSError as e:
+        raise FileChanged(f"недоступен: {e}")
+    if not stat.S_ISREG(st.st_mode):
+        raise FileChanged("больше не является обычным файлом")
+    if st.st_size != file_info['size']:
+        raise FileChanged(f"изменился размер ({file_info['size']} -> {st.st_size})")
+    mtime_ns = file_info.get('mtime_ns')
+    if mtime_ns is not None and st.st_mtime_ns != mtime_ns:
+        raise FileChanged("изменилось время модификации")
+    return st
+
+
+def temp_path_for(path):
+    """
+    Возвращает имя временного файла в той же директории (для атомарной замены через rename).
+    """
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.dedup-{os.getpid()}-{next(_temp_counter)}")
+
+
+def clone_file(source, destination):
+    """
+    Создаёт destination как reflink-копию source (ioctl FICLONE): данные не копируются,
+    а блоки разделяются до первого изменения одного из файлов.
+    """
+    if fcntl is None:
+        raise OSError("reflink не поддерживается на этой платформе")
+    with open(source, "rb") as src, open(destination, "xb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+def replace_atomically(target, create):
+    """
+    Заменяет target новым файлом: create(temp) создаёт его рядом под временным именем,
+    затем os.replace атомарно подменяет target. При ошибке временный файл удаляется, а target не меняется.
+    """
+    temp = temp_path_for(target)
+    try:
+        create(temp)
+        os.replace(temp, target)
+    except BaseException:
+        try:
+            os.unlink(temp)
+        except OSError:
+            pass
+        raise
+
+
+def dedupe_ranges(src_fd, dest_fds, size, chunk=DEDUPE_CHUNK, max_dests=DEDUPE_MAX_DESTS) -> list:
+    """
+    Делает содержимое файлов dest_fds общим с исходным файлом через FIDEDUPERANGE.
+    Файл обрабатывается диапазонами по chunk байт; в одном вызове ioctl передаётся до max_dests получателей.
+    Ядро само сверяет содержимое, поэтому отличающийся диапазон не изменяется, а получатель
+    исключается из дальнейших запросов.
+
+    :param src_fd: Дескриптор исходного (сохраняемого) файла.
+    :param dest_fds: Дескрипторы файлов-получателей.
+    :param size: Размер файлов.
+    :return: Список [объединено байт, ошибка или None] для каждого получателя.
+    :raises OSError: ioctl не поддерживается (например, файловая система без reflink).
+    """
+    if fcntl is None:
+        raise OSError("FIDEDUPERANGE не поддерживается на этой платформе")
+    results = [[0, None] for _ in dest_fds]
+    active = list(range(len(dest_fds)))
+    offset = 0
+    while offset < size and active:
+        length = min(chunk, size - offset)
+        for start in range(0, len(active), max_dests):
+            batch = active[start:start + max_dests]
+            buffer = bytearray(DEDUPE_RANGE.size + DEDUPE_RANGE_INFO.size * len(batch))
+            DEDUPE_RANGE.pack_into(buffer, 0, offset, length, len(batch), 0, 0)
+            for i, idx in enumerate(batch):
+                DEDUPE_RANGE_INFO.pack_into(buffer, DEDUPE_RANGE.size + i * DEDUPE_RANGE_INFO.size,
+                                            dest_fds[idx], offset, 0, 0, 0)
+            fcntl.ioctl(src_fd, FIDEDUPERANGE, buffer)
+            for i, idx in enumerate(batch):
+                _, _, deduped, status, _ = DEDUPE_RANGE_INFO.unpack_from(
+                    buffer, DEDUPE_RANGE.size + i * DEDUPE_RANGE_INFO.size)
+                if status == FILE_DEDUPE_RANGE_SAME:
+                    results[idx][0] += deduped
+                elif status == FILE_DEDUPE_RANGE_DIFFERS:
+                    results[idx][1] = f"содержимое отличается со смещения {offset}"
+                else:
+                    results[idx][1] = os.strerror(-status)
+        active = [idx for idx in active if results[idx][1] is None]
+        offset += length
+    return results
+
+
+def move_destination(path, move_to):
+    """
+    Путь для перемещения: структура исходного абсолютного пути воспроизводится внутри move_to.
+    """
+    return os.path.join(os.path.abspath(move_to), os.path.abspath(path).lstrip(os.sep))
+
+
+class DedupSummary:
+    """
+    Итоги действий над дубликатами.
+    """
+
+    def __init__(self, action, dry_run):
+        self.action = action
+        self.dry_run = dry_run
+        self.groups = 0
+        self.files = 0
+        self.reclaimed = 0
+        self.skipped = 0
+        self.errors = 0
+
+    def log(self):
+        prefix = "Пробный запуск (--dry-run): " if self.dry_run else ""
+        logger.info(f"{prefix}действие '{self.action}': групп — {self.groups}, файлов — {self.files}, "
+                    f"освобождено — {human_readable_size(self.reclaimed)}, пропущено — {self.skipped}, "
+                    f"ошибок — {self.errors}")
+
+
+class Deduplicator:
+    """
+    Выполняет действие над подтверждёнными группами дубликатов: hardlink, reflink, dedupe, delete или move.
+    В каждой группе один файл сохраняется (см. choose_keeper), остальные заменяются ссылкой,
+    удаляются или перемещаются; при dedupe файлы остаются независимыми, но их данные становятся
+    общими с сохраняемым файлом (FIDEDUPERANGE, см. dedupe_group). Операции накапливаются
+    и выполняются пачками, упорядоченными по директориям, с одним fsync на директорию в пачке.
+    Перед каждой операцией размер и mtime обоих файлов сверяются с сохранёнными при сравнении.
+    """
+
+    def __init__(self, action, keep="oldest", priority=(), move_to=None, dry_run=False,
+                 batch_size=DEFAULT_BATCH_SIZE):
+        """
+        :param action: Действие из ACTIONS ('report' ничего не меняет).
+        :param keep: Политика выбора сохраняемого файла (KEEP_POLICIES).
+        :param priority: Директории по убыванию приоритета для сохраняемого файла.
+        :param move_to: Директория для action='move'.
+        :param dry_run: Только проверить и подсчитать, ничего не меняя.
+        :param batch_size: Количество операций в пачке.
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"Неизвестное действие: {action}")
+        if action == "move" and not move_to:
+            raise ValueError("Для действия move нужна директория назначения (--move-to)")
+        self.action = action
+        self.keep = keep
+        self.priority = list(priority or [])
+        self.move_to = move_to
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.summary = DedupSummary(action, dry_run)
+        self.pending = []
+
+    def process(self, groups):
+        """
+        Пропускает группы дубликатов дальше без изменений, попутно выполняя над ними действие.
+
+        :param groups: Итерируемое пар (хэш, список файлов).
+        :return: Генератор тех же пар.
+        """
+        for file_hash, files in groups:
+            self.add_group(file_hash, files)
+            yield file_hash, files
+        self.flush()
+
+    def add_group(self, file_hash, files):
+        """
+        Планирует действие над группой; пачка выполняется при накоплении batch_size операций.
+        """
+        if self.action == "report" or len(files) < 2:
+            return
+        keeper, others = choose_keeper(files, self.keep, self.priority)
+        self.summary.groups += 1
+        self.pending.extend((keeper, other) for other in others)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Выполняет накопленные операции, сгруппировав их по директориям.
+        """
+        pending, self.pending = self.pending, []
+        if self.action == "dedupe":
+            # Получатели одного сохраняемого файла передаются ядру общими запросами
+            pending.sort(key=lambda op: (op[0]['path'], op[1]['path']))
+            for _, ops in itertools.groupby(pending, key=lambda op: op[0]['path']):
+                ops = list(ops)
+                self.dedupe_group(ops[0][0], [target for _, target in ops])
+            return
+        pending.sort(key=lambda op: (os.path.dirname(op[1]['path']), op[1]['path']))
+        for directory, ops in itertools.groupby(pending, key=lambda op: os.path.dirname(op[1]['path'])):
+            changed = False
+            for keeper, target in ops:
+                changed = self.apply(keeper, target) or changed
+            if changed and not self.dry_run:
+                self._sync_directory(directory)
+
+    def _verify(self, keeper, target):
+        """
+        Сверяет оба файла с состоянием при сравнении.
+
+        :return: Пара os.stat_result (сохраняемый, целевой) или None, если действие нужно пропустить.
+        """
+        path = target['path']
+        try:
+            keeper_st = verify_unchanged(keeper)
+            target_st = verify_unchanged(target)
+        except FileChanged as e:
+            logger.warning(f"Пропуск '{path}': файл {e}")
+            self.summary.skipped += 1
+            return None
+        if (keeper_st.st_dev, keeper_st.st_ino) == (target_st.st_dev, target_st.st_ino):
+            logger.debug(f"Пропуск '{path}': уже жёсткая ссылка на '{keeper['path']}'")
+            self.summary.skipped += 1
+            return None
+        return keeper_st, target_st
+
+    def dedupe_group(self, keeper, targets):
+        """
+        Делает данные targets общими с keeper через FIDEDUPERANGE и выводит результат по каждому файлу.
+        """
+        checked = [target for target in targets if self._verify(keeper, target)]
+        if not checked:
+            return
+        if self.dry_run:
+            for target in checked:
+                logger.info(f"[dry-run] dedupe: '{target['path']}' <- '{keeper['path']}'")
+                self.summary.files += 1
+                self.summary.reclaimed += target['size']
+            return
+        opened = []
+        try:
+            src_fd = os.open(keeper['path'], os.O_RDONLY)
+        except OSError as e:
+            logger.error(f"Ошибка dedupe: не удалось открыть '{keeper['path']}': {e}")
+            self.summary.errors += len(checked)
+            return
+        try:
+            for target in checked:
+                try:
+                    opened.append((target, os.open(target['path'], os.O_RDWR)))
+                except PermissionError:
+                    # Владельцу файла достаточно доступа на чтение (Linux 4.19+)
+                    try:
+                        opened.append((target, os.open(target['path'], os.O_RDONLY)))
+                    except OSError as e:
+                        logger.error(f"Ошибка dedupe над '{target['path']}': {e}")
+                        self.summary.errors += 1
+                except OSError as e:
+                    logger.error(f"Ошибка dedupe над '{target['path']}': {e}")
+                    self.summary.errors += 1
+            if not opened:
+                return
+            try:
+                results = dedupe_ranges(src_fd, [fd for _, fd in opened], keeper['size'])
+            except OSError as e:
+                logger.error(f"FIDEDUPERANGE недоступен для '{keeper['path']}': {e}")
+                self.summary.errors += len(opened)
+                return
+            for (target, _), (deduped, error) in zip(opened, results):
+                if error:
+                    logger.warning(f"dedupe '{target['path']}': {error} (объединено {human_readable_size(deduped)})")
+                    self.summary.errors += 1
+                else:
+                    logger.info(f"dedupe '{target['path']}': объединено {human_readable_size(deduped)} "
+                                f"с '{keeper['path']}'")
+                    self.summary.files += 1
+                self.summary.reclaimed += deduped
+        finally:
+            os.close(src_fd)
+            for _, fd in opened:
+                os.close(fd)
+
+    def apply(self, keeper, target) -> bool:
+        """
+        Выполняет действие над одним файлом.
+
+        :return: True, если файловая система изменена.
+        """
+        path = target['path']
+        checked = self._verify(keeper, target)
+        if checked is None:
+            return False
+        _, target_st = checked
+        # Место освобождается, только если на данные не ссылаются другие имена
+        reclaimed = target_st.st_size if target_st.st_nlink == 1 else 0
+        if self.dry_run:
+            logger.debug(f"[dry-run] {self.action}: '{path}' (сохраняется '{keeper['path']}')")
+            self.summary.files += 1
+            self.summary.reclaimed += reclaimed
+            return False
+        try:
+            if self.action == "hardlink":
+                replace_atomically(path, lambda temp: os.link(keeper['path'], temp))
+            elif self.action == "reflink":
+                def create(temp):
+                    clone_file(keeper['path'], temp)
+                    # Ссылка наследует владельца и права заменяемого файла, а не сохраняемого
+                    shutil.copystat(path, temp)
+                    if hasattr(os, "chown"):
+                        try:
+                            os.chown(temp, target_st.st_uid, target_st.st_gid)
+                        except PermissionError:
+                            pass
+                replace_atomically(path, create)
+            elif self.action == "delete":
+                os.remove(path)
+            elif self.action == "move":
+                destination = move_destination(path, self.move_to)
+                if os.path.lexists(destination):
+                    raise FileExistsError(f"'{destination}' уже существует")
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                shutil.move(path, destination)
+        except OSError as e:
+            logger.error(f"Ошибка действия '{self.action}' над '{path}': {e}")
+            self.summary.errors += 1
+            return False
+        logger.debug(f"{self.action}: '{path}' (сохраняется '{keeper['path']}')")
+        self.summary.files += 1
+        self.summary.reclaimed += reclaimed
+        return True
+
+    @staticmethod
+    def _sync_directory(directory):
+        """
+        Фиксирует на диске изменения записей директории (переименования, удаления).
+        """
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
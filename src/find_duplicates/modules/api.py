@@ -0,0 +1,197 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from .logger import logger
+from .scanner import collect_files
+from .grouper import group_files_by_size
+from .comparer import iter_duplicates
+from .hasher import SMALL_FILE_THRESHOLD
+from .tuning import DEFAULT_CHUNK_SIZE, DEFAULT_PROFILE_PATH, tune_chunk_sizes
+from .cache import HashCache, open_cache
+from .snapshot import ScanSnapshot, open_snapshot
+
+# Параметры сканирования (см. scanner.scan_directory) и их значения по умолчанию
+SCAN_OPTIONS = {
+    'include_hidden': False,
+    'skip_inaccessible': False,
+    'exclude': None,
+    'include': None,
+    'min_size': 0,
+    'max_size': None,
+}
+
+# Параметры поиска дубликатов (см. comparer.iter_duplicates) и их значения по умолчанию
+FIND_OPTIONS = {
+    'hash_type': 'blake3',
+    'drop_cache': True,
+    'direct_io': False,
+    'prehash': False,
+    'chunk_size': DEFAULT_CHUNK_SIZE,
+    'partial_size': 0,
+    'small_file_threshold': SMALL_FILE_THRESHOLD,
+    'merkle': False,
+    'verify': True,
+}
+
+HASH_TYPES = ("md5", "sha1", "sha256", "sha512", "blake3")
+
+
+class Finder:
+    """
+    Поиск дубликатов для использования из Python без разбора аргументов и записи CSV.
+    Каждый этап доступен отдельно (scan, group, duplicates), а find выполняет их подряд
+    и возвращает группы по мере подтверждения. Пул потоков для небольших файлов, кэш хэшей
+    и размеры блоков устройств (chunk_size='auto') создаются один раз и переиспользуются
+    между вызовами, поэтому повторный поиск читает только изменившиеся файлы.
+
+    Пример:
+        with Finder(min_size=1, cache="hashes.db") as finder:
+            for file_hash, files in finder.find(["/data", "/backup"]):
+                ...
+    """
+
+    def __init__(self, cache=None, snapshot=None, chunk_profile=None, num_workers=None, stats=None, **options):
+        """
+        :param cache: Кэш хэшей: HashCache, путь к базе SQLite или None (кэш в памяти на время жизни Finder).
+        :param snapshot: Снимок сканирования: ScanSnapshot, путь к базе или None (без снимка).
+        :param chunk_profile: Путь к профилю размеров блоков для chunk_size='auto'.
+        :param num_workers: Количество потоков пула чтения небольших файлов.
+        :param stats: Статистика (RunStats), в которой накапливаются счётчики всех вызовов.
+        :param options: Параметры сканирования (SCAN_OPTIONS) и поиска (FIND_OPTIONS).
+        :raises TypeError: Неизвестный параметр.
+        :raises ValueError: Неизвестный тип хэша.
+        """
+        unknown = set(options) - set(SCAN_OPTIONS) - set(FIND_OPTIONS)
+        if unknown:
+            raise TypeError(f"Неизвестные параметры: {', '.join(sorted(unknown))}")
+        self.scan_options = {name: options.get(name, default) for name, default in SCAN_OPTIONS.items()}
+        self.find_options = {name: options.get(name, default) for name, default in FIND_OPTIONS.items()}
+        if self.find_options['hash_type'] not in HASH_TYPES:
+            raise ValueError(f"Неизвестный тип хэша: {self.find_options['hash_type']}")
+        self.chunk_profile = chunk_profile or DEFAULT_PROFILE_PATH
+        self.num_workers = num_workers
+        self.stats = stats
+        self.device_chunk_sizes = {}
+        self._executor = None
+        # Кэш и снимок, открытые по пути, принадлежат Finder и закрываются в close
+        self._owned = []
+        if isinstance(cache, HashCache):
+            self.cache = cache
+        else:
+            self.cache = open_cache(cache) if cache else HashCache(":memory:")
+            if self.cache is not None:
+                self._owned.append(self.cache)
+        if snapshot is None or isinstance(snapshot, ScanSnapshot):
+            self.snapshot = snapshot
+        else:
+            self.snapshot = open_snapshot(snapshot)
+            if self.snapshot is not None:
+                self._owned.append(self.snapshot)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def executor(self):
+        """
+        Пул потоков для чтения небольших файлов; создаётся при первом обращении.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="find-duplicates")
+        return self._executor
+
+    def scan(self, paths, files=None) -> list:
+        """
+        Сканирует одну или несколько директорий одновременно (см. scanner.collect_files).
+
+        :param paths: Путь к директории или список путей; вложенные и повторяющиеся директории сканируются один раз.
+        :param files: Дополнительные пути к файлам (как --files-from); фильтры к ним применяются те же.
+        :return: Список файлов.
+        :raises NotADirectoryError: Путь не является директорией.
+        """
+        if isinstance(paths, (str, bytes, os.PathLike)):
+            paths = [paths]
+        paths = [os.fspath(path) for path in paths]
+        for path in paths:
+            if not os.path.isdir(path):
+                raise NotADirectoryError(f"Директория '{path}' не найдена или недоступна")
+        files = collect_files(paths, files_from=files, snapshot=self.snapshot, **self.scan_options)
+        if self.snapshot:
+            self.snapshot.commit()
+        if self.stats:
+            self.stats.files_scanned += len(files)
+        return files
+
+    def group(self, files) -> dict:
+        """
+        Группирует файлы по размеру: { размер: [пути] }, только группы из двух и более файлов.
+        """
+        grouped_files = group_files_by_size(files)
+        if self.stats:
+            self.stats.size_groups += len(grouped_files)
+            self.stats.candidate_files += sum(len(group) for group in grouped_files.values())
+        return grouped_files
+
+    def duplicates(self, grouped_files):
+        """
+        Находит дубликаты среди сгруппированных по размеру файлов.
+
+        :param grouped_files: Словарь { размер: [пути] } (см. group).
+        :return: Генератор пар (хэш, [ {'path', 'size', 'mtime_ns'}, ... ]) по мере подтверждения групп.
+        """
+        find_options = dict(self.find_options)
+        if find_options['chunk_size'] == "auto":
+            find_options['chunk_size'] = DEFAULT_CHUNK_SIZE
+            self.device_chunk_sizes.update(tune_chunk_sizes(grouped_files, profile_path=self.chunk_profile))
+        try:
+            yield from iter_duplicates(grouped_files, device_chunk_sizes=self.device_chunk_sizes or None,
+                                       cache=self.cache, stats=self.stats, executor=self.executor, **find_options)
+        finally:
+            if self.cache is not None:
+                self.cache.commit()
+
+    def find(self, paths, files=None):
+        """
+        Выполняет все этапы: сканирование, группировку по размеру и поиск дубликатов.
+
+        :param paths: Путь к директории или список путей.
+        :param files: Дополнительные пути к файлам (см. scan).
+        :return: Генератор пар (хэш, [ {'path', 'size', 'mtime_ns'}, ... ]).
+        """
+        grouped_files = self.group(self.scan(paths, files))
+        if not grouped_files:
+            return iter(())
+        return self.duplicates(grouped_files)
+
+    def close(self):
+        """
+        Останавливает пул потоков и закрывает кэш и снимок, открытые самим Finder.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        for resource in self._owned:
+            resource.close()
+        self._owned = []
+        logger.debug("Finder закрыт")
+
+
+def find(paths, files=None, **options):
+    """
+    Находит дубликаты в одной или нескольких директориях.
+
+    :param paths: Путь к директории или список путей.
+    :param files: Дополнительные пути к файлам (см. Finder.scan).
+    :param options: Параметры Finder (cache, snapshot, min_size, hash_type, ...).
+    :return: Генератор пар (хэш, [ {'path', 'size', 'mtime_ns'}, ... ]) по мере подтверждения групп.
+    :raises TypeError: Неизвестный параметр (сразу, а не при первой итерации).
+    """
+    finder = Finder(**options)
+
+    def iterate():
+        with finder:
+            yield from finder.find(paths, files)
+
+    return iterate()
@@ -0,0 +1,123 @@
+import os
+import sqlite3
+from collections import namedtuple
+from .logger import logger
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "find_duplicates", "hashes.sqlite")
+
+# Количество записей, после которого изменения фиксируются в базе
+COMMIT_INTERVAL = 1000
+
+CacheEntry = namedtuple("CacheEntry", ["digest", "chunks"])
+
+
+class HashCache:
+    """
+    Постоянный кэш хэшей файлов в SQLite.
+    Запись действительна, пока у файла не изменились размер, время модификации (st_mtime_ns) и inode.
+    Кроме итогового хэша, для файла может храниться список дайджестов блоков (см. hasher.read_chunk_digests),
+    в том числе неполный — если при прошлом запуске файл был отсеян по первым блокам.
+    Ключ записи (key) отделяет значения разных алгоритмов и размеров блока, например 'blake3'
+    или 'merkle:blake3:4194304'.
+    Кэширование выполняется на уровне файла: любое изменение размера, mtime или inode делает недействительной
+    всю запись, включая дайджесты блоков. Неизменившиеся участки изменённого файла не переиспользуются —
+    чтобы найти изменившиеся блоки, файл всё равно пришлось бы прочитать целиком.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Кэш может создаваться в одном потоке, а использоваться в другом (режим --watch), но не одновременно
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            " path TEXT NOT NULL, key TEXT NOT NULL, size INTEGER, mtime_ns INTEGER, inode INTEGER,"
+            " digest TEXT, chunks BLOB, chunk_len INTEGER, PRIMARY KEY (path, key))"
+        )
+        self.pending = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get(self, filepath, key, st=None):
+        """
+        Возвращает запись кэша для файла или None, если записи нет или файл изменился.
+
+        :param filepath: Путь к файлу.
+        :param key: Ключ записи (алгоритм и параметры хэширования).
+        :param st: Результат os.stat для файла (если уже получен).
+        :return: CacheEntry(digest, chunks) или None.
+        """
+        try:
+            st = st or os.stat(filepath)
+        except OSError:
+            return None
+        row = self.connection.execute(
+            "SELECT size, mtime_ns, inode, digest, chunks, chunk_len FROM hashes WHERE path = ? AND key = ?",
+            (filepath, key)
+        ).fetchone()
+        if row is None or tuple(row[:3]) != (st.st_size, st.st_mtime_ns, st.st_ino):
+            return None
+        digest, blob, chunk_len = row[3:]
+        chunks = [blob[i:i + chunk_len] for i in range(0, len(blob), chunk_len)] if blob and chunk_len else []
+        return CacheEntry(digest, chunks)
+
+    def put(self, filepath, key, digest=None, chunks=None, st=None):
+        """
+        Сохраняет хэш файла и, при наличии, список дайджестов блоков.
+
+        :param filepath: Путь к файлу.
+        :param key: Ключ записи.
+        :param digest: Итоговый хэш (None, если файл прочитан не полностью).
+        :param chunks: Список дайджестов блоков одинаковой длины.
+        :param st: Результат os.stat, полученный до чтения файла.
+        """
+        try:
+            st = st or os.stat(filepath)
+        except OSError:
+            return
+        chunks = chunks or []
+        self.connection.execute(
+            "INSERT OR REPLACE INTO hashes (path, key, size, mtime_ns, inode, digest, chunks, chunk_len)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (filepath, key, st.st_size, st.st_mtime_ns, st.st_ino, digest,
+             b"".join(chunks), len(chunks[0]) if chunks else None)
+        )
+        self.pending += 1
+        if self.pending >= COMMIT_INTERVAL:
+            self.commit()
+
+    def commit(self):
+        """
+        Фиксирует накопленные изменения.
+        """
+        try:
+            self.connection.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Не удалось сохранить кэш хэшей '{self.path}': {e}")
+        self.pending = 0
+
+    def close(self):
+        """
+        Фиксирует изменения и закрывает базу.
+        """
+        self.commit()
+        self.connection.close()
+
+
+def open_cache(path=DEFAULT_CACHE_PATH):
+    """
+    Открывает кэш хэшей; при ошибке (повреждённая база, нет прав) работа продолжается без кэша.
+
+    :param path: Путь к файлу базы SQLite.
+    :return: HashCache или None.
+    """
+    try:
+        return HashCache(path)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Не удалось открыть кэш хэшей '{path}': {e}")
+        return None
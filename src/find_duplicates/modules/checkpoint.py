@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import sqlite3
+from .logger import logger
+from .cache import HashCache
+
+CHECKPOINT_VERSION = 2
+
+# Минимальный интервал (в секундах) между фиксациями контрольной точки
+DEFAULT_CHECKPOINT_INTERVAL = 60.0
+
+
+class Checkpoint:
+    """
+    Контрольная точка долгого запуска в SQLite: результаты сканирования, группы по размеру,
+    готовые результаты по каждой группе и (через HashCache в той же базе) вычисленные хэши.
+    Изменения фиксируются не чаще одного раза в interval секунд и при закрытии, поэтому
+    после сбоя или SIGTERM теряется не больше interval секунд работы.
+    Контрольная точка привязана к параметрам запуска (run_key): при других параметрах она не используется.
+    """
+
+    def __init__(self, path, run_key, interval=DEFAULT_CHECKPOINT_INTERVAL):
+        """
+        :param path: Путь к файлу контрольной точки.
+        :param run_key: Словарь параметров, от которых зависит результат (директория, фильтры, хэш).
+        :param interval: Минимальный интервал между фиксациями в секундах.
+        """
+        self.path = path
+        self.run_key = json.dumps(run_key, sort_keys=True, ensure_ascii=False)
+        self.interval = interval
+        self.hash_cache = HashCache(path)
+        self.connection = self.hash_cache.connection
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS files (path TEXT NOT NULL)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS groups (size INTEGER PRIMARY KEY, files TEXT NOT NULL,"
+                                " result TEXT)")
+        self.last_save = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _meta(self, name):
+        row = self.connection.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name, value):
+        self.connection.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+    def resume(self) -> bool:
+        """
+        Проверяет, что контрольная точка создана с теми же параметрами; иначе очищает её.
+
+        :return: True, если можно продолжить с сохранённого состояния.
+        """
+        version, run_key = self._meta("version"), self._meta("run_key")
+        if version == str(CHECKPOINT_VERSION) and run_key == self.run_key:
+            return True
+        if run_key is not None:
+            logger.warning(f"Контрольная точка '{self.path}' создана с другими параметрами — начинаем заново")
+        self.reset()
+        return False
+
+    def reset(self):
+        """
+        Очищает сохранённое состояние и привязывает контрольную точку к текущим параметрам.
+        Хэши не удаляются: они проверяются по размеру и mtime файла.
+        """
+        self.connection.execute("DELETE FROM files")
+        self.connection.execute("DELETE FROM groups")
+        self.connection.execute("DELETE FROM meta")
+        self._set_meta("version", str(CHECKPOINT_VERSION))
+        self._set_meta("run_key", self.run_key)
+        self.save()
+
+    def load_files(self):
+        """
+        Возвращает сохранённый список файлов или None, если сканирование не было завершено.
+        """
+        if self._meta("scanned") is None:
+            return None
+        return [row[0] for row in self.connection.execute("SELECT path FROM files ORDER BY rowid")]
+
+    def save_files(self, files):
+        """
+        Сохраняет результат сканирования.
+        """
+        self.connection.execute("DELETE FROM files")
+        self.connection.executemany("INSERT INTO files (path) VALUES (?)", ((path,) for path in files))
+        self._set_meta("scanned", "1")
+        self.save()
+
+    def load_groups(self):
+        """
+        Возвращает сохранённые группы по размеру или None, если группировка не была завершена.
+        """
+        if self._meta("grouped") is None:
+            return None
+        return {size: json.loads(files) for size, files in self.connection.execute("SELECT size, files FROM groups")}
+
+    def save_groups(self, grouped_files):
+        """
+        Сохраняет группы по размеру.
+        """
+        self.connection.execute("DELETE FROM groups")
+        self.connection.executemany("INSERT INTO groups (size, files) VALUES (?, ?)",
+                                    ((size, json.dumps(files, ensure_ascii=False))
+                                     for size, files in grouped_files.items()))
+        self._set_meta("grouped", "1")
+        self.save()
+
+    def completed(self) -> dict:
+        """
+        Возвращает готовые результаты по группам: { размер: [ (хэш, [ {'path', 'size', 'mtime_ns'}, ... ]), ... ] }.
+        """
+        return {size: [(file_hash, files) for file_hash, files in json.loads(result)] for size, result in
+                self.connection.execute("SELECT size, result FROM groups WHERE result IS NOT NULL")}
+
+    def record_group(self, size, group_duplicates):
+        """
+        Отмечает группу размера size как обработанную; фиксирует изменения, если прошло interval секунд.
+        Результат — список пар (хэш, файлы): подгруппы с одинаковым хэшем хранятся раздельно.
+        """
+        self.connection.execute("UPDATE groups SET result = ? WHERE size = ?",
+                                (json.dumps(group_duplicates, ensure_ascii=False), size))
+        if time.monotonic() - self.last_save >= self.interval:
+            self.save()
+
+    def save(self):
+        """
+        Фиксирует накопленные изменения (включая хэши).
+        """
+        self.hash_cache.commit()
+        self.last_save = time.monotonic()
+
+    def close(self):
+        """
+        Фиксирует изменения и закрывает базу.
+        """
+        self.hash_cache.close()
+
+    def remove(self):
+        """
+        Закрывает и удаляет контрольную точку после успешного завершения.
+        """
+        self.close()
+        for suffix in ("", "-journal", "-wal", "-shm"):
+            try:
+                os.remove(self.path + suffix)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Не удалось удалить контрольную точку '{self.path + suffix}': {e}")
+
+
+def open_checkpoint(path, run_key, interval=DEFAULT_CHECKPOINT_INTERVAL):
+    """
+    Открывает контрольную точку; при ошибке запуск продолжается без неё.
+
+    :return: Checkpoint или None.
+    """
+    try:
+        return Checkpoint(path, run_key, interval)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Не удалось открыть контрольную точку '{path}': {e}")
+        return None
@@ -1,32 +1,82 @@
-from .hasher import compute_hash
+import os
+import hashlib
+from itertools import zip_longest, islice
+from .hasher import (compute_hash, compute_fast_hash, get_partial_content, iter_small_files, new_hash,
+                     read_chunk_digests, merkle_root, SMALL_FILE_THRESHOLD)
+from .tuning import DEFAULT_CHUNK_SIZE, chunk_size_for
+from .reader import (MMAP_THRESHOLD, use_mmap, mapped_file, iter_view_chunks, views_equal, get_buffer,
+                     sequential_access, open_file, is_direct, iter_chunks, is_sparse, data_regions,
+                     sparse_segments, iter_range, is_zero, is_page_cached, drop_page_cache)
 from .utils import check_file_exists, check_file_readable, handle_error, get_file_info
 from .logger import logger, log_execution  # Используем кастомный логгер и декоратор
 
 
 @log_execution(level="DEBUG", message="Побайтовое сравнение файлов")
-def compare_files(file1, file2, chunk_size=4 * 1024 * 1024):
+def compare_files(file1, file2, chunk_size=DEFAULT_CHUNK_SIZE, mmap_threshold=MMAP_THRESHOLD, drop_cache=True,
+                  direct_io=False):
     """
     Сравнивает два файла побайтово.
 
     Предполагается, что файлы уже прошли проверку на совпадение размера и верификацию хэша.
+    Файлы размером от mmap_threshold отображаются в память и сравниваются срезами memoryview.
+    При direct_io=True файлы читаются с O_DIRECT в выровненные буферы (mmap не используется).
+    Если хотя бы один из файлов разреженный, сравнение идёт по картам дыр (см. compare_sparse).
 
     :param file1: Путь к первому файлу.
     :param file2: Путь ко второму файлу.
     :param chunk_size: Размер блока для чтения (по умолчанию 4 МБ).
+    :param mmap_threshold: Минимальный размер файла для сравнения через mmap (None — не использовать mmap).
+    :param drop_cache: Освобождать страницы файлов из кэша после сравнения.
+    :param direct_io: Читать файлы в обход кэша страниц (O_DIRECT), если это поддерживается.
     :return: True, если файлы идентичны, иначе False.
     """
     try:
-        with open(file1, 'rb') as f1, open(file2, 'rb') as f2:
+        with open_file(file1, direct_io) as f1, open_file(file2, direct_io) as f2, \
+                sequential_access(f1, drop_cache), sequential_access(f2, drop_cache):
+            st1, st2 = os.fstat(f1.fileno()), os.fstat(f2.fileno())
+            size1 = st1.st_size
+            if size1 != st2.st_size:
+                return False
+
+            direct = is_direct(f1) or is_direct(f2)
+            if not direct and (is_sparse(st1) or is_sparse(st2)):
+                return compare_sparse(f1, f2, size1, chunk_size)
+
+            if direct:
+                for chunk1, chunk2 in zip_longest(iter_chunks(f1, chunk_size, slot=0),
+                                                  iter_chunks(f2, chunk_size, slot=1)):
+                    if chunk1 is None or chunk2 is None or not views_equal(chunk1, chunk2):
+                        return False
+                return True
+
+            if use_mmap(size1, mmap_threshold):
+                with mapped_file(f1) as view1, mapped_file(f2) as view2:
+                    for chunk1, chunk2 in zip(iter_view_chunks(view1, chunk_size),
+                                              iter_view_chunks(view2, chunk_size)):
+                        if not views_equal(chunk1, chunk2):
+                            return False
+                    return True
+
+            # Буферы потока переиспользуются между вызовами, readinto не выделяет память на блок
+            buf1 = get_buffer(chunk_size, slot=0)
+            buf2 = get_buffer(chunk_size, slot=1)
             while True:
-                chunk1 = f1.read(chunk_size)
-                chunk2 = f2.read(chunk_size)
+                n1 = f1.readinto(buf1)
+                n2 = f2.readinto(buf2)
 
-                if not chunk1 and not chunk2:
+                if n1 != n2:
+                    # Файл изменился во время чтения или прочитан не полностью
+                    return False
+
+                if not n1:
                     # Достигнут конец обоих файлов, и различий не найдено
                     return True
 
-                if chunk1 != chunk2:
-                    # Обнаружено различие в содержимом файлов
+                if n1 == chunk_size:
+                    if buf1 != buf2:
+                        # Обнаружено различие в содержимом файлов
+                        return False
+                elif not views_equal(memoryview(buf1)[:n1], memoryview(buf2)[:n2]):
                     return False
 
     except (FileNotFoundError, PermissionError) as e:
@@ -37,55 +87,416 @@ def compare_files(file1, file2, chunk_size=4 * 1024 * 1024):
         return False
 
 
+def compare_sparse(f1, f2, size, chunk_size=DEFAULT_CHUNK_SIZE) -> bool:
+    """
+    Сравнивает два файла одного размера, хотя бы один из которых разреженный.
+    Отрезки, где оба файла — дыры, не читаются вовсе; где оба содержат данные — сравниваются побайтово;
+    где дыра только в одном файле — данные другого проверяются на нули.
+    При совпадающих картах дыр читаются только области данных.
+
+    :param f1: Первый файл, открытый в режиме 'rb'.
+    :param f2: Второй файл, открытый в режиме 'rb'.
+    :param size: Размер файлов в байтах.
+    :param chunk_size: Размер блока для чтения.
+    :return: True, если содержимое файлов совпадает.
+    """
+    for start, end, data1, data2 in sparse_segments(data_regions(f1, size), data_regions(f2, size), size):
+        if data1 and data2:
+            for chunk1, chunk2 in zip_longest(iter_range(f1, start, end, chunk_size, slot=0),
+                                              iter_range(f2, start, end, chunk_size, slot=1)):
+                if chunk1 is None or chunk2 is None or not views_equal(chunk1, chunk2):
+                    return False
+        elif data1 or data2:
+            read = 0
+            for chunk in iter_range(f1 if data1 else f2, start, end, chunk_size):
+                if not is_zero(chunk):
+                    return False
+                read += len(chunk)
+            if read != end - start:
+                return False
+    return True
+
+
+@log_execution(level="DEBUG", message="Группировка небольших файлов по содержимому")
+def group_small_files(files, hash_type='blake3', executor=None) -> dict:
+    """
+    Находит дубликаты среди небольших файлов, читая каждый файл ровно один раз.
+    Файлы группируются по хэшу содержимого, вычисленному в памяти, а равенство подтверждается
+    сравнением с содержимым первого файла группы — повторное чтение с диска не требуется.
+    В памяти хранится содержимое только одного представителя на каждое различное содержимое.
+
+    :param files: Список путей к небольшим файлам одного размера.
+    :type files: List[str]
+    :param hash_type: Тип хэша для ключей результата.
+    :type hash_type: Str
+    :param executor: Пул потоков для чтения файлов (None — пул создаётся на время вызова).
+    :return: Словарь дубликатов того же вида, что и у find_potential_duplicates.
+    :rtype: Dict
+    """
+    return merge_groups(group_small_results(iter_small_files(files, hash_type, executor=executor)))
+
+
+def group_small_results(results):
+    """
+    Группирует прочитанные небольшие файлы одного размера по содержимому (см. group_small_files).
+    Позволяет читать файлы многих групп одним потоком пакетов и разбирать результаты по группам.
+
+    :param results: Итерируемое кортежей (путь, хэш, содержимое, информация о файле) из iter_small_files.
+    :return: Генератор пар (хэш, [ информация о файлах ]); файлы с одинаковым хэшем, но разным
+             содержимым (коллизия) образуют отдельные пары с одним и тем же хэшем.
+    """
+    groups = {}
+    for _, file_hash, data, file_info in results:
+        if data is None:
+            continue
+        candidates = groups.setdefault(file_hash, [])
+        for representative, infos in candidates:
+            if representative == data:
+                infos.append(file_info)
+                break
+        else:
+            candidates.append((data, [file_info]))
+
+    for file_hash, candidates in groups.items():
+        # Информация о файлах снята до чтения, а не после сравнения (см. read_small_files_batch)
+        for _, confirmed in candidates:
+            if len(confirmed) > 1:
+                logger.debug(f"Найдены дубликаты с хэшем {file_hash}: {confirmed}")
+                yield file_hash, confirmed
+
+
+def merge_groups(groups) -> dict:
+    """
+    Собирает пары (хэш, файлы) в словарь { хэш: файлы }. Группы с одинаковым хэшем, но разным
+    содержимым объединяются — такой словарь годится только для отчёта, но не для действий над файлами.
+    """
+    duplicates = {}
+    for file_hash, files in groups:
+        duplicates.setdefault(file_hash, []).extend(files)
+    return duplicates
+
+
+@log_execution(level="DEBUG", message="Предварительный отсев файлов по началу и концу содержимого")
+def filter_by_partial_content(files, partial_size) -> list:
+    """
+    Разбивает группу файлов одного размера по первым и последним partial_size байтам
+    и оставляет только файлы, у которых есть хотя бы один кандидат с тем же началом и концом.
+    В памяти хранится только дайджест прочитанных фрагментов.
+
+    :param files: Список путей к файлам одного размера.
+    :type files: List[str]
+    :param partial_size: Количество байт с начала и с конца файла.
+    :type partial_size: Int
+    :return: Список файлов, оставшихся кандидатами в дубликаты.
+    :rtype: List[str]
+    """
+    partial_groups = {}
+    for file in files:
+        start, end = get_partial_content(file, partial_size)
+        digest = hashlib.blake2b(start)
+        digest.update(end)
+        partial_groups.setdefault(digest.digest(), []).append(file)
+    return [file for group in partial_groups.values() if len(group) > 1 for file in group]
+
+
+@log_execution(level="DEBUG", message="Предварительный отсев файлов по быстрому хэшу")
+def filter_by_fast_hash(files, drop_cache=True, direct_io=False, chunk_size=DEFAULT_CHUNK_SIZE,
+                        device_chunk_sizes=None) -> list:
+    """
+    Разбивает группу файлов одного размера по быстрому некриптографическому хэшу
+    и оставляет только файлы, у которых есть хотя бы один кандидат с тем же хэшем.
+
+    :param files: Список путей к файлам одного размера.
+    :type files: List[str]
+    :param drop_cache: Освобождать страницы прочитанных файлов из кэша.
+    :type drop_cache: Bool
+    :param direct_io: Читать файлы в обход кэша страниц (O_DIRECT).
+    :type direct_io: Bool
+    :param chunk_size: Размер блока чтения по умолчанию.
+    :type chunk_size: Int
+    :param device_chunk_sizes: Размеры блоков по устройствам { st_dev: размер } (см. tuning).
+    :type device_chunk_sizes: Dict
+    :return: Список файлов, оставшихся кандидатами в дубликаты.
+    :rtype: List[str]
+    """
+    fast_groups = {}
+    for file in files:
+        fast_hash = compute_fast_hash(file, chunk_size=chunk_size_for(file, device_chunk_sizes, chunk_size),
+                                      drop_cache=drop_cache, direct_io=direct_io)
+        if fast_hash.startswith("Error"):
+            logger.warning(f"Файл {file} исключён из сравнения: {fast_hash}")
+            continue
+        fast_groups.setdefault(fast_hash, []).append(file)
+    return [file for group in fast_groups.values() if len(group) > 1 for file in group]
+
+
+@log_execution(level="DEBUG", message="Группировка файлов по дайджестам блоков")
+def group_by_chunk_digests(files, size, hash_type='blake3', chunk_size=DEFAULT_CHUNK_SIZE, cache=None,
+                           drop_cache=True, direct_io=False) -> dict:
+    """
+    Группирует файлы одного размера по дайджестам блоков (дереву Меркла).
+    Блоки читаются раундами растущей длины (1, 2, 4, ... блока), и после каждого раунда группа
+    разбивается по только что прочитанным дайджестам: файл, разошедшийся с остальными на первом
+    отличающемся блоке, дальше не читается. Дайджесты из кэша (для неизменившихся файлов) не перечитываются,
+    а новые — сохраняются в кэш, в том числе неполные.
+
+    :param files: Список путей к файлам одного размера.
+    :type files: List[str]
+    :param size: Размер файлов в байтах.
+    :type size: Int
+    :param hash_type: Тип хэша блоков.
+    :type hash_type: Str
+    :param chunk_size: Размер блока в байтах.
+    :type chunk_size: Int
+    :param cache: Кэш хэшей (HashCache) или None.
+    :param drop_cache: Освобождать страницы прочитанных файлов из кэша.
+    :type drop_cache: Bool
+    :param direct_io: Читать файлы в обход кэша страниц (O_DIRECT).
+    :type direct_io: Bool
+    :return: Словарь { корень дерева Меркла: [пути] } только для групп из двух и более файлов.
+    :rtype: Dict
+    """
+    key = f"merkle:{hash_type}:{chunk_size}"
+    total = -(-size // chunk_size)
+    stats, digests, cached = {}, {}, {}
+    for file in files:
+        try:
+            stats[file] = os.stat(file)
+        except OSError as e:
+            logger.warning(f"Файл {file} исключён из сравнения: {e}")
+            continue
+        entry = cache.get(file, key, stats[file]) if cache else None
+        digests[file] = list(entry.chunks) if entry else []
+        cached[file] = len(digests[file])
+
+    groups = [list(digests)] if len(digests) > 1 else []
+    done, step = 0, 1
+    while groups and done < total:
+        stop = min(total, done + step)
+        next_groups = []
+        for group in groups:
+            by_chunks = {}
+            for file in group:
+                known = digests[file]
+                if len(known) < stop:
+                    try:
+                        known.extend(read_chunk_digests(file, hash_type, chunk_size, start=len(known),
+                                                        count=stop - len(known), drop_cache=drop_cache,
+                                                        direct_io=direct_io))
+                    except OSError as e:
+                        logger.warning(f"Файл {file} исключён из сравнения: {e}")
+                        continue
+                by_chunks.setdefault(tuple(known[done:stop]), []).append(file)
+            if len(by_chunks) > 1:
+                logger.debug(f"Группа из {len(group)} файлов разошлась в блоках {done}–{stop - 1}")
+            next_groups.extend(g for g in by_chunks.values() if len(g) > 1)
+        groups = next_groups
+        done = stop
+        step *= 2
+
+    if cache:
+        for file, known in digests.items():
+            if len(known) > cached[file]:
+                cache.put(file, key, merkle_root(known, hash_type) if len(known) == total else None,
+                          known, stats[file])
+    return {merkle_root(digests[group[0]], hash_type): group for group in groups}
+
+
+@log_execution(level="DEBUG", message="Вычисление хэша с использованием кэша")
+def cached_hash(file, hash_type='blake3', cache=None, **hash_options) -> str:
+    """
+    Возвращает хэш файла из кэша, если файл не изменился, иначе вычисляет его и сохраняет в кэш.
+
+    :param file: Путь к файлу.
+    :param hash_type: Тип хэша.
+    :param cache: Кэш хэшей (HashCache) или None.
+    :param hash_options: Дополнительные параметры compute_hash.
+    :return: Хэш файла или сообщение об ошибке, начинающееся с 'Error:'.
+    """
+    if cache is None:
+        return compute_hash(file, hash_type, **hash_options)
+    st = os.stat(file)
+    entry = cache.get(file, hash_type, st)
+    if entry and entry.digest:
+        return entry.digest
+    file_hash = compute_hash(file, hash_type, **hash_options)
+    if file_hash and not file_hash.startswith("Error"):
+        cache.put(file, hash_type, file_hash, st=st)
+    return file_hash
+
+
+def iter_duplicates(grouped_files, hash_type='blake3', drop_cache=True, direct_io=False,
+                    prehash=False, chunk_size=DEFAULT_CHUNK_SIZE, device_chunk_sizes=None,
+                    partial_size=0, small_file_threshold=SMALL_FILE_THRESHOLD, merkle=False,
+                    cache=None, on_group_done=None, stats=None, verify=True, executor=None):
+    """
+    Находит дубликаты и отдаёт группы по мере их подтверждения, не накапливая результат в памяти.
+    Группы одного размера обрабатываются по очереди: файлы группируются по хэшу, а совпадение хэшей
+    подтверждается побайтовым сравнением с опорным файлом. При partial_size > 0 группы одного размера
+    сначала разбиваются по первым и последним байтам файлов, при prehash=True — по быстрому
+    некриптографическому хэшу, и криптографический хэш считается только для оставшихся
+    кандидатов. Файлы меньше small_file_threshold читаются один раз и сравниваются в памяти
+    (см. group_small_files), а все пустые файлы без открытия образуют одну группу с хэшем
+    пустого содержимого. При merkle=True вместо хэша целого файла группы разбиваются по дайджестам
+    блоков (см. group_by_chunk_digests), а ключом результата служит корень дерева Меркла.
+    Если передан cache, хэши и дайджесты блоков неизменившихся файлов берутся из него.
+    Отдаёт пары вида:
+        (хэш, [ {'path': путь_файла, 'size': размер, 'mtime_ns': время_модификации}, ... ])
+    Файлы каждой пары побайтово идентичны; при коллизии хэша (verify=True) файлы с разным
+    содержимым отдаются отдельными парами с одним и тем же хэшем.
+    :param grouped_files: Файлы, сгруппированные по размеру: { размер: [пути] }
+    :type grouped_files: Dict
+    :param hash_type: Тип хэша для вычисления (по умолчанию 'blake3')
+    :type hash_type: Str
+    :param drop_cache: Освобождать страницы файлов группы из кэша после её обработки (кроме небольших файлов
+                       и файлов, страницы которых были в кэше до чтения)
+    :type drop_cache: Bool
+    :param direct_io: Читать файлы в обход кэша страниц (O_DIRECT)
+    :type direct_io: Bool
+    :param prehash: Отсеивать кандидатов быстрым хэшем перед криптографическим
+    :type prehash: Bool
+    :param chunk_size: Размер блока чтения по умолчанию
+    :type chunk_size: Int
+    :param device_chunk_sizes: Размеры блоков по устройствам { st_dev: размер } (см. tuning)
+    :type device_chunk_sizes: Dict
+    :param partial_size: Размер начального и конечного фрагментов для предварительного сравнения (0 — не сравнивать)
+    :type partial_size: Int
+    :param small_file_threshold: Файлы меньше этого размера сравниваются в памяти (None или 0 — отключено)
+    :type small_file_threshold: Int
+    :param merkle: Группировать по дайджестам блоков с остановкой на первом отличающемся блоке
+    :type merkle: Bool
+    :param cache: Постоянный кэш хэшей (HashCache) или None
+    :param on_group_done: Функция (размер, [ (хэш, файлы), ... ]), вызываемая после обработки каждой группы
+                          размера (например, для записи контрольной точки)
+    :param stats: Статистика запуска (RunStats): учитывает прочитанные файлы и освобождаемый объём групп
+    :param verify: Подтверждать совпадение хэшей побайтовым сравнением. Отключается, когда содержимое
+                   всё равно сверит ядро (действие dedupe через FIDEDUPERANGE)
+    :param executor: Пул потоков для чтения небольших файлов, переиспользуемый между вызовами (см. api.Finder);
+                     None — пул создаётся один раз на весь вызов
+    :return: Генератор пар (хэш, список файлов группы).
+    """
+    # Внутри группы файлы читаются несколько раз (хэш, затем побайтовое сравнение), поэтому страницы
+    # освобождаются не после каждого чтения, а когда группа обработана целиком
+    io_options = {'drop_cache': False, 'direct_io': direct_io}
+    release_pages = drop_cache and not direct_io
+
+    def process_group(size, files):
+        if size == 0:
+            # Пустые файлы идентичны по определению — открывать и сравнивать их незачем
+            logger.info(f"Пустых файлов: {len(files)} — объединены в одну группу без чтения")
+            yield new_hash(hash_type).hexdigest(), [get_file_info(file) for file in files]
+            return
+        if is_small(size):
+            if stats:
+                stats.add_hashed(size, len(files))
+            # Результаты этой группы — следующие len(files) элементов общего потока чтения
+            yield from group_small_results(islice(small_results, len(files)))
+            return
+        # Размер и mtime снимаются до первого чтения: если файл изменится после этого, запись группы
+        # это покажет и действие над ним будет отменено (см. actions.verify_unchanged)
+        infos = {file: get_file_info(file) for file in files}
+        if partial_size:
+            files = filter_by_partial_content(files, partial_size)
+        if prehash:
+            files = filter_by_fast_hash(files, chunk_size=chunk_size, device_chunk_sizes=device_chunk_sizes,
+                                        **io_options)
+        hash_dict = {}
+        if stats:
+            stats.add_hashed(size, len(files))
+        if merkle:
+            hash_dict = group_by_chunk_digests(files, size, hash_type, chunk_size, cache=cache, **io_options)
+            files = []
+        for file in files:
+            try:
+                check_file_exists(file)
+                check_file_readable(file)
+                file_hash = cached_hash(file, hash_type, cache,
+                                        chunk_size=chunk_size_for(file, device_chunk_sizes, chunk_size),
+                                        **io_options)
+                if file_hash and file_hash.startswith("Error:"):
+                    # Сообщения об ошибке одинаковы у разных файлов и не должны образовывать группу
+                    logger.warning(f"Файл {file} исключён из сравнения: {file_hash}")
+                elif file_hash:
+                    hash_dict.setdefault(file_hash, []).append(file)
+            except Exception as file_error:
+                logger.error(f"Ошибка при обработке файла {file}: {file_error}")
+                handle_error(file_error)
+
+        for file_hash, file_group in hash_dict.items():
+            if len(file_group) > 1 and not verify:
+                yield file_hash, [infos[file] for file in file_group]
+            elif len(file_group) > 1:
+                # Каждая подгруппа, подтверждённая побайтово, отдаётся отдельно: при коллизии хэша
+                # файлы с разным содержимым не должны попасть в одну группу действия
+                while file_group:
+                    ref_file = file_group.pop(0)
+                    ref_chunk_size = chunk_size_for(ref_file, device_chunk_sizes, chunk_size)
+                    group_entry = [infos[ref_file]]
+                    non_duplicates = []
+                    for other_file in file_group:
+                        if compare_files(ref_file, other_file, chunk_size=ref_chunk_size, **io_options):
+                            group_entry.append(infos[other_file])
+                        else:
+                            non_duplicates.append(other_file)
+                    file_group = non_duplicates
+                    if len(group_entry) > 1:
+                        logger.debug(f"Найдены дубликаты с хэшем {file_hash}: {group_entry}")
+                        yield file_hash, group_entry
+
+    def is_small(size):
+        return bool(small_file_threshold) and 0 < size < small_file_threshold
+
+    # Небольшие файлы всех групп читаются одним потоком пакетов (пакеты не разбиваются по группам,
+    # пул создаётся один раз), поэтому такие группы обрабатываются первыми, в исходном порядке
+    small_groups = [(size, files) for size, files in grouped_files.items() if is_small(size)]
+    other_groups = [(size, files) for size, files in grouped_files.items() if not is_small(size)]
+    small_results = iter_small_files([file for _, files in small_groups for file in files], hash_type,
+                                     executor=executor) if small_groups else None
+
+    for size, files in small_groups + other_groups:
+        group_duplicates = []
+        # Небольшие файлы читаются один раз и из кэша не вытесняются; страницы файлов, которые уже были
+        # в кэше до поиска, принадлежат рабочему набору других процессов и тоже сохраняются
+        drop_group = release_pages and size > 0 and not is_small(size)
+        cached = {file for file in files if is_page_cached(file)} if drop_group else set()
+        try:
+            for file_hash, confirmed_duplicates in process_group(size, files):
+                group_duplicates.append((file_hash, confirmed_duplicates))
+                if stats:
+                    stats.add_group(file_hash, confirmed_duplicates)
+                yield file_hash, confirmed_duplicates
+        finally:
+            if drop_group:
+                for file in files:
+                    if file not in cached:
+                        drop_page_cache(file)
+        if on_group_done:
+            on_group_done(size, group_duplicates)
+
+
 @log_execution(level="INFO", message="Поиск потенциальных дубликатов")
-def find_potential_duplicates(grouped_files, hash_type='blake3') -> dict:
+def find_potential_duplicates(grouped_files, hash_type='blake3', drop_cache=True, direct_io=False,
+                              prehash=False, chunk_size=DEFAULT_CHUNK_SIZE, device_chunk_sizes=None,
+                              partial_size=0, small_file_threshold=SMALL_FILE_THRESHOLD, merkle=False,
+                              cache=None, on_group_done=None, stats=None, verify=True, executor=None) -> dict:
     """
-    Находит потенциальные дубликаты, группируя файлы по хэшу, затем
-    используя опорное побайтовое сравнение. Возвращает словарь вида:
+    Находит потенциальные дубликаты (см. iter_duplicates) и возвращает их словарём вида:
     {
         хэш: [ {'path': путь_файла, 'size': размер}, ... ]
     }
-    :param grouped_files: Группированные файлы по хэшу
-    :type grouped_files: Dict
-    :param hash_type: Тип хэша для вычисления (по умолчанию 'blake3')
-    :type hash_type: Str
+    Параметры совпадают с iter_duplicates. Группы с одинаковым хэшем объединяются (см. merge_groups).
+    При критической ошибке возвращается пустой словарь.
+
     :return: Словарь дубликатов
     :type duplicates: Dict
     """
-    duplicates = {}
     try:
-        for size, files in grouped_files.items():
-            hash_dict = {}
-            for file in files:
-                try:
-                    check_file_exists(file)
-                    check_file_readable(file)
-                    file_hash = compute_hash(file, hash_type)
-                    if file_hash:
-                        hash_dict.setdefault(file_hash, []).append(file)
-                except Exception as file_error:
-                    logger.error(f"Ошибка при обработке файла {file}: {file_error}")
-                    handle_error(file_error)
-
-            for file_hash, file_group in hash_dict.items():
-                if len(file_group) > 1:
-                    confirmed_duplicates = []
-                    while file_group:
-                        ref_file = file_group.pop(0)
-                        group_entry = [get_file_info(ref_file)]
-                        non_duplicates = []
-                        for other_file in file_group:
-                            if compare_files(ref_file, other_file):
-                                group_entry.append(get_file_info(other_file))
-                            else:
-                                non_duplicates.append(other_file)
-                        file_group = non_duplicates
-                        if len(group_entry) > 1:
-                            confirmed_duplicates.extend(group_entry)
-                    if confirmed_duplicates:
-                        duplicates[file_hash] = confirmed_duplicates
-                        logger.debug(f"Найдены дубликаты с хэшем {file_hash}: {confirmed_duplicates}")
-        return duplicates
+        groups = iter_duplicates(grouped_files, hash_type, drop_cache=drop_cache, direct_io=direct_io,
+                                 prehash=prehash, chunk_size=chunk_size, device_chunk_sizes=device_chunk_sizes,
+                                 partial_size=partial_size, small_file_threshold=small_file_threshold,
+                                 merkle=merkle, cache=cache, on_group_done=on_group_done, stats=stats,
+                                 verify=verify, executor=executor)
+        return merge_groups(groups)
     except Exception as e:
         logger.critical(f"Критическая ошибка при поиске дубликатов: {e}")
         handle_error(e)
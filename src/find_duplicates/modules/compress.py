@@ -0,0 +1,132 @@
+import io
+import os
+import zlib
+import queue
+import threading
+from .logger import logger
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Расширения файлов, по которым сжатие выбирается автоматически
+EXTENSIONS = {".gz": "gzip", ".xz": "xz", ".zst": "zstd"}
+
+COMPRESSIONS = ("gzip", "xz", "zstd")
+
+# Размер блока, передаваемого потоку сжатия
+BLOCK_SIZE = 1024 * 1024
+
+# Количество блоков в очереди к потоку сжатия; ограничивает память, если сжатие отстаёт от записи
+QUEUE_BLOCKS = 8
+
+
+def resolve_compression(output_file, compress="auto"):
+    """
+    Определяет алгоритм сжатия выходного файла.
+
+    :param output_file: Путь к выходному файлу.
+    :param compress: 'auto' (по расширению файла), 'none', 'gzip', 'xz' или 'zstd'.
+    :return: Имя алгоритма или None, если сжатие не нужно.
+    :raises ValueError: Неизвестный алгоритм или zstd без установленного пакета zstandard.
+    """
+    if compress in (None, "auto"):
+        compress = EXTENSIONS.get(os.path.splitext(output_file)[1].lower())
+    elif compress == "none":
+        compress = None
+    if compress is not None and compress not in COMPRESSIONS:
+        raise ValueError(f"Неизвестный алгоритм сжатия: {compress}")
+    if compress == "zstd" and not ZSTD_AVAILABLE:
+        raise ValueError("Сжатие zstd недоступно: установите пакет zstandard")
+    return compress
+
+
+def new_compressor(compress):
+    """
+    Создаёт объект потокового сжатия с методами compress(data) и flush().
+    """
+    if compress == "gzip":
+        # wbits=31 — формат gzip (заголовок и CRC), читается модулем gzip и утилитой gunzip
+        return zlib.compressobj(6, zlib.DEFLATED, 31)
+    if compress == "xz":
+        import lzma
+
+        return lzma.LZMACompressor(format=lzma.FORMAT_XZ)
+    if compress == "zstd":
+        return zstandard.ZstdCompressor().compressobj()
+    raise ValueError(f"Неизвестный алгоритм сжатия: {compress}")
+
+
+class CompressedWriter(io.RawIOBase):
+    """
+    Двоичный поток, сжимающий записанные данные в фоновом потоке.
+    write только ставит блок в ограниченную очередь, поэтому запись результатов
+    не ждёт сжатия, пока очередь не заполнена. Ошибка фонового потока
+    передаётся при следующей записи или закрытии.
+    """
+
+    def __init__(self, output_file, compress):
+        super().__init__()
+        self.compress = compress
+        self.compressor = new_compressor(compress)
+        self.file = open(output_file, "wb")
+        self.blocks = queue.Queue(maxsize=QUEUE_BLOCKS)
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name=f"compress-{compress}", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            block = self.blocks.get()
+            if block is None:
+                break
+            if self.error is not None:
+                continue
+            try:
+                self.file.write(self.compressor.compress(block))
+            except Exception as e:
+                self.error = e
+
+    def _check(self):
+        if self.error is not None:
+            raise OSError(f"Ошибка сжатия ({self.compress}): {self.error}")
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._check()
+        self.blocks.put(bytes(data))
+        return len(data)
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self.blocks.put(None)
+            self.thread.join()
+            self._check()
+            self.file.write(self.compressor.flush())
+        finally:
+            self.file.close()
+            super().close()
+
+
+def open_output(output_file, compress=None, newline=None, encoding="utf-8", buffering=BLOCK_SIZE):
+    """
+    Открывает выходной текстовый файл, при необходимости со сжатием в фоновом потоке.
+
+    :param output_file: Путь к файлу.
+    :param compress: Алгоритм сжатия (см. resolve_compression) или None.
+    :param newline: Параметр newline для open.
+    :param encoding: Кодировка текста.
+    :param buffering: Размер буфера записи.
+    :return: Текстовый поток для записи.
+    """
+    if compress is None:
+        return open(output_file, mode='w', newline=newline, encoding=encoding, buffering=buffering)
+    logger.debug(f"Вывод сжимается ({compress}) в фоновом потоке: {output_file}")
+    raw = CompressedWriter(output_file, compress)
+    return io.TextIOWrapper(io.BufferedWriter(raw, buffer_size=buffering), encoding=encoding, newline=newline)
@@ -1,8 +1,15 @@
 import hashlib
 import os
-from concurrent.futures import as_completed, ProcessPoolExecutor
+import zlib
+from collections import deque
+from itertools import islice
+# ProcessPoolExecutor импортируется в compute_hash_parallel: он подгружает multiprocessing
+from concurrent.futures import as_completed, ThreadPoolExecutor
 from .logger import logger, log_execution
-from .utils import handle_error
+from .utils import handle_error, get_file_info
+from .tuning import DEFAULT_CHUNK_SIZE
+from .reader import (MMAP_THRESHOLD, use_mmap, mapped_file, iter_view_chunks, iter_chunks, sequential_access,
+                     open_file, is_direct, is_sparse, iter_sparse_chunks, iter_file_chunks)
 
 try:
     import blake3
@@ -10,11 +17,50 @@ try:
 except ImportError:
     BLAKE3_AVAILABLE = False
 
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+DEFAULT_PARTIAL_SIZE = 16 * 1024 * 1024
+
+# Файлы меньше этого размера читаются целиком один раз и сравниваются в памяти
+SMALL_FILE_THRESHOLD = 64 * 1024
+# Количество небольших файлов, читаемых одной задачей пула
+SMALL_FILE_BATCH = 256
+
+# Файлы от этого размера хэшируются многопоточным blake3 (max_threads=AUTO) в основном процессе
+PARALLEL_HASH_THRESHOLD = 1024 * 1024 * 1024
+
+
+def is_parallel_hash(size, hash_type='blake3', parallel_threshold=PARALLEL_HASH_THRESHOLD) -> bool:
+    """
+    Определяет, нужно ли хэшировать файл данного размера многопоточным blake3.
+
+    :param size: Размер файла в байтах.
+    :param hash_type: Тип хэша.
+    :param parallel_threshold: Порог в байтах; None отключает многопоточный режим.
+    :return: True, если файл следует хэшировать многопоточно.
+    """
+    return (hash_type == 'blake3' and BLAKE3_AVAILABLE
+            and parallel_threshold is not None and size >= parallel_threshold)
+
 
 @log_execution(level="DEBUG", message="Вычисление хэша файла")
-def compute_hash(filepath, hash_type='blake3', chunk_size=4 * 1024 * 1024):
+def compute_hash(filepath, hash_type='blake3', chunk_size=DEFAULT_CHUNK_SIZE, mmap_threshold=MMAP_THRESHOLD,
+                 parallel_threshold=PARALLEL_HASH_THRESHOLD, drop_cache=True, direct_io=False):
     """
     Вычисляет хэш-сумму файла.
+    Файлы размером от mmap_threshold отображаются в память и хэшируются срезами memoryview
+    (для blake3 — через update_mmap), меньшие файлы читаются блоками в переиспользуемый буфер.
+    Файлы от parallel_threshold при blake3 хэшируются на всех ядрах (max_threads=AUTO).
+    Перед чтением ядру сообщается о последовательном доступе, после — страницы файла
+    освобождаются из кэша (если drop_cache=True).
+    При direct_io=True файл читается с O_DIRECT блоками в выровненный буфер (mmap и многопоточный
+    blake3 в этом режиме не используются, так как работают через кэш страниц).
+    У разреженных файлов читаются только области данных (SEEK_DATA/SEEK_HOLE), а дыры подаются
+    в хэш нулевыми блоками из памяти, поэтому хэш совпадает с хэшем неразреженной копии.
 
     :param filepath: Путь к файлу.
     :type filepath: str
@@ -22,18 +68,39 @@ def compute_hash(filepath, hash_type='blake3', chunk_size=4 * 1024 * 1024):
     :type hash_type: str
     :param chunk_size: Размер блока для чтения (по умолчанию 4 МБ).
     :type chunk_size: int
+    :param mmap_threshold: Минимальный размер файла для чтения через mmap (None — не использовать mmap).
+    :type mmap_threshold: int | None
+    :param parallel_threshold: Минимальный размер файла для многопоточного blake3 (None — не использовать).
+    :type parallel_threshold: int | None
+    :param drop_cache: Освобождать страницы файла из кэша после хэширования.
+    :type drop_cache: bool
+    :param direct_io: Читать файл в обход кэша страниц (O_DIRECT), если это поддерживается.
+    :type direct_io: bool
     :return: Хэш-сумма файла или None при ошибке.
     :rtype: str | None
     """
     try:
-        if hash_type == 'blake3' and BLAKE3_AVAILABLE:
-            hash_func = blake3.blake3()
-        else:
-            hash_func = hashlib.new(hash_type)
+        hash_func = new_hash(hash_type)
 
-        with open(filepath, 'rb') as f:
-            for chunk in iter(lambda: f.read(chunk_size), b''):
-                hash_func.update(chunk)
+        with open_file(filepath, direct_io) as f, sequential_access(f, drop_cache):
+            st = os.fstat(f.fileno())
+            size = st.st_size
+            direct = is_direct(f)
+            if not direct and is_sparse(st):
+                for chunk in iter_sparse_chunks(f, size, chunk_size):
+                    hash_func.update(chunk)
+            elif not direct and is_parallel_hash(size, hash_type, parallel_threshold):
+                hash_func = blake3.blake3(max_threads=blake3.blake3.AUTO)
+                hash_func.update_mmap(filepath)
+            elif direct or not use_mmap(size, mmap_threshold):
+                for chunk in iter_chunks(f, chunk_size):
+                    hash_func.update(chunk)
+            elif hasattr(hash_func, 'update_mmap'):
+                hash_func.update_mmap(filepath)
+            else:
+                with mapped_file(f) as view:
+                    for chunk in iter_view_chunks(view, chunk_size):
+                        hash_func.update(chunk)
 
         return hash_func.hexdigest()
 
@@ -48,10 +115,188 @@ def compute_hash(filepath, hash_type='blake3', chunk_size=4 * 1024 * 1024):
         return f"Error: {str(e)}"  # <-- вместо None
 
 
+def read_chunk_digests(filepath, hash_type='blake3', chunk_size=DEFAULT_CHUNK_SIZE, start=0, count=None,
+                       drop_cache=True, direct_io=False) -> list:
+    """
+    Вычисляет дайджесты блоков файла фиксированного размера — листья дерева Меркла.
+    Читаются только блоки с номерами [start, start + count), поэтому список можно
+    наращивать по мере необходимости и прекращать чтение, как только файл разошёлся с остальными.
+
+    :param filepath: Путь к файлу.
+    :param hash_type: Тип хэша блоков.
+    :param chunk_size: Размер блока в байтах.
+    :param start: Номер первого читаемого блока.
+    :param count: Количество блоков (None — до конца файла).
+    :param drop_cache: Освобождать страницы файла из кэша после чтения.
+    :param direct_io: Читать файл в обход кэша страниц (O_DIRECT).
+    :return: Список дайджестов (bytes).
+    """
+    digests = []
+    with open_file(filepath, direct_io) as f, sequential_access(f, drop_cache):
+        f.seek(start * chunk_size)
+        chunks = iter_chunks(f, chunk_size)
+        try:
+            for chunk in islice(chunks, count):
+                hash_func = new_hash(hash_type)
+                hash_func.update(chunk)
+                digests.append(hash_func.digest())
+        finally:
+            chunks.close()
+    return digests
+
+
+def merkle_root(digests, hash_type='blake3') -> str:
+    """
+    Сворачивает дайджесты блоков в корень дерева Меркла (попарно, уровень за уровнем).
+    Внутренние узлы хэшируются с префиксом b'\\x01', чтобы не совпадать с листьями.
+    Дерево служит для остановки сравнения на первом отличающемся блоке, а не для частичного пересчёта:
+    кэш (см. cache.HashCache) хранит дайджесты блоков на уровне файла, и после изменения файла они
+    не используются — файл читается и хэшируется заново целиком.
+
+    :param digests: Список дайджестов блоков.
+    :param hash_type: Тип хэша.
+    :return: Корневой хэш в шестнадцатеричном виде.
+    """
+    level = list(digests) or [new_hash(hash_type).digest()]
+    while len(level) > 1:
+        next_level = []
+        for i in range(0, len(level), 2):
+            hash_func = new_hash(hash_type)
+            hash_func.update(b"\x01" + b"".join(level[i:i + 2]))
+            next_level.append(hash_func.digest())
+        level = next_level
+    return level[0].hex()
+
+
+def new_hash(hash_type='blake3'):
+    """
+    Создаёт объект хэш-функции указанного типа (blake3, если доступен, иначе hashlib).
+    """
+    if hash_type == 'blake3' and BLAKE3_AVAILABLE:
+        return blake3.blake3()
+    return hashlib.new(hash_type)
+
+
+def read_small_files_batch(filepaths, hash_type='blake3') -> list:
+    """
+    Читает пакет небольших файлов целиком и вычисляет хэш содержимого в памяти.
+    Информация о файле (см. utils.get_file_info) снимается до чтения: изменение файла после
+    сравнения обнаружится при проверке перед действием над дубликатами.
+
+    :param filepaths: Список путей к файлам.
+    :param hash_type: Тип хэша.
+    :return: Список кортежей (путь, хэш, содержимое, информация о файле); при ошибке содержимое None,
+             а вместо хэша — сообщение, начинающееся с 'Error:'.
+    """
+    results = []
+    for filepath in filepaths:
+        file_info = get_file_info(filepath)
+        try:
+            with open(filepath, 'rb') as f:
+                data = f.read()
+            hash_func = new_hash(hash_type)
+            hash_func.update(data)
+            results.append((filepath, hash_func.hexdigest(), data, file_info))
+        except FileNotFoundError:
+            logger.warning(f"Ошибка доступа к файлу '{filepath}': Файл не найден")
+            results.append((filepath, "Error: File not found", None, file_info))
+        except PermissionError:
+            logger.warning(f"Ошибка доступа к файлу '{filepath}': Permission denied")
+            results.append((filepath, "Error: Permission denied", None, file_info))
+        except Exception as e:
+            logger.error(f"Неизвестная ошибка при чтении '{filepath}': {e}")
+            results.append((filepath, f"Error: {str(e)}", None, file_info))
+    return results
+
+
+def iter_small_files(filepaths, hash_type='blake3', batch_size=SMALL_FILE_BATCH, num_workers=None, executor=None):
+    """
+    Читает небольшие файлы пакетами в пуле потоков и возвращает результаты в исходном порядке.
+    Одновременно в работе держится не больше двух пакетов на поток, чтобы содержимое
+    прочитанных, но ещё не обработанных файлов не накапливалось в памяти.
+
+    :param filepaths: Список путей к файлам.
+    :param hash_type: Тип хэша.
+    :param batch_size: Количество файлов в одной задаче пула.
+    :param num_workers: Количество потоков (по умолчанию — как в ThreadPoolExecutor).
+    :param executor: Готовый пул потоков, переиспользуемый между вызовами (None — создать пул на время вызова).
+    :return: Генератор кортежей (путь, хэш, содержимое, информация о файле), см. read_small_files_batch.
+    """
+    num_workers = num_workers or min(32, (os.cpu_count() or 1) + 4)
+    if executor is not None:
+        yield from _iter_batches(executor, filepaths, hash_type, batch_size, num_workers)
+        return
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        yield from _iter_batches(executor, filepaths, hash_type, batch_size, num_workers)
+
+
+def _iter_batches(executor, filepaths, hash_type, batch_size, num_workers):
+    window = 2 * num_workers
+    pending = deque()
+    try:
+        for start in range(0, len(filepaths), batch_size):
+            pending.append(executor.submit(read_small_files_batch, filepaths[start:start + batch_size], hash_type))
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        # Чужой пул не закрывается, поэтому при досрочном завершении отменяем невыполненные задачи
+        for future in pending:
+            future.cancel()
+
+
+@log_execution(level="DEBUG", message="Быстрое предварительное хэширование файла")
+def compute_fast_hash(filepath, chunk_size=DEFAULT_CHUNK_SIZE, drop_cache=True, direct_io=False):
+    """
+    Вычисляет быстрый некриптографический хэш файла для отсева заведомо разных файлов
+    до криптографического хэширования. Используется xxh3-128, если установлен пакет xxhash,
+    иначе — zlib.crc32 вместе с количеством прочитанных байт.
+
+    :param filepath: Путь к файлу.
+    :type filepath: str
+    :param chunk_size: Размер блока для чтения (по умолчанию 4 МБ).
+    :type chunk_size: int
+    :param drop_cache: Освобождать страницы файла из кэша после чтения.
+    :type drop_cache: bool
+    :param direct_io: Читать файл в обход кэша страниц (O_DIRECT), если это поддерживается.
+    :type direct_io: bool
+    :return: Строка хэша или сообщение об ошибке, начинающееся с 'Error:'.
+    :rtype: str
+    """
+    try:
+        with open_file(filepath, direct_io) as f, sequential_access(f, drop_cache):
+            if XXHASH_AVAILABLE:
+                hash_func = xxhash.xxh3_128()
+                for chunk in iter_file_chunks(f, chunk_size):
+                    hash_func.update(chunk)
+                return hash_func.hexdigest()
+
+            crc, size = 0, 0
+            for chunk in iter_file_chunks(f, chunk_size):
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+            return f"{size:x}-{crc:08x}"
+
+    except FileNotFoundError:
+        logger.warning(f"Ошибка доступа к файлу '{filepath}': Файл не найден")
+        return "Error: File not found"
+    except PermissionError:
+        logger.warning(f"Ошибка доступа к файлу '{filepath}': Permission denied")
+        return "Error: Permission denied"
+    except Exception as e:
+        logger.error(f"Неизвестная ошибка при хэшировании '{filepath}': {e}")
+        return f"Error: {str(e)}"
+
+
 @log_execution(level="DEBUG", message="Параллельное хэширование файлов")
-def compute_hash_parallel(filepaths, hash_type='blake3', num_workers=None):
+def compute_hash_parallel(filepaths, hash_type='blake3', num_workers=None,
+                          parallel_threshold=PARALLEL_HASH_THRESHOLD, drop_cache=True, direct_io=False):
     """
     Параллельное вычисление хэшей для списка файлов.
+    Небольшие файлы распределяются по пулу процессов. Очень большие файлы (от parallel_threshold
+    при blake3) хэшируются в основном процессе многопоточным blake3, пока пул занят остальными,
+    чтобы один гигантский файл не растягивал хвост выполнения на одном воркере.
 
     :param filepaths: Список путей к файлам.
     :type filepaths: list
@@ -59,13 +304,38 @@ def compute_hash_parallel(filepaths, hash_type='blake3', num_workers=None):
     :type hash_type: str
     :param num_workers: Количество параллельных процессов (по умолчанию - количество ядер CPU).
     :type num_workers: int
+    :param parallel_threshold: Минимальный размер файла для многопоточного blake3 (None — не использовать).
+    :type parallel_threshold: int | None
+    :param drop_cache: Освобождать страницы файлов из кэша после хэширования.
+    :type drop_cache: bool
+    :param direct_io: Читать файлы в обход кэша страниц (O_DIRECT).
+    :type direct_io: bool
     :return: Словарь с результатами хэширования.
     :rtype: dict
     """
+    from concurrent.futures import ProcessPoolExecutor
+
     results = {}
+    pool_files, large_files = [], []
+    for filepath in filepaths:
+        try:
+            size = os.path.getsize(filepath)
+        except OSError:
+            size = 0  # Ошибку доступа вернёт compute_hash в воркере
+        large = not direct_io and is_parallel_hash(size, hash_type, parallel_threshold)
+        (large_files if large else pool_files).append(filepath)
 
     with ProcessPoolExecutor(max_workers=num_workers) as executor:
-        future_to_file = {executor.submit(compute_hash, filepath, hash_type): filepath for filepath in filepaths}
+        future_to_file = {
+            executor.submit(compute_hash, filepath, hash_type, parallel_threshold=None,
+                            drop_cache=drop_cache, direct_io=direct_io): filepath
+            for filepath in pool_files
+        }
+
+        # Большие файлы хэшируются здесь же, параллельно с работой пула
+        for filepath in large_files:
+            results[filepath] = compute_hash(filepath, hash_type, parallel_threshold=parallel_threshold,
+                                             drop_cache=drop_cache)
 
         for future in as_completed(future_to_file):
             filepath = future_to_file[future]
@@ -82,7 +352,7 @@ def compute_hash_parallel(filepaths, hash_type='blake3', num_workers=None):
 
 
 @log_execution(level="DEBUG", message="Чтение первых и последних байтов файла")
-def get_partial_content(filepath, size=16 * 1024 * 1024) -> tuple[bytes, bytes]:
+def get_partial_content(filepath, size=DEFAULT_PARTIAL_SIZE) -> tuple[bytes, bytes]:
     """
     Возвращает первые и последние байты файла для предварительного сравнения.
 
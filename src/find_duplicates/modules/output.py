@@ -1,48 +1,398 @@
+import os
+import sys
 import csv
-from colorama import Fore, Style
+import json
+import time
+import heapq
+from operator import itemgetter
 from .utils import human_readable_size
 from .logger import logger
+from .compress import resolve_compression, open_output
+from .stats import wasted_bytes
 
+# Размер буфера записи результатов
+WRITE_BUFFER_SIZE = 1024 * 1024
 
-def write_duplicates_to_csv(duplicates, output_file):
+# Интервал (в секундах) сброса буфера на диск при потоковой записи
+FLUSH_INTERVAL = 1.0
+
+# Размер порции текста, накапливаемой перед записью при выводе дерева
+TREE_BUFFER_SIZE = 256 * 1024
+
+# Количество групп, сортируемых в памяти; остальные сбрасываются во временные файлы (внешняя сортировка)
+SORT_RUN_SIZE = 10000
+
+
+def _spill_run(groups):
+    """
+    Записывает отсортированную порцию групп во временный файл (по JSON на строку).
+    """
+    import tempfile
+
+    run = tempfile.TemporaryFile(mode='w+', encoding='utf-8')
+    for group in sorted(groups, key=itemgetter(0)):
+        run.write(json.dumps(group, ensure_ascii=False))
+        run.write("\n")
+    run.seek(0)
+    return run
+
+
+def _read_run(run):
+    for line in run:
+        group_id, files = json.loads(line)
+        yield group_id, files
+
+
+def sort_groups(groups, run_size=SORT_RUN_SIZE):
+    """
+    Сортирует группы дубликатов по хэшу, держа в памяти не больше run_size групп:
+    отсортированные порции сбрасываются во временные файлы и затем сливаются.
+
+    :param groups: Итерируемое пар (хэш, список файлов).
+    :param run_size: Количество групп в одной порции.
+    :return: Генератор пар (хэш, список файлов) в порядке возрастания хэша.
+    """
+    runs, pending = [], []
+    try:
+        for group in groups:
+            pending.append(group)
+            if len(pending) >= run_size:
+                runs.append(_spill_run(pending))
+                pending = []
+        if not runs:
+            yield from sorted(pending, key=itemgetter(0))
+            return
+        if pending:
+            runs.append(_spill_run(pending))
+            pending = []
+        logger.debug(f"Внешняя сортировка результатов: порций — {len(runs)}")
+        yield from heapq.merge(*(_read_run(run) for run in runs), key=itemgetter(0))
+    finally:
+        for run in runs:
+            run.close()
+
+
+def iter_groups(duplicates, sort=True, run_size=SORT_RUN_SIZE):
+    """
+    Приводит словарь или итерируемое групп дубликатов к итератору пар (хэш, список файлов),
+    при sort=True — упорядоченному по хэшу.
+    """
+    if isinstance(duplicates, dict):
+        return iter(sorted(duplicates.items()) if sort else duplicates.items())
+    return sort_groups(duplicates, run_size) if sort else iter(duplicates)
+
+
+def file_details(file_info) -> dict:
+    """
+    Возвращает сведения о файле группы для машиночитаемых форматов: точный размер в байтах, inode и mtime.
+    Если файл недоступен, inode и mtime равны None.
+    """
+    try:
+        st = os.stat(file_info['path'])
+        inode, mtime_ns = st.st_ino, st.st_mtime_ns
+    except OSError:
+        inode = mtime_ns = None
+    return {'path': file_info['path'], 'size': file_info['size'], 'inode': inode, 'mtime_ns': mtime_ns}
+
+
+def write_duplicates_to_csv(duplicates, output_file, sort=True, flush_interval=FLUSH_INTERVAL,
+                            run_size=SORT_RUN_SIZE, compress="auto"):
     """
     Записывает найденные дубликаты в CSV-файл.
     Ожидается, что duplicates имеет формат:
       { хэш: [ {'path': <нормализованный путь>, 'size': <размер>}, ... ] }
+    либо является итерируемым пар (хэш, [ ... ]) — например, генератором comparer.iter_duplicates.
+    Без сортировки группы записываются по мере поступления, а буфер сбрасывается на диск
+    не реже раза в flush_interval секунд, поэтому частичные результаты доступны во время поиска.
+    С сортировкой группы упорядочиваются по хэшу (для итерируемого — внешней сортировкой, см. sort_groups).
+
+    :param duplicates: Словарь или итерируемое групп дубликатов.
+    :param output_file: Путь к CSV-файлу.
+    :param sort: Упорядочить группы по хэшу.
+    :param flush_interval: Интервал сброса буфера на диск в секундах.
+    :param run_size: Количество групп в памяти при внешней сортировке.
+    :param compress: Сжатие: 'auto' (по расширению .gz/.xz/.zst), 'none', 'gzip', 'xz' или 'zstd'.
     """
+    groups = iter_groups(duplicates, sort, run_size)
+    compress = resolve_compression(output_file, compress)
     try:
-        with open(output_file, mode='w', newline='', encoding='utf-8') as file:
+        with open_output(output_file, compress, newline='', buffering=WRITE_BUFFER_SIZE) as file:
             writer = csv.writer(file)
             writer.writerow(["Группа", "Путь", "Размер"])
-            for group_id, files in sorted(duplicates.items()):
+            last_flush = time.monotonic()
+            group_count = 0
+            for group_id, files in groups:
                 for idx, file_info in enumerate(files):
                     path = file_info['path']
                     size = file_info['size']
                     hr_size = human_readable_size(size) if size is not None else "N/A"
                     writer.writerow([group_id if idx == 0 else "", path, hr_size])
-        logger.info(f"Данные успешно записаны в файл: {output_file}")
+                group_count += 1
+                if time.monotonic() - last_flush >= flush_interval:
+                    file.flush()
+                    last_flush = time.monotonic()
+        logger.info(f"Данные успешно записаны в файл: {output_file} (групп: {group_count})")
         return True
     except (OSError, IOError) as e:
         logger.error(f"Ошибка записи в файл '{output_file}': {e}")
         raise Exception(f"Ошибка записи в CSV: {e}")
 
 
-def print_tree_view(duplicates):
-    for group_id, files in enumerate(duplicates.values(), start=1):
-        print(f"{Fore.BLUE}{Style.BRIGHT}Группа {group_id}:{Style.RESET_ALL}")
+def write_duplicates_to_jsonl(duplicates, output_file, sort=True, flush_interval=FLUSH_INTERVAL,
+                              run_size=SORT_RUN_SIZE, compress="auto"):
+    """
+    Записывает дубликаты в формате JSON Lines: одна строка на группу вида
+      {"hash": <хэш>, "size": <размер в байтах>, "files": [ {"path", "size", "inode", "mtime_ns"}, ... ]}
+    Размеры записываются точно, без округления. Группы пишутся по мере поступления (см. write_duplicates_to_csv).
+
+    :param duplicates: Словарь или итерируемое групп дубликатов.
+    :param output_file: Путь к выходному файлу.
+    :param sort: Упорядочить группы по хэшу.
+    :param flush_interval: Интервал сброса буфера на диск в секундах.
+    :param run_size: Количество групп в памяти при внешней сортировке.
+    :param compress: Сжатие: 'auto' (по расширению .gz/.xz/.zst), 'none', 'gzip', 'xz' или 'zstd'.
+    """
+    groups = iter_groups(duplicates, sort, run_size)
+    compress = resolve_compression(output_file, compress)
+    try:
+        with open_output(output_file, compress, buffering=WRITE_BUFFER_SIZE) as file:
+            last_flush = time.monotonic()
+            group_count = 0
+            for group_id, files in groups:
+                record = {
+                    'hash': group_id,
+                    'size': files[0]['size'] if files else None,
+                    'files': [file_details(file_info) for file_info in files],
+                }
+                file.write(json.dumps(record, ensure_ascii=False))
+                file.write("\n")
+                group_count += 1
+                if time.monotonic() - last_flush >= flush_interval:
+                    file.flush()
+                    last_flush = time.monotonic()
+        logger.info(f"Данные успешно записаны в файл: {output_file} (групп: {group_count})")
+        return True
+    except (OSError, IOError) as e:
+        logger.error(f"Ошибка записи в файл '{output_file}': {e}")
+        raise Exception(f"Ошибка записи в JSONL: {e}")
+
+
+def write_duplicates_to_sqlite(duplicates, output_file, sort=True, flush_interval=FLUSH_INTERVAL,
+                               run_size=SORT_RUN_SIZE, compress="auto"):
+    """
+    Записывает дубликаты в базу SQLite (существующий файл перезаписывается):
+      groups (id, hash, size, file_count, wasted) — группы с индексами по хэшу и размеру;
+      files (group_id, path, size, inode, mtime_ns) — файлы групп с индексами по группе и пути.
+    Изменения фиксируются не реже раза в flush_interval секунд, поэтому база доступна для запросов во время поиска.
+
+    :param duplicates: Словарь или итерируемое групп дубликатов.
+    :param output_file: Путь к файлу базы.
+    :param sort: Упорядочить группы по хэшу (порядок id групп).
+    :param flush_interval: Интервал фиксации изменений в секундах.
+    :param run_size: Количество групп в памяти при внешней сортировке.
+    :param compress: Не поддерживается: база SQLite не сжимается (при явном запросе выводится предупреждение).
+    """
+    if compress not in (None, "auto", "none"):
+        logger.warning("Сжатие не применяется к базе SQLite — база записывается без сжатия")
+    import sqlite3
+
+    groups = iter_groups(duplicates, sort, run_size)
+    try:
+        for suffix in ("", "-journal"):
+            if os.path.exists(output_file + suffix):
+                os.remove(output_file + suffix)
+        connection = sqlite3.connect(output_file)
+        try:
+            connection.executescript(
+                "CREATE TABLE groups (id INTEGER PRIMARY KEY, hash TEXT NOT NULL, size INTEGER,"
+                " file_count INTEGER NOT NULL, wasted INTEGER);"
+                "CREATE TABLE files (group_id INTEGER NOT NULL REFERENCES groups (id), path TEXT NOT NULL,"
+                " size INTEGER, inode INTEGER, mtime_ns INTEGER);"
+                "CREATE INDEX groups_hash ON groups (hash);"
+                "CREATE INDEX groups_size ON groups (size);"
+                "CREATE INDEX files_group ON files (group_id);"
+                "CREATE INDEX files_path ON files (path);"
+            )
+            last_flush = time.monotonic()
+            group_count = 0
+            for group_id, files in groups:
+                size = files[0]['size'] if files else None
+                wasted = size * (len(files) - 1) if size is not None and files else None
+                cursor = connection.execute(
+                    "INSERT INTO groups (hash, size, file_count, wasted) VALUES (?, ?, ?, ?)",
+                    (group_id, size, len(files), wasted)
+                )
+                connection.executemany(
+                    "INSERT INTO files (group_id, path, size, inode, mtime_ns) VALUES (?, ?, ?, ?, ?)",
+                    ((cursor.lastrowid, info['path'], info['size'], info['inode'], info['mtime_ns'])
+                     for info in map(file_details, files))
+                )
+                group_count += 1
+                if time.monotonic() - last_flush >= flush_interval:
+                    connection.commit()
+                    last_flush = time.monotonic()
+            connection.commit()
+        finally:
+            connection.close()
+        logger.info(f"Данные успешно записаны в базу: {output_file} (групп: {group_count})")
+        return True
+    except (OSError, sqlite3.Error) as e:
+        logger.error(f"Ошибка записи в файл '{output_file}': {e}")
+        raise Exception(f"Ошибка записи в SQLite: {e}")
+
+
+def top_groups(duplicates, count) -> list:
+    """
+    Отбирает count групп с наибольшим освобождаемым объёмом (см. wasted_bytes).
+    Группы просматриваются один раз через кучу, в памяти хранится не больше count групп.
+
+    :param duplicates: Словарь или итерируемое групп дубликатов.
+    :param count: Количество групп.
+    :return: Список пар (хэш, список файлов) по убыванию освобождаемого объёма.
+    """
+    groups = duplicates.items() if isinstance(duplicates, dict) else duplicates
+    return heapq.nlargest(count, groups, key=lambda group: wasted_bytes(group[1]))
+
+
+def use_color(stream) -> bool:
+    """
+    Определяет, выводить ли цвета: только в терминал и если не задана переменная окружения NO_COLOR.
+    """
+    if os.environ.get("NO_COLOR"):
+        return False
+    isatty = getattr(stream, "isatty", None)
+    return bool(isatty and isatty())
+
+
+def render_tree(groups, color=False):
+    """
+    Формирует текст дерева дубликатов крупными порциями (не меньше TREE_BUFFER_SIZE символов),
+    чтобы вывод сотен тысяч групп не упирался в построчную запись в терминал.
+    Читаемый размер вычисляется один раз на группу.
+
+    :param groups: Итерируемое пар (хэш, список файлов).
+    :param color: Выделять группы, пути и размеры цветом (colorama).
+    :return: Генератор строк.
+    """
+    if color:
+        from colorama import Fore, Style
+
+        group_format = f"{Fore.BLUE}{Style.BRIGHT}Группа {{}}:{Style.RESET_ALL}\n"
+        file_format = f"  {{}} {Fore.GREEN}{{}}{Style.RESET_ALL} ({Fore.YELLOW}{{}}{Style.RESET_ALL})\n"
+    else:
+        group_format = "Группа {}:\n"
+        file_format = "  {} {} ({})\n"
+    parts, length = [], 0
+    for group_id, (_, files) in enumerate(groups, start=1):
+        parts.append(group_format.format(group_id))
+        sizes = {}
+        last = len(files) - 1
         for idx, file_info in enumerate(files):
-            prefix = "└──" if idx == len(files) - 1 else "├──"
-            path = f"{Fore.GREEN}{file_info['path']}{Style.RESET_ALL}"
-            size = f"{Fore.YELLOW}{human_readable_size(file_info['size'])}{Style.RESET_ALL}"
-            print(f"  {prefix} {path} ({size})")
-
-
-def save_tree_to_txt(duplicates, output_file):
-    with open(output_file, mode='w', encoding='utf-8') as file:
-        for group_id, files in enumerate(duplicates.values(), start=1):
-            file.write(f"Группа {group_id}:\n")
-            for idx, file_info in enumerate(files):
-                prefix = "└──" if idx == len(files) - 1 else "├──"
-                path = file_info['path']
-                size = human_readable_size(file_info['size'])
-                file.write(f"  {prefix} {path} ({size})\n")
+            size = file_info['size']
+            if size not in sizes:
+                sizes[size] = human_readable_size(size) if size is not None else "N/A"
+            line = file_format.format("└──" if idx == last else "├──", file_info['path'], sizes[size])
+            parts.append(line)
+            length += len(line)
+        if length >= TREE_BUFFER_SIZE:
+            yield "".join(parts)
+            parts, length = [], 0
+    if parts:
+        yield "".join(parts)
+
+
+def write_duplicates_to_tree(duplicates, output_file, sort=True, flush_interval=FLUSH_INTERVAL,
+                             run_size=SORT_RUN_SIZE, compress="auto"):
+    """
+    Записывает дубликаты в виде дерева: в файл или, если output_file равен '-', в стандартный вывод
+    (с цветами, только если это терминал). Если читатель закрыл стандартный вывод (`| head`),
+    процесс завершается с кодом 1 без трассировки.
+
+    :param duplicates: Словарь или итерируемое групп дубликатов.
+    :param output_file: Путь к файлу или '-'.
+    :param sort: Упорядочить группы по хэшу.
+    :param flush_interval: Интервал сброса вывода в секундах.
+    :param run_size: Количество групп в памяти при внешней сортировке.
+    :param compress: Сжатие файла (см. write_duplicates_to_csv); к стандартному выводу не применяется.
+    """
+    groups = iter_groups(duplicates, sort, run_size)
+    if output_file == "-":
+        try:
+            print_tree_view(groups, flush_interval=flush_interval)
+        except BrokenPipeError:
+            # Читатель закрыл канал (например, `| head`): остальной вывод не нужен. Стандартный вывод
+            # перенаправляется в os.devnull, чтобы сброс буфера при выходе интерпретатора не упал снова
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            os.close(devnull)
+            logger.debug("Стандартный вывод закрыт читателем, вывод дерева прекращён")
+            sys.exit(1)
+        return True
+    try:
+        save_tree_to_txt(groups, output_file, compress=compress, flush_interval=flush_interval)
+        logger.info(f"Данные успешно записаны в файл: {output_file}")
+        return True
+    except (OSError, IOError) as e:
+        logger.error(f"Ошибка записи в файл '{output_file}': {e}")
+        raise Exception(f"Ошибка записи дерева: {e}")
+
+
+# Форматы вывода результатов (--format): имя -> функция записи (duplicates, output_file, sort=...)
+WRITERS = {
+    "csv": write_duplicates_to_csv,
+    "jsonl": write_duplicates_to_jsonl,
+    "sqlite": write_duplicates_to_sqlite,
+    "tree": write_duplicates_to_tree,
+}
+
+
+def write_duplicates(duplicates, output_file, output_format="csv", top=None, **options):
+    """
+    Записывает дубликаты в выбранном формате (см. WRITERS).
+
+    :param duplicates: Словарь или итерируемое групп дубликатов.
+    :param output_file: Путь к выходному файлу.
+    :param output_format: Имя формата: 'csv', 'jsonl', 'sqlite' или 'tree'.
+    :param top: Записать только top групп с наибольшим освобождаемым объёмом (по его убыванию).
+    :param options: Параметры функции записи (sort, flush_interval, run_size, compress).
+    """
+    writer = WRITERS.get(output_format)
+    if writer is None:
+        raise ValueError(f"Неизвестный формат вывода: {output_format}")
+    if top:
+        duplicates = top_groups(duplicates, top)
+        options['sort'] = False
+    return writer(duplicates, output_file, **options)
+
+
+def print_tree_view(duplicates, stream=None, color=None, flush_interval=FLUSH_INTERVAL):
+    """
+    Выводит дубликаты в виде дерева.
+
+    :param duplicates: Словарь или итерируемое групп дубликатов.
+    :param stream: Поток вывода (по умолчанию sys.stdout).
+    :param color: Выводить цвета; None — только если поток является терминалом.
+    :param flush_interval: Интервал сброса потока в секундах.
+    """
+    stream = stream if stream is not None else sys.stdout
+    if color is None:
+        color = use_color(stream)
+    last_flush = time.monotonic()
+    for chunk in render_tree(iter_groups(duplicates, sort=False), color):
+        stream.write(chunk)
+        if time.monotonic() - last_flush >= flush_interval:
+            stream.flush()
+            last_flush = time.monotonic()
+    stream.flush()
+
+
+def save_tree_to_txt(duplicates, output_file, compress="auto", flush_interval=FLUSH_INTERVAL):
+    """
+    Сохраняет дерево дубликатов в текстовый файл (без цветов).
+
+    :param duplicates: Словарь или итерируемое групп дубликатов.
+    :param output_file: Путь к файлу.
+    :param compress: Сжатие (см. write_duplicates_to_csv).
+    """
+    with open_output(output_file, resolve_compression(output_file, compress), buffering=WRITE_BUFFER_SIZE) as file:
+        print_tree_view(duplicates, file, color=False, flush_interval=flush_interval)
@@ -0,0 +1,478 @@
+import os
+import sys
+import mmap
+import errno
+import threading
+from bisect import bisect_right
+from contextlib import contextmanager
+from .logger import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Файлы от этого размера читаются через mmap вместо последовательных read()
+MMAP_THRESHOLD = 64 * 1024 * 1024
+
+# Выравнивание буферов, длин и смещений для чтения с O_DIRECT
+DIRECT_IO_ALIGNMENT = 4096
+
+# Перечисление областей данных разреженных файлов (Linux, Solaris, FreeBSD)
+SPARSE_SUPPORTED = hasattr(os, "SEEK_DATA") and hasattr(os, "SEEK_HOLE")
+
+# Буферы чтения переиспользуются в пределах потока (и, соответственно, процесса-воркера)
+_local = threading.local()
+
+
+def use_mmap(size, mmap_threshold=MMAP_THRESHOLD) -> bool:
+    """
+    Определяет, нужно ли читать файл данного размера через mmap.
+
+    :param size: Размер файла в байтах.
+    :param mmap_threshold: Порог в байтах; None отключает mmap.
+    :return: True, если файл следует отображать в память.
+    """
+    return mmap_threshold is not None and size > 0 and size >= mmap_threshold
+
+
+def get_buffer(size, slot=0) -> bytearray:
+    """
+    Возвращает заранее выделенный буфер текущего потока.
+    Буфер создаётся один раз на slot (и пересоздаётся только при смене размера)
+    и переиспользуется между файлами, поэтому цикл чтения не выделяет память на каждый блок.
+
+    :param size: Размер буфера в байтах.
+    :param slot: Номер буфера (например, 0 и 1 для двух сравниваемых файлов).
+    :return: bytearray размера size.
+    """
+    buffers = getattr(_local, "buffers", None)
+    if buffers is None:
+        buffers = _local.buffers = {}
+    buf = buffers.get(slot)
+    if buf is None or len(buf) != size:
+        buf = buffers[slot] = bytearray(size)
+    return buf
+
+
+def get_zero_buffer(size) -> bytes:
+    """
+    Возвращает неизменяемый буфер не менее чем из size нулевых байт (общий для потока).
+    Используется вместо чтения дыр разреженных файлов.
+    """
+    zeros = getattr(_local, "zeros", None)
+    if zeros is None or len(zeros) < size:
+        zeros = _local.zeros = bytes(size)
+    return zeros
+
+
+def get_aligned_buffer(size, slot=0) -> mmap.mmap:
+    """
+    Возвращает выровненный по странице буфер текущего потока для чтения с O_DIRECT.
+    Размер округляется вверх до DIRECT_IO_ALIGNMENT.
+
+    :param size: Минимальный размер буфера в байтах.
+    :param slot: Номер буфера (например, 0 и 1 для двух сравниваемых файлов).
+    :return: Анонимное отображение mmap.
+    """
+    size = -(-size // DIRECT_IO_ALIGNMENT) * DIRECT_IO_ALIGNMENT
+    buffers = getattr(_local, "aligned_buffers", None)
+    if buffers is None:
+        buffers = _local.aligned_buffers = {}
+    buf = buffers.get(slot)
+    if buf is None or len(buf) != size:
+        buf = buffers[slot] = mmap.mmap(-1, size)
+    return buf
+
+
+@contextmanager
+def open_file(filepath, direct_io=False):
+    """
+    Открывает файл для чтения.
+    При direct_io=True файл открывается с O_DIRECT (в обход кэша страниц) без буферизации Python;
+    если ОС или файловая система не поддерживает O_DIRECT, используется обычное открытие.
+
+    :param filepath: Путь к файлу.
+    :param direct_io: Пытаться читать в обход кэша страниц.
+    :return: Файловый объект, открытый на чтение в двоичном режиме.
+    """
+    if direct_io and hasattr(os, "O_DIRECT"):
+        try:
+            fd = os.open(filepath, os.O_RDONLY | os.O_DIRECT)
+        except OSError as e:
+            if e.errno != errno.EINVAL:
+                raise
+            logger.debug(f"O_DIRECT не поддерживается для '{filepath}', используется обычное чтение")
+        else:
+            with open(fd, "rb", buffering=0) as f:
+                yield f
+            return
+    with open(filepath, "rb") as f:
+        yield f
+
+
+def is_direct(f) -> bool:
+    """
+    Проверяет, открыт ли файл с флагом O_DIRECT.
+    """
+    if fcntl is None or not hasattr(os, "O_DIRECT"):
+        return False
+    return bool(fcntl.fcntl(f.fileno(), fcntl.F_GETFL) & os.O_DIRECT)
+
+
+def readinto(f, buf) -> int:
+    """
+    Читает очередной блок в buf.
+    Если файловая система отказывает в чтении с O_DIRECT (EINVAL), флаг снимается
+    и чтение повторяется обычным способом.
+    """
+    try:
+        return f.readinto(buf)
+    except OSError as e:
+        if e.errno != errno.EINVAL or not is_direct(f):
+            raise
+        logger.debug(f"Чтение с O_DIRECT отклонено ({e}), переключение на обычное чтение")
+        flags = fcntl.fcntl(f.fileno(), fcntl.F_GETFL)
+        fcntl.fcntl(f.fileno(), fcntl.F_SETFL, flags & ~os.O_DIRECT)
+        return f.readinto(buf)
+
+
+def iter_chunks(f, chunk_size, slot=0):
+    """
+    Читает файл блоками через readinto в переиспользуемый буфер.
+    Для файлов, открытых с O_DIRECT, используется выровненный буфер.
+    Возвращает срезы memoryview, действительные только до следующей итерации.
+
+    :param f: Открытый в режиме 'rb' файловый объект.
+    :param chunk_size: Размер блока в байтах.
+    :param slot: Номер буфера потока (см. get_buffer).
+    """
+    buf = get_aligned_buffer(chunk_size, slot) if is_direct(f) else get_buffer(chunk_size, slot)
+    view = memoryview(buf)
+    try:
+        while True:
+            n = readinto(f, buf)
+            if not n:
+                break
+            chunk = view[:n]
+            try:
+                yield chunk
+            finally:
+                chunk.release()
+    finally:
+        view.release()
+
+
+def fadvise(f, advice_name):
+    """
+    Передаёт ядру подсказку posix_fadvise для всего файла.
+    На платформах без posix_fadvise (Windows, macOS) ничего не делает.
+
+    :param f: Открытый файловый объект.
+    :param advice_name: Имя константы в модуле os, например 'POSIX_FADV_SEQUENTIAL'.
+    """
+    advice = getattr(os, advice_name, None)
+    if advice is None or not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.posix_fadvise(f.fileno(), 0, 0, advice)
+    except OSError as e:
+        logger.debug(f"posix_fadvise({advice_name}) не поддерживается: {e}")
+
+
+@contextmanager
+def sequential_access(f, drop_cache=True):
+    """
+    Включает агрессивное упреждающее чтение (POSIX_FADV_SEQUENTIAL) на время работы с файлом,
+    а после — освобождает его страницы из кэша (POSIX_FADV_DONTNEED), чтобы однократно
+    прочитанные данные не вытесняли рабочий набор других процессов.
+
+    :param f: Открытый файловый объект.
+    :param drop_cache: Освобождать страницы файла из кэша по завершении.
+    """
+    fadvise(f, "POSIX_FADV_SEQUENTIAL")
+    try:
+        yield f
+    finally:
+        if drop_cache:
+            fadvise(f, "POSIX_FADV_DONTNEED")
+
+
+def drop_page_cache(filepath):
+    """
+    Освобождает страницы файла из кэша (POSIX_FADV_DONTNEED), например после того,
+    как все чтения группы файлов одного размера завершены.
+    """
+    try:
+        with open(filepath, "rb") as f:
+            fadvise(f, "POSIX_FADV_DONTNEED")
+    except OSError as e:
+        logger.debug(f"Не удалось освободить страницы '{filepath}' из кэша: {e}")
+
+
+_libc = None
+
+# Значения байтов mincore с нулевым младшим битом (страница не в кэше)
+_EVEN_BYTES = bytes(range(0, 256, 2))
+
+
+def _load_libc():
+    """
+    Загружает libc с объявленными mmap, munmap и mincore (Linux); None — если это невозможно.
+    """
+    global _libc
+    if _libc is None:
+        _libc = False
+        if sys.platform.startswith("linux"):
+            import ctypes
+            import ctypes.util
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+                libc.mmap.restype = ctypes.c_void_p
+                libc.mmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                                      ctypes.c_long]
+                libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+                libc.mincore.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_char_p]
+                _libc = libc
+            except (OSError, AttributeError) as e:
+                logger.debug(f"mincore недоступен: {e}")
+    return _libc or None
+
+
+def is_page_cached(filepath) -> bool:
+    """
+    Проверяет через mincore, есть ли в кэше страниц хотя бы одна страница файла.
+    Такие файлы читаются кем-то ещё, и их страницы после поиска не освобождаются.
+    Если проверка невозможна (не Linux, ошибка), возвращает False.
+    """
+    libc = _load_libc()
+    if libc is None:
+        return False
+    try:
+        fd = os.open(filepath, os.O_RDONLY)
+    except OSError:
+        return False
+    try:
+        size = os.fstat(fd).st_size
+        if size == 0:
+            return False
+        import ctypes
+
+        addr = libc.mmap(None, size, mmap.PROT_READ, mmap.MAP_SHARED, fd, 0)
+        if addr is None or addr == ctypes.c_void_p(-1).value:
+            return False
+        try:
+            pages = (size + mmap.PAGESIZE - 1) // mmap.PAGESIZE
+            vec = ctypes.create_string_buffer(pages)
+            if libc.mincore(addr, size, vec) != 0:
+                return False
+            # Младший бит каждого байта — признак присутствия страницы в кэше: удаляем байты с нулевым
+            # младшим битом и проверяем, осталось ли что-нибудь (без цикла по страницам в Python)
+            return bool(vec.raw.translate(None, _EVEN_BYTES))
+        finally:
+            libc.munmap(addr, size)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def mapped_file(f):
+    """
+    Отображает открытый файл в память только для чтения и возвращает memoryview.
+    Ядру сообщается о последовательном доступе (MADV_SEQUENTIAL), если это поддерживается.
+
+    :param f: Открытый в режиме 'rb' файловый объект.
+    :return: memoryview на содержимое файла.
+    """
+    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            try:
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            except OSError as e:
+                logger.debug(f"madvise(MADV_SEQUENTIAL) не поддерживается: {e}")
+        view = memoryview(mm)
+        try:
+            yield view
+        finally:
+            view.release()
+    finally:
+        mm.close()
+
+
+def iter_view_chunks(view, chunk_size):
+    """
+    Нарезает memoryview на срезы по chunk_size байт без копирования данных.
+    Каждый срез освобождается при переходе к следующему, чтобы отображение можно было закрыть.
+    """
+    for offset in range(0, len(view), chunk_size):
+        chunk = view[offset:offset + chunk_size]
+        try:
+            yield chunk
+        finally:
+            chunk.release()
+
+
+def views_equal(view1, view2) -> bool:
+    """
+    Сравнивает два буфера без копирования.
+    Основная часть сравнивается как 8-байтовые слова (сравнение memoryview формата 'B'
+    идёт поэлементно и заметно медленнее), хвост — как bytes.
+    """
+    view1, view2 = memoryview(view1), memoryview(view2)
+    if len(view1) != len(view2):
+        return False
+    body = len(view1) - len(view1) % 8
+    if body and view1[:body].cast("Q") != view2[:body].cast("Q"):
+        return False
+    return view1[body:].tobytes() == view2[body:].tobytes()
+
+
+def is_sparse(st) -> bool:
+    """
+    Проверяет по результату stat, содержит ли файл дыры (выделено меньше блоков, чем его размер).
+    На платформах без SEEK_DATA/SEEK_HOLE всегда возвращает False.
+
+    :param st: Результат os.stat/os.fstat.
+    :return: True, если файл разреженный и его области данных можно перечислить.
+    """
+    blocks = getattr(st, "st_blocks", None)
+    return SPARSE_SUPPORTED and blocks is not None and blocks * 512 < st.st_size
+
+
+def data_regions(f, size) -> list:
+    """
+    Перечисляет области данных файла через lseek(SEEK_DATA/SEEK_HOLE).
+    Всё, что не входит в области данных, — дыры, которые читаются как нули.
+    Если файловая система не поддерживает перечисление, весь файл считается данными.
+
+    :param f: Открытый файловый объект.
+    :param size: Размер файла в байтах.
+    :return: Список пар (начало, конец) в порядке возрастания.
+    """
+    fd = f.fileno()
+    regions = []
+    offset = 0
+    try:
+        while offset < size:
+            try:
+                start = os.lseek(fd, offset, os.SEEK_DATA)
+            except OSError as e:
+                if e.errno == errno.ENXIO:  # дальше до конца файла только дыра
+                    break
+                raise
+            end = min(os.lseek(fd, start, os.SEEK_HOLE), size)
+            if start >= end:
+                break
+            regions.append((start, end))
+            offset = end
+    except OSError as e:
+        if e.errno not in (errno.EINVAL, errno.EOPNOTSUPP):
+            raise
+        logger.debug(f"SEEK_DATA/SEEK_HOLE не поддерживается: {e}")
+        regions = [(0, size)] if size else []
+    finally:
+        os.lseek(fd, 0, os.SEEK_SET)
+    return regions
+
+
+def iter_range(f, start, end, chunk_size, slot=0):
+    """
+    Читает диапазон [start, end) файла блоками в переиспользуемый буфер.
+    Возвращает срезы memoryview, действительные только до следующей итерации.
+    Если файл оказался короче, чтение прекращается.
+    """
+    buf = get_buffer(chunk_size, slot)
+    view = memoryview(buf)
+    f.seek(start)
+    pos = start
+    try:
+        while pos < end:
+            with view[:min(chunk_size, end - pos)] as target:
+                n = f.readinto(target)
+            if not n:
+                break
+            chunk = view[:n]
+            try:
+                yield chunk
+            finally:
+                chunk.release()
+            pos += n
+    finally:
+        view.release()
+
+
+def iter_zeros(length, chunk_size):
+    """
+    Возвращает срезы нулевого буфера общей длиной length — содержимое дыры без чтения с диска.
+    """
+    zeros = memoryview(get_zero_buffer(chunk_size))
+    try:
+        for offset in range(0, length, chunk_size):
+            chunk = zeros[:min(chunk_size, length - offset)]
+            try:
+                yield chunk
+            finally:
+                chunk.release()
+    finally:
+        zeros.release()
+
+
+def iter_sparse_chunks(f, size, chunk_size, slot=0):
+    """
+    Выдаёт логическое содержимое разреженного файла: области данных читаются,
+    дыры подставляются нулевыми блоками без обращения к диску.
+    Поток байтов совпадает с обычным чтением файла, поэтому хэш не зависит от того,
+    хранится ли файл разреженно.
+
+    :param f: Открытый в режиме 'rb' файловый объект.
+    :param size: Размер файла в байтах.
+    :param chunk_size: Размер блока в байтах.
+    :param slot: Номер буфера потока (см. get_buffer).
+    """
+    pos = 0
+    for start, end in data_regions(f, size) + [(size, size)]:
+        yield from iter_zeros(start - pos, chunk_size)
+        yield from iter_range(f, start, end, chunk_size, slot)
+        pos = end
+
+
+def iter_file_chunks(f, chunk_size, slot=0):
+    """
+    Читает файл блоками, пропуская дыры разреженных файлов (см. iter_sparse_chunks).
+    Файлы без дыр и файлы, открытые с O_DIRECT, читаются обычным iter_chunks.
+    """
+    st = os.fstat(f.fileno())
+    if is_sparse(st) and not is_direct(f):
+        return iter_sparse_chunks(f, st.st_size, chunk_size, slot)
+    return iter_chunks(f, chunk_size, slot)
+
+
+def sparse_segments(regions1, regions2, size):
+    """
+    Разбивает [0, size) на отрезки, в пределах которых каждый из двух файлов
+    целиком состоит либо из данных, либо из дыры.
+
+    :param regions1: Области данных первого файла (см. data_regions).
+    :param regions2: Области данных второго файла.
+    :param size: Размер файлов в байтах.
+    :return: Список кортежей (начало, конец, данные в первом файле, данные во втором файле).
+    """
+    bounds = sorted({0, size, *(b for region in regions1 + regions2 for b in region if b <= size)})
+    starts1 = [start for start, _ in regions1]
+    starts2 = [start for start, _ in regions2]
+
+    def in_data(regions, starts, offset):
+        i = bisect_right(starts, offset) - 1
+        return i >= 0 and offset < regions[i][1]
+
+    return [(start, end, in_data(regions1, starts1, start), in_data(regions2, starts2, start))
+            for start, end in zip(bounds, bounds[1:]) if start < end]
+
+
+def is_zero(view) -> bool:
+    """
+    Проверяет, состоит ли буфер только из нулевых байт.
+    """
+    with memoryview(get_zero_buffer(len(view)))[:len(view)] as zeros:
+        return views_equal(view, zeros)
@@ -1,10 +1,21 @@
 import os
+import sys
+import stat
 from fnmatch import fnmatch
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from .logger import logger, log_execution
 
+# Максимальное количество корневых директорий, сканируемых одновременно
+SCAN_WORKERS = 8
+
+# Размер блока чтения списка файлов (--files-from)
+FILE_LIST_BLOCK_SIZE = 1024 * 1024
+
 
 @log_execution(level="DEBUG", message="Сканирование директории")
-def scan_directory(directory, include_hidden=False, skip_inaccessible=False, exclude=None) -> list:
+def scan_directory(directory, include_hidden=False, skip_inaccessible=False, exclude=None,
+                   min_size=0, max_size=None, include=None, snapshot=None) -> list:
     """
     Обходит директорию рекурсивно и возвращает список файлов.
 
@@ -16,15 +27,25 @@ def scan_directory(directory, include_hidden=False, skip_inaccessible=False, exc
     :type skip_inaccessible: Bool
     :param exclude: Список регулярных выражений для исключения файлов.
     :type exclude: List[str]
+    :param min_size: Минимальный размер файла в байтах.
+    :type min_size: Int
+    :param max_size: Максимальный размер файла в байтах (None — без ограничения).
+    :type max_size: Int
+    :param include: Шаблоны имён файлов, которые нужно учитывать (None — все файлы).
+    :type include: List[str]
+    :param snapshot: Снимок предыдущего сканирования (ScanSnapshot): директории с неизменившимся mtime
+                     не перечитываются, их элементы берутся из снимка.
+    :type snapshot: ScanSnapshot
     :return: Список файлов.
     :rtype: List[str]
     """
     file_list = []
     exclude = exclude or []
+    include = include or []
 
     def scan(dir_path):
         try:
-            with os.scandir(dir_path) as entries:
+            with list_directory(dir_path, snapshot) as entries:
                 for entry in entries:
                     # 1) Скрытые файлы, если include_hidden=False, пропускаем
                     if not include_hidden and entry.name.startswith('.'):
@@ -38,8 +59,15 @@ def scan_directory(directory, include_hidden=False, skip_inaccessible=False, exc
                         logger.debug(f"'{entry.name}' исключён по шаблонам")
                         continue
 
-                    # 3) Проверка доступа
-                    if not os.access(entry.path, os.R_OK):
+                    # 3) Фильтры по имени и размеру применяются до остальных проверок, чтобы
+                    #    отсеянные файлы не попадали в список. Размер берётся из DirEntry.stat(),
+                    #    который кэширует результат (на Windows — без дополнительного системного вызова)
+                    if entry.is_file(follow_symlinks=False) and not matches_filters(
+                            entry, include, min_size, max_size):
+                        continue
+
+                    # 4) Проверка доступа (для элементов из снимка — сохранённый результат)
+                    if not is_readable(entry):
                         msg = f"Нет доступа к {'директории' if entry.is_dir(follow_symlinks=False) else 'файлу'}: {entry.path}"
                         if skip_inaccessible:
                             logger.warning(msg + " — пропускаем.")
@@ -47,10 +75,10 @@ def scan_directory(directory, include_hidden=False, skip_inaccessible=False, exc
                         else:
                             raise PermissionError(msg)
 
-                    # 4) Если это директория, рекурсивно заходим в неё
+                    # 5) Если это директория, рекурсивно заходим в неё
                     if entry.is_dir(follow_symlinks=False):
                         scan(entry.path)
-                    # 5) Если это файл — добавляем в список
+                    # 6) Если это файл — добавляем в список
                     elif entry.is_file(follow_symlinks=False):
                         file_list.append(entry.path)
 
@@ -67,6 +95,205 @@ def scan_directory(directory, include_hidden=False, skip_inaccessible=False, exc
     return file_list
 
 
+def read_file_list(source):
+    """
+    Читает список путей, разделённых нулевым байтом (как у find -print0), не загружая его целиком.
+    Пути декодируются через os.fsdecode, поэтому имена в любой кодировке сохраняются без потерь.
+
+    :param source: Путь к файлу списка или '-' для стандартного ввода.
+    :return: Генератор путей.
+    """
+    stream = sys.stdin.buffer if source == "-" else open(source, "rb")
+    try:
+        remainder = b""
+        while True:
+            block = stream.read(FILE_LIST_BLOCK_SIZE)
+            if not block:
+                break
+            *paths, remainder = (remainder + block).split(b"\0")
+            for path in paths:
+                if path:
+                    yield os.fsdecode(path)
+        if remainder:
+            yield os.fsdecode(remainder)
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+
+def merge_roots(directories) -> list:
+    """
+    Убирает повторяющиеся и вложенные корневые директории: корень внутри другого корня
+    (с учётом символических ссылок) уже будет просканирован вместе с ним.
+
+    :param directories: Список директорий.
+    :return: Список оставшихся директорий в исходном порядке.
+    """
+    real_paths = {}
+    for directory in directories:
+        real_paths.setdefault(os.path.realpath(directory), directory)
+    roots = []
+    for real_path, directory in real_paths.items():
+        parent = next((other for other in real_paths if other != real_path and is_within(real_path, other)), None)
+        if parent is not None:
+            logger.info(f"Директория '{directory}' входит в '{real_paths[parent]}' и отдельно не сканируется")
+            continue
+        roots.append(directory)
+    skipped = len(directories) - len(real_paths)
+    if skipped:
+        logger.info(f"Повторяющихся корневых директорий пропущено: {skipped}")
+    return roots
+
+
+def is_within(path, root) -> bool:
+    """
+    Проверяет, что абсолютный путь path совпадает с root или лежит внутри него.
+    """
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+@log_execution(level="INFO", message="Сканирование корневых директорий")
+def scan_directories(directories, snapshot=None, num_workers=SCAN_WORKERS, **scan_options) -> list:
+    """
+    Сканирует несколько директорий одновременно (по потоку на директорию, не больше num_workers):
+    обход упирается в системные вызовы, которые выполняются без GIL, поэтому корни на разных
+    устройствах сканируются параллельно. Со снимком (SQLite, привязан к одному потоку) директории
+    обходятся по очереди. Результат — файлы всех директорий в порядке их перечисления.
+
+    :param directories: Список директорий (см. merge_roots).
+    :param snapshot: Снимок сканирования (ScanSnapshot) или None.
+    :param num_workers: Максимальное количество потоков.
+    :param scan_options: Параметры scan_directory (include_hidden, exclude, include, min_size, ...).
+    :return: Список файлов.
+    """
+    if len(directories) <= 1 or snapshot is not None or num_workers <= 1:
+        return [file for directory in directories
+                for file in scan_directory(directory, snapshot=snapshot, **scan_options)]
+    with ThreadPoolExecutor(max_workers=min(num_workers, len(directories)), thread_name_prefix="scan") as executor:
+        results = list(executor.map(lambda directory: scan_directory(directory, **scan_options), directories))
+    return [file for file_list in results for file in file_list]
+
+
+def accept_listed_file(path, include_hidden=False, skip_inaccessible=False, exclude=None,
+                       min_size=0, max_size=None, include=None) -> bool:
+    """
+    Проверяет файл из списка (--files-from) теми же фильтрами, что и scan_directory.
+    Отсутствующие файлы, директории и ссылки пропускаются с предупреждением.
+    """
+    name = os.path.basename(path)
+    if not include_hidden and name.startswith('.'):
+        return False
+    if is_excluded(path, exclude or []) or is_excluded(name, exclude or []):
+        return False
+    if include and not any(fnmatch(name, pattern) for pattern in include):
+        return False
+    try:
+        st = os.lstat(path)
+    except OSError as e:
+        logger.warning(f"Файл из списка пропущен: {e}")
+        return False
+    if not stat.S_ISREG(st.st_mode):
+        logger.warning(f"'{path}' из списка не является обычным файлом — пропускаем.")
+        return False
+    if st.st_size < (min_size or 0) or (max_size is not None and st.st_size > max_size):
+        return False
+    if not os.access(path, os.R_OK):
+        msg = f"Нет доступа к файлу: {path}"
+        if not skip_inaccessible:
+            raise PermissionError(msg)
+        logger.warning(msg + " — пропускаем.")
+        return False
+    return True
+
+
+@log_execution(level="INFO", message="Сбор файлов из корневых директорий и списка")
+def collect_files(directories=(), files_from=None, snapshot=None, num_workers=SCAN_WORKERS, **scan_options) -> list:
+    """
+    Собирает файлы для одного общего поиска: сканирует корневые директории (без повторяющихся
+    и вложенных, см. merge_roots) и добавляет файлы из списка. Файл из списка, уже попавший
+    в сканируемый корень, и повторы в самом списке учитываются один раз — иначе файл оказался бы
+    «дубликатом» самого себя.
+
+    :param directories: Список корневых директорий.
+    :param files_from: Итерируемое путей к файлам (например, read_file_list) или None.
+    :param snapshot: Снимок сканирования (ScanSnapshot) или None.
+    :param num_workers: Максимальное количество одновременно сканируемых директорий.
+    :param scan_options: Параметры scan_directory; к файлам из списка применяются те же фильтры.
+    :return: Список файлов.
+    """
+    roots = merge_roots(list(directories))
+    files = scan_directories(roots, snapshot=snapshot, num_workers=num_workers, **scan_options)
+    if files_from is None:
+        return files
+    real_roots = [os.path.realpath(root) for root in roots]
+    seen = set()
+    listed = 0
+    for path in files_from:
+        real_path = os.path.realpath(path)
+        if real_path in seen or any(is_within(real_path, root) for root in real_roots):
+            continue
+        seen.add(real_path)
+        if accept_listed_file(path, **scan_options):
+            files.append(path)
+            listed += 1
+    logger.info(f"Файлов из списка добавлено: {listed}")
+    return files
+
+
+def matches_filters(entry, include, min_size=0, max_size=None) -> bool:
+    """
+    Проверяет, проходит ли файл фильтры --include, --min-size и --max-size.
+
+    :param entry: Элемент os.DirEntry, соответствующий файлу.
+    :param include: Список шаблонов имён; пустой список пропускает любые имена.
+    :param min_size: Минимальный размер файла в байтах.
+    :param max_size: Максимальный размер файла в байтах (None — без ограничения).
+    :return: True, если файл нужно учитывать.
+    """
+    if include and not any(fnmatch(entry.name, pattern) for pattern in include):
+        return False
+    if min_size or max_size is not None:
+        try:
+            size = entry.stat(follow_symlinks=False).st_size
+        except OSError as e:
+            logger.debug(f"Не удалось получить размер '{entry.path}': {e}")
+            return False
+        if size < min_size or (max_size is not None and size > max_size):
+            return False
+    return True
+
+
+@contextmanager
+def list_directory(dir_path, snapshot=None):
+    """
+    Возвращает элементы директории: из снимка, если mtime директории не изменился,
+    иначе через os.scandir (с сохранением результата в снимок).
+
+    :param dir_path: Путь к директории.
+    :param snapshot: Снимок сканирования (ScanSnapshot) или None.
+    :return: Итерируемый набор элементов с интерфейсом os.DirEntry.
+    """
+    if snapshot is None:
+        with os.scandir(dir_path) as entries:
+            yield entries
+        return
+    st = os.stat(dir_path)
+    entries = snapshot.get(dir_path, st)
+    if entries is None:
+        with os.scandir(dir_path) as iterator:
+            entries = snapshot.put(dir_path, st, list(iterator))
+    yield entries
+
+
+def is_readable(entry) -> bool:
+    """
+    Проверяет доступ на чтение к элементу директории. Для элементов из снимка (CachedEntry)
+    используется доступ, сохранённый при чтении директории, без системного вызова.
+    """
+    readable = getattr(entry, "readable", None)
+    return os.access(entry.path, os.R_OK) if readable is None else readable
+
+
 @log_execution(level="DEBUG", message="Проверка исключений для файлов и директорий")
 def is_excluded(name: str, exclude_patterns: list) -> bool:
     """
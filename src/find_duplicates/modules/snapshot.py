@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import sqlite3
+from .logger import logger
+
+DEFAULT_SNAPSHOT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "find_duplicates", "scan_snapshot.sqlite")
+
+# Директории, изменённые менее чем за столько наносекунд до сканирования, не считаются надёжными:
+# изменение в пределах той же единицы времени ФС не изменило бы их mtime
+RACY_WINDOW_NS = 2 * 1000 ** 3
+
+# Количество записей, после которого изменения фиксируются в базе
+COMMIT_INTERVAL = 1000
+
+ENTRY_DIR, ENTRY_FILE, ENTRY_OTHER = "d", "f", "o"
+
+
+class CachedStat:
+    """
+    Минимальная замена os.stat_result для записей из снимка (только st_size).
+    """
+    __slots__ = ("st_size",)
+
+    def __init__(self, st_size):
+        self.st_size = st_size
+
+
+class CachedEntry:
+    """
+    Элемент директории из снимка с тем же интерфейсом, что и os.DirEntry
+    (name, path, is_dir, is_file, stat), чтобы сканер обрабатывал его так же.
+    Размер и доступность на чтение (readable) сняты при последнем чтении директории: изменение файла
+    на месте или его прав не меняет mtime директории, поэтому эти значения могут устареть.
+    readable равен None для записей, сохранённых без него, — тогда доступ проверяется заново.
+    """
+    __slots__ = ("name", "path", "kind", "size", "readable")
+
+    def __init__(self, dir_path, name, kind, size=None, readable=None):
+        self.name = name
+        self.path = os.path.join(dir_path, name)
+        self.kind = kind
+        self.size = size
+        self.readable = readable
+
+    def is_dir(self, follow_symlinks=True):
+        return self.kind == ENTRY_DIR
+
+    def is_file(self, follow_symlinks=True):
+        return self.kind == ENTRY_FILE
+
+    def stat(self, follow_symlinks=True):
+        return CachedStat(self.size)
+
+
+class ScanSnapshot:
+    """
+    Снимок содержимого директорий в SQLite для инкрементального повторного сканирования.
+    Для каждой директории хранятся её mtime и список элементов (имя, тип, размер файла, доступ на чтение).
+    Если mtime директории не изменился, её элементы берутся из снимка без вызова scandir.
+    mtime директории меняется только при добавлении, удалении и переименовании элементов,
+    поэтому размеры файлов в снимке могут устареть — группировка всё равно получает актуальный размер
+    от os.stat, а устаревшим может оказаться лишь решение фильтров --min-size/--max-size.
+    Так же устаревает и доступ на чтение: у элементов из снимка os.access не вызывается.
+    """
+
+    def __init__(self, path=DEFAULT_SNAPSHOT_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime_ns INTEGER, entries TEXT NOT NULL)"
+        )
+        self.started_ns = time.time_ns()
+        self.pending = 0
+        self.reused = 0
+        self.listed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get(self, dir_path, st):
+        """
+        Возвращает элементы директории из снимка, если её mtime не изменился, иначе None.
+
+        :param dir_path: Путь к директории.
+        :param st: Результат os.stat для директории.
+        :return: Список CachedEntry или None.
+        """
+        row = self.connection.execute("SELECT mtime_ns, entries FROM dirs WHERE path = ?",
+                                      (os.path.abspath(dir_path),)).fetchone()
+        if row is None or row[0] is None or row[0] != st.st_mtime_ns:
+            return None
+        self.reused += 1
+        return [CachedEntry(dir_path, *record) for record in json.loads(row[1])]
+
+    def put(self, dir_path, st, entries):
+        """
+        Сохраняет элементы директории, прочитанные через os.scandir.
+        Поддиректории, исчезнувшие с прошлого сканирования, удаляются из снимка вместе с содержимым.
+
+        :param dir_path: Путь к директории.
+        :param st: Результат os.stat для директории, полученный до чтения её содержимого.
+        :param entries: Список os.DirEntry.
+        :return: Список CachedEntry тех же элементов (доступ на чтение уже проверен, повторно его не проверять).
+        """
+        records = []
+        for entry in entries:
+            readable = os.access(entry.path, os.R_OK)
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    records.append((entry.name, ENTRY_DIR, None, readable))
+                elif entry.is_file(follow_symlinks=False):
+                    records.append((entry.name, ENTRY_FILE, entry.stat(follow_symlinks=False).st_size, readable))
+                else:
+                    records.append((entry.name, ENTRY_OTHER, None, readable))
+            except OSError:
+                records.append((entry.name, ENTRY_OTHER, None, readable))
+
+        key = os.path.abspath(dir_path)
+        old = self.connection.execute("SELECT entries FROM dirs WHERE path = ?", (key,)).fetchone()
+        if old is not None:
+            current = {record[0] for record in records if record[1] == ENTRY_DIR}
+            for name, kind, *_ in json.loads(old[0]):
+                if kind == ENTRY_DIR and name not in current:
+                    self.forget(os.path.join(key, name))
+
+        # Директорию, изменённую прямо перед сканированием, при следующем запуске нужно перечитать
+        mtime_ns = st.st_mtime_ns if self.started_ns - st.st_mtime_ns > RACY_WINDOW_NS else None
+        self.connection.execute("INSERT OR REPLACE INTO dirs (path, mtime_ns, entries) VALUES (?, ?, ?)",
+                                (key, mtime_ns, json.dumps(records, ensure_ascii=False)))
+        self.listed += 1
+        self.pending += 1
+        if self.pending >= COMMIT_INTERVAL:
+            self.commit()
+        return [CachedEntry(dir_path, *record) for record in records]
+
+    def forget(self, dir_path):
+        """
+        Удаляет из снимка директорию и все вложенные в неё.
+        """
+        dir_path = os.path.abspath(dir_path)
+        prefix = dir_path.rstrip(os.sep) + os.sep
+        self.connection.execute("DELETE FROM dirs WHERE path = ? OR substr(path, 1, ?) = ?",
+                                (dir_path, len(prefix), prefix))
+
+    def commit(self):
+        """
+        Фиксирует накопленные изменения.
+        """
+        try:
+            self.connection.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Не удалось сохранить снимок сканирования '{self.path}': {e}")
+        self.pending = 0
+
+    def close(self):
+        """
+        Фиксирует изменения и закрывает базу.
+        """
+        logger.info(f"Снимок сканирования: перечитано директорий — {self.listed}, взято из снимка — {self.reused}")
+        self.commit()
+        self.connection.close()
+
+
+def open_snapshot(path=DEFAULT_SNAPSHOT_PATH):
+    """
+    Открывает снимок сканирования; при ошибке сканирование выполняется полностью.
+
+    :param path: Путь к файлу базы SQLite.
+    :return: ScanSnapshot или None.
+    """
+    try:
+        return ScanSnapshot(path)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Не удалось открыть снимок сканирования '{path}': {e}")
+        return None
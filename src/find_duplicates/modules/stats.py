@@ -0,0 +1,112 @@
+import time
+import heapq
+from contextlib import contextmanager
+from .logger import logger
+from .utils import human_readable_size
+
+# Количество крупнейших групп, перечисляемых в итогах запуска
+DEFAULT_TOP_GROUPS = 5
+
+
+def wasted_bytes(files) -> int:
+    """
+    Возвращает объём, освобождаемый удалением всех копий группы, кроме одной: (n - 1) × размер.
+    """
+    size = files[0]['size'] if files else None
+    return size * (len(files) - 1) if size else 0
+
+
+class RunStats:
+    """
+    Статистика запуска: счётчики файлов и байт, время этапов и top_count групп
+    с наибольшим освобождаемым объёмом. Крупнейшие группы отбираются кучей
+    по мере подтверждения, без сортировки всех результатов.
+    """
+
+    def __init__(self, top_count=DEFAULT_TOP_GROUPS):
+        self.top_count = top_count
+        self.files_scanned = 0
+        self.size_groups = 0
+        self.candidate_files = 0
+        self.hashed_files = 0
+        self.hashed_bytes = 0
+        self.duplicate_groups = 0
+        self.duplicate_files = 0
+        self.reclaimable_bytes = 0
+        self.stages = {}
+        self._top = []
+        self._sequence = 0
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Замеряет время этапа; повторные замеры одного этапа суммируются.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    def add_hashed(self, size, count=1):
+        """
+        Учитывает файлы, содержимое которых читалось для хэширования или сравнения.
+        """
+        self.hashed_files += count
+        self.hashed_bytes += size * count
+
+    def add_group(self, file_hash, files) -> int:
+        """
+        Учитывает подтверждённую группу дубликатов.
+
+        :return: Освобождаемый объём группы в байтах.
+        """
+        wasted = wasted_bytes(files)
+        self.duplicate_groups += 1
+        self.duplicate_files += len(files)
+        self.reclaimable_bytes += wasted
+        if self.top_count:
+            # Порядковый номер разрешает равенство объёмов без сравнения списков файлов
+            self._sequence += 1
+            item = (wasted, -self._sequence, file_hash, files)
+            if len(self._top) < self.top_count:
+                heapq.heappush(self._top, item)
+            elif item > self._top[0]:
+                heapq.heapreplace(self._top, item)
+        return wasted
+
+    def top_groups(self) -> list:
+        """
+        Возвращает крупнейшие группы: список (освобождаемый объём, хэш, файлы) по убыванию объёма.
+        """
+        return [(wasted, file_hash, files) for wasted, _, file_hash, files in sorted(self._top, reverse=True)]
+
+    def summary_lines(self) -> list:
+        """
+        Формирует строки итогов запуска.
+        """
+        lines = [
+            f"Просканировано файлов: {self.files_scanned}, групп по размеру: {self.size_groups} "
+            f"(файлов в них: {self.candidate_files})",
+            f"Прочитано для хэширования: {self.hashed_files} файлов, {human_readable_size(self.hashed_bytes)}",
+            f"Групп дубликатов: {self.duplicate_groups}, файлов в них: {self.duplicate_files}, "
+            f"можно освободить: {human_readable_size(self.reclaimable_bytes)}",
+        ]
+        for name, seconds in self.stages.items():
+            line = f"Этап «{name}»: {seconds:.2f} с"
+            if name == "сканирование" and seconds > 0:
+                line += f" ({self.files_scanned / seconds:.0f} файлов/с)"
+            elif name == "поиск дубликатов" and seconds > 0:
+                line += f" ({human_readable_size(self.hashed_bytes / seconds)}/с)"
+            lines.append(line)
+        for wasted, file_hash, files in self.top_groups():
+            lines.append(f"  {human_readable_size(wasted)}: {files[0]['path']} (копий: {len(files)}, хэш {file_hash})")
+        return lines
+
+    def log_summary(self):
+        """
+        Выводит итоги запуска в лог.
+        """
+        logger.info("Итоги запуска:")
+        for line in self.summary_lines():
+            logger.info(line)
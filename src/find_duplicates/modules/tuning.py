@@ -0,0 +1,131 @@
+import os
+import json
+import time
+from .logger import logger, log_execution
+from .reader import fadvise
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+CANDIDATE_CHUNK_SIZES = (256 * 1024, 1024 * 1024, 4 * 1024 * 1024, 16 * 1024 * 1024)
+# Сколько байт читается при замере одного размера блока
+PROBE_BYTES = 64 * 1024 * 1024
+# Файлы меньше этого размера не дают осмысленного замера
+MIN_PROBE_FILE_SIZE = max(CANDIDATE_CHUNK_SIZES) * 4
+DEFAULT_PROFILE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "find_duplicates", "chunk_profile.json")
+
+
+def load_profile(profile_path=DEFAULT_PROFILE_PATH) -> dict:
+    """
+    Загружает сохранённый профиль устройств: { st_dev (str): размер блока }.
+    Отсутствующий или повреждённый профиль считается пустым.
+    """
+    try:
+        with open(profile_path, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+        return {str(dev): int(size) for dev, size in profile.items()}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError, AttributeError) as e:
+        logger.warning(f"Не удалось прочитать профиль размеров блоков '{profile_path}': {e}")
+        return {}
+
+
+def save_profile(profile, profile_path=DEFAULT_PROFILE_PATH):
+    """
+    Сохраняет профиль устройств в JSON-файл.
+    """
+    try:
+        os.makedirs(os.path.dirname(profile_path) or ".", exist_ok=True)
+        with open(profile_path, "w", encoding="utf-8") as f:
+            json.dump(profile, f, indent=2, sort_keys=True)
+    except OSError as e:
+        logger.warning(f"Не удалось сохранить профиль размеров блоков '{profile_path}': {e}")
+
+
+@log_execution(level="DEBUG", message="Замер пропускной способности чтения")
+def probe_chunk_size(filepath, candidates=CANDIDATE_CHUNK_SIZES, probe_bytes=PROBE_BYTES) -> int:
+    """
+    Измеряет скорость последовательного чтения файла для каждого размера блока
+    и возвращает самый быстрый. Перед каждым замером страницы файла освобождаются
+    из кэша (POSIX_FADV_DONTNEED), чтобы измерялось устройство, а не память.
+
+    :param filepath: Путь к файлу на исследуемом устройстве.
+    :param candidates: Проверяемые размеры блоков.
+    :param probe_bytes: Объём чтения на один замер.
+    :return: Размер блока с наибольшей пропускной способностью.
+    """
+    throughput = {}
+    with open(filepath, "rb", buffering=0) as f:
+        for chunk_size in candidates:
+            fadvise(f, "POSIX_FADV_DONTNEED")
+            f.seek(0)
+            buf = bytearray(chunk_size)
+            total = 0
+            start = time.perf_counter()
+            while total < probe_bytes:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                total += n
+            elapsed = max(time.perf_counter() - start, 1e-9)
+            throughput[chunk_size] = total / elapsed
+        fadvise(f, "POSIX_FADV_DONTNEED")
+    best = max(throughput, key=throughput.get)
+    logger.debug(f"Замер '{filepath}': " + ", ".join(
+        f"{size // 1024} КБ — {speed / (1024 * 1024):.0f} МБ/с" for size, speed in throughput.items()))
+    return best
+
+
+@log_execution(level="INFO", message="Подбор размера блока для устройств")
+def tune_chunk_sizes(grouped_files, profile_path=DEFAULT_PROFILE_PATH, default=DEFAULT_CHUNK_SIZE) -> dict:
+    """
+    Подбирает размер блока чтения для каждого устройства, на котором лежат файлы.
+    Известные устройства берутся из профиля; для новых выполняется замер на самом большом
+    файле устройства, и результат сохраняется в профиль.
+
+    :param grouped_files: Словарь { размер: [пути] } из group_files_by_size.
+    :param profile_path: Путь к файлу профиля.
+    :param default: Размер блока, если замер невозможен.
+    :return: Словарь { st_dev: размер блока }.
+    """
+    largest = {}
+    for size, files in grouped_files.items():
+        for file in files:
+            try:
+                dev = os.stat(file).st_dev
+            except OSError:
+                continue
+            if size > largest.get(dev, (-1, None))[0]:
+                largest[dev] = (size, file)
+
+    profile = load_profile(profile_path)
+    chunk_sizes = {}
+    changed = False
+    for dev, (size, file) in largest.items():
+        if str(dev) in profile:
+            chunk_sizes[dev] = profile[str(dev)]
+        elif size < MIN_PROBE_FILE_SIZE:
+            logger.debug(f"Устройство {dev}: нет файла для замера, используется блок {default} байт")
+            chunk_sizes[dev] = default
+        else:
+            try:
+                chunk_sizes[dev] = profile[str(dev)] = probe_chunk_size(file)
+                changed = True
+            except OSError as e:
+                logger.warning(f"Не удалось выполнить замер на '{file}': {e}")
+                chunk_sizes[dev] = default
+        logger.info(f"Устройство {dev}: размер блока {chunk_sizes[dev] // 1024} КБ")
+    if changed:
+        save_profile(profile, profile_path)
+    return chunk_sizes
+
+
+def chunk_size_for(filepath, device_chunk_sizes=None, default=DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Возвращает размер блока для файла по устройству, на котором он расположен.
+    """
+    if not device_chunk_sizes:
+        return default
+    try:
+        return device_chunk_sizes.get(os.stat(filepath).st_dev, default)
+    except OSError:
+        return default
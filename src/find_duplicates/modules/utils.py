@@ -1,6 +1,6 @@
 import os
+import math
 import argparse
-import tempfile
 from .logger import logger, log_execution
 
 
@@ -19,7 +19,8 @@ def normalize_path(path: str) -> str:
 @log_execution(level="DEBUG", message="Получение информации о файле")
 def get_file_info(filepath: str) -> dict:
     """
-    Возвращает словарь с информацией о файле: нормализованный путь и размер.
+    Возвращает словарь с информацией о файле: нормализованный путь, размер и время модификации
+    (mtime_ns — для проверки, что файл не изменился перед действием над дубликатами).
     Использует существующую функцию normalize_path, если она есть.
     :param filepath: Путь к файлу.
     :type str: Путь к файлу.
@@ -28,10 +29,11 @@ def get_file_info(filepath: str) -> dict:
     """
     normalized = normalize_path(filepath)
     try:
-        size = os.path.getsize(filepath)
+        st = os.stat(filepath)
+        size, mtime_ns = st.st_size, st.st_mtime_ns
     except Exception as e:
-        size = None
-    return {'path': normalized, 'size': size}
+        size = mtime_ns = None
+    return {'path': normalized, 'size': size, 'mtime_ns': mtime_ns}
 
 
 @log_execution(level="DEBUG", message="Проверка поддержки символических ссылок")
@@ -39,6 +41,8 @@ def check_symlink_support():
     """
     Проверяет, поддерживает ли система символические ссылки.
     """
+    import tempfile
+
     with tempfile.TemporaryDirectory() as temp_dir:
         test_link = os.path.join(temp_dir, "test_symlink")
         test_target = os.path.join(temp_dir, "test_target")
@@ -91,25 +95,183 @@ def check_file_readable(filepath):
     logger.debug(f"Файл доступен для чтения: {filepath}")
 
 
+def parse_size(value) -> int:
+    """
+    Преобразует размер вида '4096', '64K', '4M', '1G' в число байт.
+    Используется как type для аргументов argparse.
+    """
+    units = {"B": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+    text = str(value).strip().upper().removesuffix("IB").removesuffix("B") or "0"
+    multiplier = 1
+    if text[-1] in units:
+        multiplier = units[text[-1]]
+        text = text[:-1]
+    try:
+        number = float(text)
+        # inf и nan float принимает, но размером они не являются
+        if not math.isfinite(number):
+            raise ValueError(text)
+        size = int(number * multiplier)
+    except (ValueError, OverflowError):
+        raise argparse.ArgumentTypeError(f"Некорректный размер: {value}")
+    if size < 0:
+        raise argparse.ArgumentTypeError(f"Размер не может быть отрицательным: {value}")
+    return size
+
+
+def parse_chunk_size(value):
+    """
+    Тип аргумента --chunk-size: размер в байтах или 'auto' для подбора по устройствам.
+    """
+    if str(value).lower() == "auto":
+        return "auto"
+    size = parse_size(value)
+    if size <= 0:
+        raise argparse.ArgumentTypeError("Размер блока должен быть положительным")
+    return size
+
+
+# Выходной файл по умолчанию для каждого формата ('-' — стандартный вывод)
+DEFAULT_OUTPUTS = {
+    "csv": "duplicates.csv",
+    "jsonl": "duplicates.jsonl",
+    "sqlite": "duplicates.sqlite",
+    "tree": "-",
+}
+
+
+def parse_positive_int(value):
+    """
+    Разбирает положительное целое число для argparse.
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ожидается целое число: '{value}'")
+    if number <= 0:
+        raise argparse.ArgumentTypeError("Число должно быть положительным")
+    return number
+
+
+def parse_non_negative_int(value):
+    """
+    Разбирает неотрицательное целое число для argparse (0 допустим).
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ожидается целое число: '{value}'")
+    if number < 0:
+        raise argparse.ArgumentTypeError("Число не может быть отрицательным")
+    return number
+
+
 @log_execution(level="DEBUG", message="Парсинг аргументов командной строки")
 def parse_arguments():
     parser = argparse.ArgumentParser(
         description="Поиск дубликатов файлов с гибкими настройками.",
         formatter_class=argparse.ArgumentDefaultsHelpFormatter
     )
-    parser.add_argument("--directory", required=True, help="Директория для сканирования")
+    parser.add_argument("--directory", dest="directories", nargs="+", action="extend", default=[],
+                        help="Директории для сканирования; несколько директорий (в том числе повторным --directory) "
+                             "сканируются одновременно, а дубликаты ищутся среди файлов всех директорий")
+    parser.add_argument("--files-from", default=None,
+                        help="Файл со списком путей, разделённых нулевым байтом (find -print0), или '-' для "
+                             "стандартного ввода; файлы добавляются к найденным в --directory")
     parser.add_argument("--exclude", nargs="*", default=[], help="Шаблоны для исключения файлов/директорий")
     parser.add_argument("--hash-type", default="blake3", choices=["md5", "sha1", "sha256", "sha512", "blake3"],
                         help="Алгоритм хэширования (по умолчанию Blake3)")
-    parser.add_argument("--output", default="duplicates.csv", help="Имя выходного файла")
+    parser.add_argument("--prehash", action="store_true",
+                        help="Предварительно отсеивать кандидатов быстрым хэшем (xxh3-128 или crc32)")
+    parser.add_argument("--output", default=None,
+                        help="Имя выходного файла ('-' — стандартный вывод для --format tree); по умолчанию "
+                             "duplicates.csv, duplicates.jsonl или duplicates.sqlite, для tree — стандартный вывод")
+    parser.add_argument("--format", dest="output_format", default="csv", choices=["csv", "jsonl", "sqlite", "tree"],
+                        help="Формат выходного файла: csv (размеры в читаемом виде), jsonl (точные размеры, inode, "
+                             "mtime), sqlite (таблицы groups и files с индексами), tree (дерево групп; цвета — "
+                             "только в терминале)")
+    parser.add_argument("--top", type=parse_positive_int, default=None,
+                        help="Вывести только N групп с наибольшим освобождаемым объёмом ((n - 1) × размер)")
+    parser.add_argument("--compress", default="auto", choices=["auto", "none", "gzip", "xz", "zstd"],
+                        help="Сжатие выходного файла в фоновом потоке; auto — по расширению (.gz, .xz, .zst). "
+                             "zstd требует пакет zstandard")
+    parser.add_argument("--summary-top", type=parse_non_negative_int, default=5,
+                        help="Сколько крупнейших по освобождаемому объёму групп перечислить в итогах (0 — не выводить)")
+    parser.add_argument("--action", default="report",
+                        choices=["report", "hardlink", "reflink", "dedupe", "delete", "move"],
+                        help="Действие над найденными дубликатами: report — только отчёт; hardlink/reflink — "
+                             "заменить копии ссылкой на сохраняемый файл; dedupe — сделать данные общими через "
+                             "FIDEDUPERANGE (btrfs, XFS), оставив файлы независимыми; delete — удалить копии; "
+                             "move — перенести копии в --move-to")
+    parser.add_argument("--keep", default="oldest", choices=["oldest", "newest", "shortest"],
+                        help="Какой файл группы сохранять: самый старый, самый новый или с самым коротким путём")
+    parser.add_argument("--keep-priority", nargs="*", default=[],
+                        help="Директории по убыванию приоритета: файл из них сохраняется в первую очередь")
+    parser.add_argument("--move-to", default=None, help="Директория для --action move")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Не изменять файлы, только проверить и подсчитать освобождаемый объём")
+    parser.add_argument("--sort-output", action="store_true",
+                        help="Упорядочить группы в выходном файле по хэшу (внешней сортировкой после поиска); "
+                             "по умолчанию группы записываются по мере подтверждения")
     parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
                         help="Уровень логирования")
     parser.add_argument("--skip-inaccessible", action="store_true",
                         help="Пропускать файлы и директории, к которым нет доступа")
     parser.add_argument("--include-hidden", action="store_true",
                         help="Включать скрытые файлы при сканировании")
+    parser.add_argument("--min-size", type=parse_size, default=0,
+                        help="Не учитывать файлы меньше указанного размера (например, 1 — исключить пустые файлы)")
+    parser.add_argument("--max-size", type=parse_size, default=None,
+                        help="Не учитывать файлы больше указанного размера")
+    parser.add_argument("--include", nargs="*", default=[],
+                        help="Учитывать только файлы, имена которых подходят под шаблоны (например, '*.iso')")
+    parser.add_argument("--keep-page-cache", action="store_true",
+                        help="Не освобождать страницы прочитанных файлов из кэша (POSIX_FADV_DONTNEED); по умолчанию "
+                             "они освобождаются после обработки группы, кроме файлов, бывших в кэше до поиска")
+    parser.add_argument("--direct-io", action="store_true",
+                        help="Читать файлы в обход кэша страниц (O_DIRECT), если ФС это поддерживает")
+    parser.add_argument("--chunk-size", type=parse_chunk_size, default=4 * 1024 * 1024,
+                        help="Размер блока чтения (например, 1M) или 'auto' для замера по каждому устройству")
+    parser.add_argument("--chunk-profile", default=None,
+                        help="Файл профиля размеров блоков для --chunk-size auto "
+                             "(по умолчанию ~/.cache/find_duplicates/chunk_profile.json)")
+    parser.add_argument("--small-file-threshold", type=parse_size, default=64 * 1024,
+                        help="Файлы меньше этого размера читаются один раз и сравниваются в памяти (0 — отключено)")
+    parser.add_argument("--partial-size", type=parse_size, default=0,
+                        help="Сравнивать первые и последние N байт перед хэшированием (0 — отключено)")
+    parser.add_argument("--merkle", action="store_true",
+                        help="Сравнивать файлы по дайджестам блоков размера --chunk-size и прекращать чтение "
+                             "на первом отличающемся блоке")
+    parser.add_argument("--cache", action="store_true",
+                        help="Сохранять хэши между запусками и не перечитывать неизменившиеся файлы")
+    parser.add_argument("--cache-file", default=None,
+                        help="Файл кэша хэшей для --cache (по умолчанию ~/.cache/find_duplicates/hashes.sqlite)")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="Сохранять снимок директорий и при повторном запуске перечитывать только изменившиеся")
+    parser.add_argument("--snapshot-file", default=None,
+                        help="Файл снимка для --snapshot (по умолчанию ~/.cache/find_duplicates/scan_snapshot.sqlite)")
+    parser.add_argument("--watch", action="store_true",
+                        help="После первого поиска продолжать отслеживать изменения (inotify, Linux) "
+                             "и обновлять результаты")
+    parser.add_argument("--watch-interval", type=float, default=10.0,
+                        help="Минимальный интервал между обновлениями результатов в режиме --watch, секунд")
+    parser.add_argument("--checkpoint", action="store_true",
+                        help="Периодически сохранять состояние (файлы, группы, хэши), чтобы прерванный запуск "
+                             "можно было продолжить с --resume")
+    parser.add_argument("--checkpoint-file", default=None,
+                        help="Файл контрольной точки (по умолчанию <output>.checkpoint)")
+    parser.add_argument("--checkpoint-interval", type=float, default=60.0,
+                        help="Минимальный интервал между сохранениями контрольной точки, секунд")
+    parser.add_argument("--resume", action="store_true",
+                        help="Продолжить с сохранённой контрольной точки (включает --checkpoint)")
 
     args = parser.parse_args()
+    if not args.directories and args.files_from is None:
+        parser.error("укажите --directory или --files-from")
+    # Первая директория — для режима --watch и обратной совместимости (None, если задан только список файлов)
+    args.directory = args.directories[0] if args.directories else None
+    if args.output is None:
+        args.output = DEFAULT_OUTPUTS[args.output_format]
     logger.debug(f"Аргументы успешно распознаны: {args}")
     return args
 
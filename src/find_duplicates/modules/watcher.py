@@ -0,0 +1,337 @@
+import os
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+from fnmatch import fnmatch
+from .logger import logger, log_execution
+from .scanner import scan_directory, is_excluded
+from .comparer import find_potential_duplicates
+from .cache import HashCache
+
+# Константы из <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+EVENT_HEADER = struct.Struct("iIII")
+EVENT_BUFFER_SIZE = 64 * 1024
+
+# Интервал (в секундах) между пересчётами дубликатов по накопленным событиям
+DEFAULT_WATCH_INTERVAL = 10.0
+
+
+class Inotify:
+    """
+    Минимальная обёртка над inotify(7) через ctypes (только Linux).
+    Следит за деревом директорий и возвращает события в виде (маска, полный путь).
+    """
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self.libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify не поддерживается на этой платформе")
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1: {os.strerror(err)}")
+        self.watches = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add_watch(self, path):
+        """
+        Добавляет наблюдение за директорией.
+        """
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch('{path}'): {os.strerror(err)}")
+        self.watches[wd] = path
+        return wd
+
+    def add_tree(self, root, accept_directory=None):
+        """
+        Добавляет наблюдение за директорией и всеми вложенными директориями.
+
+        :param root: Корень дерева.
+        :param accept_directory: Функция (путь) -> bool, отбрасывающая исключённые директории.
+        """
+        for dir_path, dir_names, _ in os.walk(root):
+            try:
+                self.add_watch(dir_path)
+            except OSError as e:
+                if e.errno == errno.ENOSPC:
+                    logger.error("Исчерпан лимит наблюдений inotify (fs.inotify.max_user_watches)")
+                    raise
+                logger.warning(f"Не удалось наблюдать за '{dir_path}': {e}")
+            if accept_directory:
+                dir_names[:] = [name for name in dir_names if accept_directory(os.path.join(dir_path, name))]
+
+    def remove_tree(self, root):
+        """
+        Прекращает наблюдение за директорией и вложенными (например, после её перемещения).
+        """
+        prefix = root.rstrip(os.sep) + os.sep
+        for wd, path in list(self.watches.items()):
+            if path == root or path.startswith(prefix):
+                self.libc.inotify_rm_watch(self.fd, wd)
+                del self.watches[wd]
+
+    def read_events(self, timeout=None) -> list:
+        """
+        Ожидает события не дольше timeout секунд и возвращает их списком.
+
+        :param timeout: Время ожидания в секундах (None — без ограничения).
+        :return: Список кортежей (маска, путь).
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, EVENT_BUFFER_SIZE)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                dir_path = self.watches.get(wd)
+                if mask & IN_IGNORED:
+                    self.watches.pop(wd, None)
+                    continue
+                if mask & IN_Q_OVERFLOW:
+                    events.append((mask, None))
+                elif dir_path is not None:
+                    events.append((mask, os.path.join(dir_path, name) if name else dir_path))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class DuplicateTracker:
+    """
+    Поддерживает группы по размеру и найденные дубликаты в актуальном состоянии
+    по мере изменения файлов. Изменения накапливаются как «грязные» размеры,
+    и refresh пересчитывает дубликаты только для них. Хэши неизменившихся файлов
+    берутся из кэша (HashCache), поэтому повторно читаются лишь изменённые файлы.
+    """
+
+    def __init__(self, directory, scan_options=None, find_options=None, cache=None):
+        """
+        :param directory: Отслеживаемая директория.
+        :param scan_options: Параметры scan_directory (include_hidden, exclude, include, min_size, max_size, ...).
+        :param find_options: Параметры find_potential_duplicates (hash_type, chunk_size, ...).
+        :param cache: Кэш хэшей; по умолчанию — кэш в памяти на время работы.
+        """
+        self.directory = os.path.abspath(directory)
+        self.scan_options = dict(scan_options or {})
+        self.find_options = dict(find_options or {})
+        self.cache = cache if cache is not None else HashCache(":memory:")
+        self.sizes = {}
+        self.groups = {}
+        self.results = {}
+        self.dirty = set()
+
+    @property
+    def duplicates(self) -> dict:
+        """
+        Текущие дубликаты в формате find_potential_duplicates.
+        """
+        merged = {}
+        for size_duplicates in self.results.values():
+            merged.update(size_duplicates)
+        return merged
+
+    def accept_directory(self, path) -> bool:
+        """
+        Проверяет, нужно ли заходить в директорию (скрытые и исключённые пропускаются, как в сканере).
+        """
+        name = os.path.basename(path)
+        exclude = self.scan_options.get("exclude") or []
+        if not self.scan_options.get("include_hidden") and name.startswith('.'):
+            return False
+        return not (is_excluded(path, exclude) or is_excluded(name, exclude))
+
+    def accept_file(self, path, size) -> bool:
+        """
+        Проверяет файл теми же фильтрами, что и scan_directory.
+        """
+        if not self.accept_directory(path):
+            return False
+        relative = os.path.relpath(os.path.dirname(path), self.directory)
+        if relative != os.curdir and not all(self.accept_directory(part) for part in relative.split(os.sep)):
+            return False
+        include = self.scan_options.get("include") or []
+        if include and not any(fnmatch(os.path.basename(path), pattern) for pattern in include):
+            return False
+        max_size = self.scan_options.get("max_size")
+        return size >= (self.scan_options.get("min_size") or 0) and (max_size is None or size <= max_size)
+
+    @log_execution(level="INFO", message="Полное сканирование отслеживаемой директории")
+    def rescan(self):
+        """
+        Заново сканирует всю директорию (при запуске и после переполнения очереди событий).
+        """
+        self.sizes, self.groups, self.results = {}, {}, {}
+        self.dirty = set()
+        for path in scan_directory(self.directory, **self.scan_options):
+            self.add_file(path)
+
+    def add_file(self, path):
+        """
+        Учитывает созданный или изменённый файл.
+        """
+        path = os.path.abspath(path)
+        try:
+            st = os.stat(path, follow_symlinks=False)
+        except OSError:
+            self.remove_path(path)
+            return
+        if not os.path.isfile(path) or os.path.islink(path) or not self.accept_file(path, st.st_size):
+            self.remove_path(path)
+            return
+        old_size = self.sizes.get(path)
+        if old_size is not None and old_size != st.st_size:
+            self._discard(path)
+        self.sizes[path] = st.st_size
+        self.groups.setdefault(st.st_size, set()).add(path)
+        self.dirty.add(st.st_size)
+
+    def add_directory(self, path):
+        """
+        Учитывает все файлы появившейся директории.
+        """
+        if not self.accept_directory(path):
+            return
+        options = dict(self.scan_options, skip_inaccessible=True)
+        for file in scan_directory(path, **options):
+            self.add_file(file)
+
+    def remove_path(self, path):
+        """
+        Забывает удалённый или перемещённый файл либо все файлы директории.
+        """
+        path = os.path.abspath(path)
+        if path in self.sizes:
+            self._discard(path)
+            return
+        prefix = path.rstrip(os.sep) + os.sep
+        for file in [file for file in self.sizes if file.startswith(prefix)]:
+            self._discard(file)
+
+    def _discard(self, path):
+        size = self.sizes.pop(path)
+        group = self.groups.get(size)
+        if group is not None:
+            group.discard(path)
+            if not group:
+                del self.groups[size]
+        self.dirty.add(size)
+
+    @log_execution(level="DEBUG", message="Пересчёт дубликатов по изменившимся размерам")
+    def refresh(self) -> bool:
+        """
+        Пересчитывает дубликаты для групп, затронутых изменениями.
+
+        :return: True, если что-то пересчитывалось.
+        """
+        if not self.dirty:
+            return False
+        for size in self.dirty:
+            files = self.groups.get(size, set())
+            if len(files) > 1:
+                self.results[size] = find_potential_duplicates({size: sorted(files)}, cache=self.cache,
+                                                               **self.find_options)
+            else:
+                self.results.pop(size, None)
+            if not self.results.get(size):
+                self.results.pop(size, None)
+        logger.info(f"Обновлены группы размеров: {len(self.dirty)}, групп дубликатов: {len(self.duplicates)}")
+        self.dirty = set()
+        return True
+
+    def handle_event(self, mask, path, inotify=None):
+        """
+        Применяет событие inotify к состоянию.
+
+        :param mask: Маска события.
+        :param path: Полный путь (None при переполнении очереди).
+        :param inotify: Наблюдатель, в который добавляются новые директории.
+        """
+        if mask & IN_Q_OVERFLOW:
+            logger.warning("Очередь событий inotify переполнена — выполняется полное сканирование")
+            self.rescan()
+            return
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            if path == self.directory:
+                logger.warning(f"Отслеживаемая директория '{path}' удалена или перемещена")
+            return
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                if inotify is not None and self.accept_directory(path):
+                    inotify.add_tree(path, self.accept_directory)
+                self.add_directory(path)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                if inotify is not None and mask & IN_MOVED_FROM:
+                    inotify.remove_tree(path)
+                self.remove_path(path)
+            return
+        if mask & (IN_DELETE | IN_MOVED_FROM):
+            self.remove_path(path)
+        elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE):
+            self.add_file(path)
+
+
+def watch(tracker, on_update, interval=DEFAULT_WATCH_INTERVAL, stop_event=None):
+    """
+    Режим наблюдения: начальное сканирование, затем обработка событий inotify
+    и пересчёт дубликатов не чаще одного раза в interval секунд.
+
+    :param tracker: DuplicateTracker отслеживаемой директории.
+    :param on_update: Функция (duplicates), вызываемая после каждого пересчёта.
+    :param interval: Минимальный интервал между пересчётами в секундах.
+    :param stop_event: threading.Event для остановки (например, по SIGTERM).
+    """
+    with Inotify() as inotify:
+        # Наблюдение ставится до сканирования, чтобы не потерять изменения, сделанные во время него
+        inotify.add_tree(tracker.directory, tracker.accept_directory)
+        tracker.rescan()
+        tracker.refresh()
+        on_update(tracker.duplicates)
+        logger.info(f"Наблюдение за '{tracker.directory}' (директорий: {len(inotify.watches)})")
+
+        next_refresh = time.monotonic() + interval
+        while stop_event is None or not stop_event.is_set():
+            timeout = max(0.0, next_refresh - time.monotonic())
+            for mask, path in inotify.read_events(timeout=min(timeout, 1.0)):
+                tracker.handle_event(mask, path, inotify)
+            if time.monotonic() >= next_refresh:
+                if tracker.refresh():
+                    on_update(tracker.duplicates)
+                next_refresh = time.monotonic() + interval
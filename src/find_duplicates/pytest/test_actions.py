@@ -0,0 +1,57 @@
+import os
+import pytest
+from find_duplicates.modules.actions import Deduplicator, choose_keeper, temp_path_for, replace_atomically
+from find_duplicates.modules.utils import get_file_info
+
+
+@pytest.fixture
+def duplicate_group(tmp_path):
+    paths = []
+    for directory in ("keep", "other"):
+        (tmp_path / directory).mkdir()
+        path = tmp_path / directory / "file.txt"
+        path.write_text("одинаковое содержимое", encoding="utf-8")
+        paths.append(str(path))
+    return [get_file_info(path) for path in paths]
+
+
+def test_hardlink_respects_priority(tmp_path, duplicate_group):
+    """
+    Сохраняется файл из приоритетной директории, второй становится жёсткой ссылкой на него.
+    """
+    keep_st = os.stat(duplicate_group[0]["path"])
+    deduplicator = Deduplicator("hardlink", keep="newest", priority=[str(tmp_path / "keep")])
+    list(deduplicator.process([("h", duplicate_group)]))
+    assert os.stat(duplicate_group[1]["path"]).st_ino == keep_st.st_ino
+    assert deduplicator.summary.files == 1
+
+
+def test_vanished_file_is_skipped(duplicate_group):
+    os.remove(duplicate_group[1]["path"])
+    deduplicator = Deduplicator("delete", keep="oldest", priority=[os.path.dirname(duplicate_group[0]["path"])])
+    list(deduplicator.process([("h", duplicate_group)]))
+    assert deduplicator.summary.skipped == 1
+    assert os.path.exists(duplicate_group[0]["path"])
+
+
+def test_replace_atomically_cleans_up(tmp_path):
+    """
+    При ошибке создания замены исходный файл и директория остаются без изменений.
+    """
+    target = tmp_path / "target.txt"
+    target.write_text("data")
+
+    def failing_create(temp):
+        open(temp, "w").close()
+        raise OSError("сбой")
+
+    with pytest.raises(OSError):
+        replace_atomically(str(target), failing_create)
+    assert os.listdir(tmp_path) == ["target.txt"]
+    assert target.read_text() == "data"
+    assert os.path.dirname(temp_path_for(str(target))) == str(tmp_path)
+
+
+def test_choose_keeper_single_file():
+    keeper, others = choose_keeper([{"path": "/a", "size": 1}], "oldest")
+    assert keeper["path"] == "/a" and others == []
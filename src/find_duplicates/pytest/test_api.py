@@ -0,0 +1,48 @@
+import os
+import pytest
+from find_duplicates import Finder, find
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for name, data in [("a.txt", b"same"), ("b.txt", b"same"), ("c.txt", b"diff")]:
+        (tmp_path / name).write_bytes(data)
+    return tmp_path
+
+
+def test_find_returns_groups_with_file_details(tree):
+    """
+    find возвращает пары (хэш, файлы) с путём, размером и mtime каждого файла.
+    """
+    groups = list(find(str(tree)))
+    assert len(groups) == 1
+    file_hash, files = groups[0]
+    assert file_hash
+    assert sorted(os.path.basename(info["path"]) for info in files) == ["a.txt", "b.txt"]
+    assert all(info["size"] == 4 and info["mtime_ns"] for info in files)
+
+
+def test_finder_sees_changes_between_calls(tree):
+    """
+    Повторный поиск тем же Finder учитывает изменённые файлы.
+    """
+    with Finder() as finder:
+        assert len(list(finder.find(tree))) == 1
+        (tree / "c.txt").write_bytes(b"same")
+        os.utime(tree / "c.txt", ns=(1, 1))
+        groups = list(finder.find(tree))
+    assert [len(files) for _, files in groups] == [3]
+
+
+def test_finder_with_cache_path(tree, tmp_path_factory):
+    """
+    Кэш, открытый по пути, сохраняется на диск и закрывается вместе с Finder.
+    """
+    cache_path = str(tmp_path_factory.mktemp("cache") / "hashes.db")
+    with Finder(cache=cache_path, small_file_threshold=0) as finder:
+        assert len(list(finder.find(tree))) == 1
+    assert os.path.getsize(cache_path) > 0
+
+
+def test_empty_directory(tmp_path):
+    assert list(find(str(tmp_path))) == []
@@ -0,0 +1,27 @@
+import os
+from find_duplicates.modules.cache import HashCache, open_cache
+
+
+def test_cache_roundtrip(tmp_path):
+    """
+    Запись кэша возвращается, пока файл не изменился.
+    """
+    file_path = tmp_path / "data.bin"
+    file_path.write_bytes(b"content")
+    with HashCache(str(tmp_path / "hashes.sqlite")) as cache:
+        cache.put(str(file_path), "merkle:blake3:4", None, [b"ab", b"cd"])
+        entry = cache.get(str(file_path), "merkle:blake3:4")
+        assert entry.digest is None
+        assert entry.chunks == [b"ab", b"cd"]
+        file_path.write_bytes(b"changed content")
+        assert cache.get(str(file_path), "merkle:blake3:4") is None
+
+
+def test_open_cache_missing_file(tmp_path):
+    """
+    Отсутствующий в кэше или удалённый файл не даёт записи.
+    """
+    cache = open_cache(str(tmp_path / "nested" / "hashes.sqlite"))
+    assert cache is not None
+    assert cache.get(str(tmp_path / "missing.bin"), "blake3") is None
+    cache.close()
@@ -0,0 +1,28 @@
+import os
+from find_duplicates.modules.checkpoint import Checkpoint
+
+
+def test_hashes_saved_with_checkpoint(tmp_path):
+    """
+    Хэши, записанные в кэш контрольной точки, доступны после повторного открытия.
+    """
+    data = tmp_path / "data.bin"
+    data.write_bytes(b"content")
+    path_ = str(tmp_path / "run.checkpoint")
+    with Checkpoint(path_, {"directory": str(tmp_path)}) as checkpoint:
+        checkpoint.reset()
+        checkpoint.hash_cache.put(str(data), "blake3", "abc")
+    with Checkpoint(path_, {"directory": str(tmp_path)}) as checkpoint:
+        assert checkpoint.resume()
+        assert checkpoint.hash_cache.get(str(data), "blake3").digest == "abc"
+
+
+def test_fresh_checkpoint_has_no_stages(tmp_path):
+    """
+    Новая контрольная точка не содержит результатов этапов.
+    """
+    with Checkpoint(str(tmp_path / "run.checkpoint"), {}) as checkpoint:
+        assert not checkpoint.resume()
+        assert checkpoint.load_files() is None
+        assert checkpoint.load_groups() is None
+        assert checkpoint.completed() == {}
@@ -1,8 +1,12 @@
 # Файл: pytest/test_comparer.py
 import os
 import pytest
-from find_duplicates.modules.comparer import compare_files, find_potential_duplicates
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from find_duplicates.modules.comparer import (compare_files, find_potential_duplicates, group_small_files,
+                                              iter_duplicates)
 from find_duplicates.modules.grouper import group_files_by_size
+from find_duplicates.modules.cache import HashCache
 
 
 def create_file(dir_path, name, content):
@@ -80,6 +84,19 @@ def test_compare_files_large(tmp_path, big_data):
     f2 = create_file(str(tmp_path), "big2.txt", big_data)
     assert compare_files(f1, f2) is True
 
+@pytest.mark.parametrize("tail, expected", [(b"x", True), (b"y", False)])
+def test_compare_files_mmap(tmp_path, tail, expected):
+    """
+    Сравнение через mmap находит различие в последнем байте.
+    """
+    data = os.urandom(2 * 1024 * 1024 + 3)
+    f1 = tmp_path / "m1.bin"
+    f2 = tmp_path / "m2.bin"
+    f1.write_bytes(data + b"x")
+    f2.write_bytes(data + tail)
+    assert compare_files(str(f1), str(f2), chunk_size=1024 * 1024, mmap_threshold=1) is expected
+
+
 def test_compare_files_nonexistent(tmp_path):
     """
     Сравнение с несуществующим файлом – функция должна вернуть False.
@@ -261,3 +278,131 @@ def test_find_potential_duplicates_stability(tmp_path):
     d1 = find_potential_duplicates(grouped, "md5")
     d2 = find_potential_duplicates(grouped, "md5")
     assert d1 == d2
+
+
+def test_find_potential_duplicates_prehash(tmp_path):
+    """
+    Предварительный отсев быстрым хэшем не меняет результат.
+    """
+    f1 = create_small_file(str(tmp_path), "a.txt", "Duplicate")
+    f2 = create_small_file(str(tmp_path), "b.txt", "Duplicate")
+    f3 = create_small_file(str(tmp_path), "c.txt", "Different")
+    grouped = group_files_by_size([f1, f2, f3])
+    with_prehash = find_potential_duplicates(grouped, "md5", prehash=True)
+    assert with_prehash == find_potential_duplicates(grouped, "md5")
+    assert {item["path"] for items in with_prehash.values() for item in items} == {f1, f2}
+
+
+def test_group_small_files_matches_full_path(tmp_path):
+    """
+    Путь для небольших файлов (одно чтение, сравнение в памяти) даёт тот же результат, что и полный.
+    """
+    f1 = create_small_file(str(tmp_path), "a.txt", "Small dup")
+    f2 = create_small_file(str(tmp_path), "b.txt", "Small dup")
+    f3 = create_small_file(str(tmp_path), "c.txt", "Small oth")
+    grouped = group_files_by_size([f1, f2, f3])
+    expected = find_potential_duplicates(grouped, "md5", small_file_threshold=0)
+    assert group_small_files([f1, f2, f3], "md5") == expected
+    assert find_potential_duplicates(grouped, "md5") == expected
+
+
+def test_find_potential_duplicates_empty_files(tmp_path):
+    """
+    Пустые файлы объединяются в одну группу без открытия.
+    """
+    empties = [create_small_file(str(tmp_path), f"e{i}.txt", "") for i in range(3)]
+    grouped = group_files_by_size(empties)
+    with patch("find_duplicates.modules.comparer.compute_hash") as hash_mock:
+        duplicates = find_potential_duplicates(grouped, "md5")
+    hash_mock.assert_not_called()
+    assert len(duplicates) == 1
+    assert {item["path"] for item in list(duplicates.values())[0]} == set(empties)
+
+
+def test_compare_sparse_files(tmp_path):
+    """
+    Разреженные файлы сравниваются по картам дыр; дыра равна нулям в обычной копии.
+    """
+    size = 6 * 1024 * 1024
+    paths = []
+    for name, offset in (("a.img", 1024 * 1024), ("b.img", 1024 * 1024), ("c.img", 2 * 1024 * 1024)):
+        path_ = tmp_path / name
+        with open(path_, "wb") as f:
+            f.truncate(size)
+            f.seek(offset)
+            f.write(b"payload")
+        paths.append(str(path_))
+    dense = tmp_path / "dense.img"
+    dense.write_bytes((tmp_path / "a.img").read_bytes())
+    assert compare_files(paths[0], paths[1])
+    assert compare_files(paths[0], str(dense))
+    assert not compare_files(paths[0], paths[2])
+
+
+def test_find_potential_duplicates_merkle_with_cache(tmp_path):
+    """
+    Режим merkle находит те же дубликаты, а повторный запуск берёт хэши из кэша.
+    """
+    data = os.urandom(32 * 1024)
+    paths = []
+    for name, content in (("a.bin", data), ("b.bin", data), ("c.bin", data[:-1] + bytes([data[-1] ^ 1]))):
+        path_ = tmp_path / name
+        path_.write_bytes(content)
+        paths.append(str(path_))
+    grouped = group_files_by_size(paths)
+    with HashCache(str(tmp_path / "hashes.sqlite")) as cache:
+        duplicates = find_potential_duplicates(grouped, "sha256", merkle=True, cache=cache, chunk_size=4096)
+        assert [sorted(item["path"] for item in group) for group in duplicates.values()] == [sorted(paths[:2])]
+        plain = find_potential_duplicates(grouped, "sha256", cache=cache)
+        with patch("find_duplicates.modules.comparer.compute_hash") as hash_mock:
+            assert find_potential_duplicates(grouped, "sha256", cache=cache).keys() == plain.keys()
+        hash_mock.assert_not_called()
+
+
+def test_iter_duplicates_matches_find_potential_duplicates(tmp_path):
+    """
+    Генератор iter_duplicates отдаёт те же группы, что и find_potential_duplicates.
+    """
+    files = [create_file(str(tmp_path), name, content)
+             for name, content in [("x1.txt", "same"), ("x2.txt", "same"), ("y.txt", "diff")]]
+    grouped = group_files_by_size(files)
+    assert dict(iter_duplicates(grouped, "sha256")) == find_potential_duplicates(grouped, "sha256")
+
+
+def test_find_potential_duplicates_without_verify(tmp_path):
+    """
+    verify=False (действие dedupe) группирует по хэшу без побайтового сравнения.
+    """
+    files = [create_file(str(tmp_path), name, "x" * 100000) for name in ("v1.bin", "v2.bin")]
+    grouped = group_files_by_size(files)
+    with patch("find_duplicates.modules.comparer.compare_files") as compare_mock:
+        duplicates = find_potential_duplicates(grouped, "sha256", verify=False)
+    compare_mock.assert_not_called()
+    assert duplicates == find_potential_duplicates(grouped, "sha256")
+
+
+def test_duplicates_read_once_within_group(tmp_path):
+    """
+    Хэширование и побайтовое сравнение одной группы не освобождают страницы между проходами.
+    """
+    files = [create_file(str(tmp_path), name, "z" * 100000) for name in ("z1.bin", "z2.bin")]
+    with patch("find_duplicates.modules.comparer.compute_hash", return_value="h") as hash_mock, \
+            patch("find_duplicates.modules.comparer.is_page_cached", return_value=False), \
+            patch("find_duplicates.modules.comparer.drop_page_cache") as drop_mock:
+        groups = list(iter_duplicates(group_files_by_size(files), "sha256"))
+    assert len(groups) == 1
+    assert all(call.kwargs["drop_cache"] is False for call in hash_mock.call_args_list)
+    assert drop_mock.call_count == 2
+
+
+def test_shared_executor_used_for_small_files(tmp_path):
+    """
+    Переданный пул используется для всех групп небольших файлов и не закрывается.
+    """
+    files = [create_file(str(tmp_path), f"{size}_{i}.txt", "q" * size) for size in (2, 3) for i in range(2)]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        with patch.object(executor, "submit", wraps=executor.submit) as submit_mock:
+            groups = list(iter_duplicates(group_files_by_size(files), "md5", executor=executor))
+        assert len(groups) == 2
+        assert submit_mock.call_count == 1
+        assert executor.submit(len, "ok").result() == 2
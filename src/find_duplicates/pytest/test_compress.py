@@ -0,0 +1,36 @@
+import gzip
+import json
+import pytest
+from find_duplicates.modules import compress
+from find_duplicates.modules.compress import resolve_compression, open_output
+from find_duplicates.modules.output import write_duplicates_to_jsonl
+
+
+def test_jsonl_gzip_by_extension(tmp_path):
+    """
+    Расширение .gz включает сжатие gzip; содержимое совпадает с несжатым.
+    """
+    duplicates = {"h1": [{"path": "/a", "size": 3}, {"path": "/b", "size": 3}]}
+    output_file = tmp_path / "out.jsonl.gz"
+    assert write_duplicates_to_jsonl(duplicates, str(output_file)) is True
+    with gzip.open(output_file, "rt", encoding="utf-8") as f:
+        record = json.loads(f.readline())
+    assert record["hash"] == "h1"
+    assert [item["path"] for item in record["files"]] == ["/a", "/b"]
+
+
+def test_open_output_uncompressed(tmp_path):
+    output_file = tmp_path / "plain.txt"
+    with open_output(str(output_file), resolve_compression(str(output_file))) as f:
+        f.write("текст")
+    assert output_file.read_text(encoding="utf-8") == "текст"
+
+
+@pytest.mark.skipif(not compress.ZSTD_AVAILABLE, reason="пакет zstandard не установлен")
+def test_zstd_roundtrip(tmp_path):
+    import zstandard
+    output_file = tmp_path / "out.txt.zst"
+    with open_output(str(output_file), resolve_compression(str(output_file))) as f:
+        f.write("строка\n" * 1000)
+    with zstandard.open(output_file, "rt", encoding="utf-8") as f:
+        assert f.read() == "строка\n" * 1000
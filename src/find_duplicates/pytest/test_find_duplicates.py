@@ -1,11 +1,14 @@
 import os
 import sys
 import shutil
+import json
+import sqlite3
 import tempfile
 import pytest
 
 from find_duplicates.find_duplicates import main
 from find_duplicates.modules.utils import parse_arguments
+from find_duplicates.benchmarks.bench_startup import STARTUP_TARGET, HEAVY_MODULES, startup_time, import_times
 
 
 @pytest.fixture
@@ -252,6 +255,26 @@ def test_D2_duplicates_exist(monkeypatch, temp_dir, create_file):
     assert "dup2.txt" in content
 
 
+@pytest.mark.parametrize("output_format", ["jsonl", "sqlite"])
+def test_D3_machine_readable_formats(monkeypatch, temp_dir, create_file, output_format):
+    dup1 = create_file(temp_dir, "dup1.txt", "duplicate")
+    create_file(temp_dir, "dup2.txt", "duplicate")
+    output_file = os.path.join(temp_dir, f"out.{output_format}")
+    monkeypatch.setattr(sys, "argv", ["prog", "--directory", temp_dir, "--output", output_file,
+                                      "--format", output_format])
+    main()
+    if output_format == "jsonl":
+        with open(output_file, "r", encoding="utf-8") as f:
+            groups = [json.loads(line) for line in f]
+        files = groups[0]["files"]
+    else:
+        with sqlite3.connect(output_file) as connection:
+            files = [dict(zip(("path", "size", "inode"), row))
+                     for row in connection.execute("SELECT path, size, inode FROM files")]
+    assert len(files) == 2
+    assert all(item["size"] == len("duplicate") for item in files)
+    assert os.stat(dup1).st_ino in {item["inode"] for item in files}
+
 # --------------------- E. Поиск потенциальных дубликатов ---------------------
 def test_E1_different_content(monkeypatch, temp_dir, create_file):
     create_file(temp_dir, "f1.txt", "Content A")
@@ -448,3 +471,19 @@ def test_H_special_characters(monkeypatch, temp_dir, create_file):
     assert "John's file.txt" in content
     assert "Annual report.pdf" in content
     assert "Пример_файл🙂.txt" in content
+
+
+# --------------------- I. Запуск ---------------------
+def test_I1_help_does_not_import_pipeline():
+    """
+    --help не загружает модули конвейера, colorama, multiprocessing и SQLite.
+    """
+    times = import_times()
+    assert [name for name in HEAVY_MODULES if name in times] == []
+
+
+def test_I2_help_startup_time():
+    """
+    Запуск --help укладывается в целевое время.
+    """
+    assert startup_time(repeat=3) < STARTUP_TARGET
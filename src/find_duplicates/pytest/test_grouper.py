@@ -220,3 +220,12 @@ def test_return_dict_and_keys(tmp_path):
     assert isinstance(grouped, dict)
     # Если только один файл, ожидаем пустой словарь
     assert grouped == {}
+
+
+def test_empty_files_grouped(tmp_path):
+    """
+    Пустые файлы образуют группу размера 0.
+    """
+    e1 = create_file(str(tmp_path), "e1.txt", "")
+    e2 = create_file(str(tmp_path), "e2.txt", "")
+    assert 0 in group_files_by_size([e1, e2])
@@ -2,7 +2,8 @@ import os
 import re
 import pytest
 import hashlib
-from find_duplicates.modules.hasher import compute_hash, compute_hash_parallel, get_partial_content
+from find_duplicates.modules.hasher import (compute_hash, compute_hash_parallel, get_partial_content, compute_fast_hash,
+                                            read_chunk_digests, merkle_root)
 
 try:
     import blake3
@@ -126,6 +127,83 @@ def test_custom_block_size(tmp_path):
     assert result == expected
 
 
+@pytest.mark.parametrize("hash_type", ["md5", "sha256", "blake3"])
+def test_mmap_path_matches_read(tmp_path, hash_type):
+    """
+    Хэш через mmap совпадает с хэшем при обычном чтении блоками.
+    """
+    file_path = tmp_path / "mmap.bin"
+    file_path.write_bytes(os.urandom(3 * 1024 * 1024 + 7))
+    read_hash = compute_hash(str(file_path), hash_type, chunk_size=1024 * 1024, mmap_threshold=None)
+    mmap_hash = compute_hash(str(file_path), hash_type, chunk_size=1024 * 1024, mmap_threshold=1)
+    assert read_hash == mmap_hash
+
+
+@pytest.mark.skipif(not BLAKE3_AVAILABLE, reason="BLAKE3 not installed")
+def test_parallel_blake3_large_files(tmp_path):
+    """
+    Файлы выше порога хэшируются многопоточным blake3 в основном процессе, остальные — в пуле.
+    """
+    import blake3
+    big = tmp_path / "big.bin"
+    small = tmp_path / "small.bin"
+    data = os.urandom(2 * 1024 * 1024)
+    big.write_bytes(data)
+    small.write_bytes(b"small")
+    results = compute_hash_parallel([str(big), str(small)], "blake3", num_workers=2,
+                                    parallel_threshold=1024 * 1024)
+    assert results[str(big)] == blake3.blake3(data).hexdigest()
+    assert results[str(small)] == blake3.blake3(b"small").hexdigest()
+
+
+def test_direct_io_hash(tmp_path):
+    """
+    Хэш при чтении с O_DIRECT совпадает с обычным, включая невыровненный хвост.
+    """
+    file_path = tmp_path / "direct.bin"
+    data = os.urandom(5 * 4096 + 123)
+    file_path.write_bytes(data)
+    assert compute_hash(str(file_path), "sha256", chunk_size=8192, direct_io=True) == hashlib.sha256(data).hexdigest()
+
+
+def test_sparse_hash(tmp_path):
+    """
+    Дыры разреженного файла хэшируются как нули, без отличия от обычной копии.
+    """
+    sparse = tmp_path / "sparse.img"
+    with open(sparse, "wb") as f:
+        f.truncate(6 * 1024 * 1024)
+        f.write(b"header")
+    data = sparse.read_bytes()
+    dense = tmp_path / "dense.img"
+    dense.write_bytes(data)
+    assert compute_hash(str(sparse), "md5", chunk_size=1024 * 1024) == hashlib.md5(data).hexdigest()
+    assert compute_fast_hash(str(sparse)) == compute_fast_hash(str(dense))
+
+
+def test_merkle_root_single_chunk(tmp_path):
+    """
+    Для файла из одного блока корень Меркла совпадает с хэшем содержимого.
+    """
+    file_path = tmp_path / "one.bin"
+    file_path.write_bytes(b"single block")
+    digests = read_chunk_digests(str(file_path), "md5", chunk_size=1024)
+    assert merkle_root(digests, "md5") == hashlib.md5(b"single block").hexdigest()
+
+
+def test_fast_hash(tmp_path):
+    """
+    Быстрый хэш одинаков для одинакового содержимого и различается для разного.
+    """
+    a, b, c = tmp_path / "a.bin", tmp_path / "b.bin", tmp_path / "c.bin"
+    a.write_bytes(b"same content")
+    b.write_bytes(b"same content")
+    c.write_bytes(b"diff content")
+    assert compute_fast_hash(str(a)) == compute_fast_hash(str(b))
+    assert compute_fast_hash(str(a)) != compute_fast_hash(str(c))
+    assert "Error: File not found" in compute_fast_hash(str(tmp_path / "missing.bin"))
+
+
 @pytest.mark.slow
 def test_large_file(tmp_path):
     """
@@ -1,7 +1,8 @@
 # Файл: pytest/test_output.py
 import os
 import pytest
-from find_duplicates.modules.output import write_duplicates_to_csv, print_tree_view, save_tree_to_txt
+from find_duplicates.modules.output import (write_duplicates_to_csv, print_tree_view, save_tree_to_txt, sort_groups,
+                                            write_duplicates, wasted_bytes)
 
 
 def test_write_duplicates_to_csv_valid(tmp_path):
@@ -112,6 +113,32 @@ def test_rewrite_csv(tmp_path):
     assert "OLD CONTENT" not in new_content
 
 
+def test_write_duplicates_from_iterator(tmp_path):
+    """
+    Итератор групп записывается в порядке поступления; пустой итератор даёт только заголовок.
+    """
+    output_file = tmp_path / "stream.csv"
+    groups = iter([
+        ("hashB", [{"path": "/b1", "size": 10}, {"path": "/b2", "size": 10}]),
+        ("hashA", [{"path": "/a1", "size": 20}, {"path": "/a2", "size": 20}]),
+    ])
+    assert write_duplicates_to_csv(groups, str(output_file), sort=False) is True
+    content = output_file.read_text(encoding="utf-8")
+    assert content.index("hashB") < content.index("hashA")
+
+    assert write_duplicates_to_csv(iter([]), str(output_file), sort=False) is True
+    assert output_file.read_text(encoding="utf-8").strip() == "Группа,Путь,Размер"
+
+
+@pytest.mark.parametrize("run_size", [1, 3, 100])
+def test_sort_groups_external(run_size):
+    """
+    Внешняя сортировка даёт тот же порядок, что и сортировка в памяти, при любом размере порции.
+    """
+    groups = [(f"h{i % 7}{i}", [{"path": f"/f{i}", "size": i}]) for i in range(20)]
+    assert list(sort_groups(iter(groups), run_size=run_size)) == sorted(groups, key=lambda group: group[0])
+
+
 def test_print_tree_view(capsys):
     """
     Проверка вывода tree-view в консоль через print_tree_view.
@@ -130,6 +157,30 @@ def test_print_tree_view(capsys):
     assert "/some/path2.txt" in captured
 
 
+def test_tree_format_to_stdout(capsys):
+    """
+    --format tree с выводом '-' печатает дерево без цветов, если вывод не терминал; --top ограничивает группы.
+    """
+    duplicates = {
+        "a": [{"path": "/a1", "size": 1}, {"path": "/a2", "size": 1}],
+        "b": [{"path": "/b1", "size": 50}, {"path": "/b2", "size": 50}],
+    }
+    assert write_duplicates(duplicates, "-", "tree", top=1) is True
+    captured = capsys.readouterr().out
+    assert "\x1b[" not in captured
+    assert "/b1" in captured and "/a1" not in captured
+
+
+@pytest.mark.parametrize("files, expected", [
+    ([], 0),
+    ([{"path": "/x", "size": 10}], 0),
+    ([{"path": "/x", "size": 10}] * 3, 20),
+    ([{"path": "/x", "size": None}] * 2, 0),
+])
+def test_wasted_bytes(files, expected):
+    assert wasted_bytes(files) == expected
+
+
 def test_save_tree_to_txt(tmp_path):
     """
     Сохранение tree-view в текстовый файл.
@@ -0,0 +1,116 @@
+import os
+import errno
+import pytest
+from unittest.mock import patch
+from find_duplicates.modules.reader import (get_buffer, iter_chunks, mapped_file, iter_view_chunks, views_equal,
+                                            sequential_access, open_file, is_direct, DIRECT_IO_ALIGNMENT,
+                                            SPARSE_SUPPORTED, is_sparse, iter_sparse_chunks, sparse_segments)
+
+
+def test_get_buffer_reused():
+    """
+    Буфер потока переиспользуется для одного и того же slot.
+    """
+    assert get_buffer(1024) is get_buffer(1024)
+    assert get_buffer(1024, slot=1) is not get_buffer(1024, slot=0)
+
+
+def test_iter_chunks(tmp_path):
+    """
+    Блоки readinto в сумме дают исходное содержимое файла.
+    """
+    data = os.urandom(10 * 1000 + 5)
+    path_ = tmp_path / "chunks.bin"
+    path_.write_bytes(data)
+    with open(path_, "rb") as f:
+        parts = [bytes(chunk) for chunk in iter_chunks(f, 1000)]
+    assert b"".join(parts) == data
+
+
+def test_mapped_file_chunks(tmp_path):
+    data = os.urandom(3000)
+    path_ = tmp_path / "mapped.bin"
+    path_.write_bytes(data)
+    with open(path_, "rb") as f, mapped_file(f) as view:
+        parts = [bytes(chunk) for chunk in iter_view_chunks(view, 1024)]
+    assert b"".join(parts) == data
+
+
+@pytest.mark.skipif(not hasattr(os, "posix_fadvise"), reason="posix_fadvise not supported")
+@pytest.mark.parametrize("drop_cache, expected_calls", [(True, 2), (False, 1)])
+def test_sequential_access_advice(tmp_path, drop_cache, expected_calls):
+    """
+    SEQUENTIAL передаётся до чтения, DONTNEED — после, если не отключено.
+    """
+    path_ = tmp_path / "advice.bin"
+    path_.write_bytes(b"data")
+    with patch("os.posix_fadvise") as fadvise_mock:
+        with open(path_, "rb") as f, sequential_access(f, drop_cache):
+            assert f.read() == b"data"
+    assert fadvise_mock.call_count == expected_calls
+    assert fadvise_mock.call_args_list[0].args[3] == os.POSIX_FADV_SEQUENTIAL
+
+
+@pytest.mark.skipif(not hasattr(os, "O_DIRECT"), reason="O_DIRECT not supported")
+def test_open_file_direct_io(tmp_path):
+    """
+    Чтение с O_DIRECT (или откат на обычное чтение) возвращает всё содержимое, включая невыровненный хвост.
+    """
+    data = os.urandom(3 * DIRECT_IO_ALIGNMENT + 17)
+    path_ = tmp_path / "direct.bin"
+    path_.write_bytes(data)
+    with open_file(str(path_), direct_io=True) as f:
+        parts = [bytes(chunk) for chunk in iter_chunks(f, 2 * DIRECT_IO_ALIGNMENT)]
+    assert b"".join(parts) == data
+
+
+@pytest.mark.skipif(not hasattr(os, "O_DIRECT"), reason="O_DIRECT not supported")
+def test_open_file_direct_io_fallback(tmp_path):
+    """
+    Если ФС отказывает в O_DIRECT, файл открывается обычным способом.
+    """
+    path_ = tmp_path / "fallback.bin"
+    path_.write_bytes(b"data")
+    with patch("os.open", side_effect=OSError(errno.EINVAL, "Invalid argument")):
+        with open_file(str(path_), direct_io=True) as f:
+            assert not is_direct(f)
+            assert f.read() == b"data"
+
+
+@pytest.mark.parametrize("a, b, expected", [
+    (b"abcdefghij", b"abcdefghij", True),
+    (b"abcdefghij", b"abcdefghiX", False),
+    (b"Xbcdefghij", b"abcdefghij", False),
+    (b"abc", b"abcd", False),
+    (b"", b"", True),
+])
+def test_views_equal(a, b, expected):
+    assert views_equal(a, b) is expected
+
+
+def test_sparse_segments_same_map():
+    """
+    При совпадающих картах дыр отрезки повторяют области данных.
+    """
+    regions = [(0, 10), (50, 60)]
+    assert sparse_segments(regions, regions, 60) == [(0, 10, True, True), (10, 50, False, False),
+                                                     (50, 60, True, True)]
+
+
+@pytest.mark.skipif(not SPARSE_SUPPORTED, reason="SEEK_DATA/SEEK_HOLE не поддерживаются")
+def test_iter_sparse_chunks_matches_read(tmp_path):
+    """
+    Логическое содержимое разреженного файла совпадает с обычным чтением.
+    """
+    path_ = tmp_path / "sparse.bin"
+    size = 8 * 1024 * 1024
+    with open(path_, "wb") as f:
+        f.truncate(size)
+        f.write(b"head")
+        f.seek(size - 4)
+        f.write(b"tail")
+    with open(path_, "rb") as f:
+        if not is_sparse(os.fstat(f.fileno())):
+            pytest.skip("Файловая система не создаёт разреженные файлы")
+        content = b"".join(bytes(chunk) for chunk in iter_sparse_chunks(f, size, 1024 * 1024))
+    assert content == path_.read_bytes()
@@ -1,6 +1,6 @@
 import os
 import pytest
-from find_duplicates.modules.scanner import scan_directory, is_excluded
+from find_duplicates.modules.scanner import scan_directory, is_excluded, collect_files, read_file_list
 
 @pytest.fixture
 def test_dir(tmp_path):
@@ -307,3 +307,37 @@ def test_is_excluded():
     assert is_excluded("temp.log", ["*.log"])
     assert not is_excluded("data.txt", ["*.log"])
     assert is_excluded("secret.txt", ["secret*"])
+
+
+@pytest.mark.parametrize("kwargs, expected", [
+    ({"min_size": 100}, ["big.iso", "big.txt", "huge.iso"]),
+    ({"max_size": 1000}, ["big.iso", "big.txt", "small.iso"]),
+    ({"include": ["*.iso"]}, ["big.iso", "huge.iso", "small.iso"]),
+    ({"include": ["*.iso"], "min_size": 100, "max_size": 1000}, ["big.iso"]),
+])
+def test_scan_directory_size_and_include_filters(tmp_path, kwargs, expected):
+    """
+    Фильтры по размеру и шаблонам имён применяются прямо в сканере, в том числе во вложенных директориях.
+    """
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    for name, size in [("small.iso", 10), ("big.iso", 1000), ("huge.iso", 5000), ("big.txt", 1000)]:
+        (sub / name).write_bytes(b"x" * size)
+    result = scan_directory(str(tmp_path), **kwargs)
+    assert sorted(os.path.basename(p) for p in result) == expected
+
+
+def test_collect_files_multiple_roots_and_list(tmp_path):
+    """
+    Файлы нескольких корней и списка собираются вместе, вложенный корень и повтор из списка не удваиваются.
+    """
+    for name in ("a/sub", "b", "c"):
+        (tmp_path / name).mkdir(parents=True)
+    for name in ("a/x", "a/sub/y", "b/z", "c/w"):
+        (tmp_path / name).write_text("data", encoding="utf-8")
+    file_list = tmp_path / "files.lst"
+    file_list.write_bytes(b"\0".join(os.fsencode(tmp_path / name) for name in ("c/w", "a/x", "c/w")))
+    roots = [str(tmp_path / "a"), str(tmp_path / "b"), str(tmp_path / "a" / "sub")]
+    files = collect_files(roots, files_from=read_file_list(str(file_list)))
+    assert sorted(os.path.relpath(p, tmp_path) for p in files) == sorted(
+        os.path.join(*name.split("/")) for name in ("a/x", "a/sub/y", "b/z", "c/w"))
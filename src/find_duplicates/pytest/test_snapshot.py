@@ -0,0 +1,33 @@
+import os
+import pytest
+from unittest.mock import patch
+from find_duplicates.modules.scanner import scan_directory
+from find_duplicates.modules.snapshot import ScanSnapshot, RACY_WINDOW_NS
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """
+    Дерево root/{keep.txt, skip.log, sub/data.bin} с mtime директорий в прошлом.
+    """
+    root = tmp_path / "root"
+    (root / "sub").mkdir(parents=True)
+    (root / "keep.txt").write_text("keep", encoding="utf-8")
+    (root / "skip.log").write_text("skip", encoding="utf-8")
+    (root / "sub" / "data.bin").write_bytes(b"x" * 100)
+    for dir_path in (root / "sub", root):
+        st = os.stat(dir_path)
+        os.utime(dir_path, ns=(st.st_atime_ns, st.st_mtime_ns - 2 * RACY_WINDOW_NS))
+    return root
+
+
+def test_snapshot_applies_filters_to_cached_entries(tree, tmp_path):
+    """
+    Фильтры сканера применяются и к элементам, взятым из снимка.
+    """
+    with ScanSnapshot(str(tmp_path / "snapshot.sqlite")) as snapshot:
+        scan_directory(str(tree), snapshot=snapshot)
+    with ScanSnapshot(str(tmp_path / "snapshot.sqlite")) as snapshot, \
+            patch("os.scandir", side_effect=AssertionError("scandir не должен вызываться")):
+        result = scan_directory(str(tree), snapshot=snapshot, exclude=["*.log"], min_size=10)
+    assert [os.path.basename(p) for p in result] == ["data.bin"]
@@ -0,0 +1,30 @@
+import pytest
+from find_duplicates.modules.stats import RunStats
+
+
+def make_group(size, count):
+    return [{"path": f"/f{i}", "size": size} for i in range(count)]
+
+
+@pytest.mark.parametrize("top_count", [1, 3, 10])
+def test_top_groups_match_full_sort(top_count):
+    """
+    Куча выдаёт те же крупнейшие группы, что и полная сортировка.
+    """
+    stats = RunStats(top_count=top_count)
+    sizes = [(37 * i) % 101 + 1 for i in range(50)]
+    for i, size in enumerate(sizes):
+        stats.add_group(f"h{i}", make_group(size, 2 + i % 3))
+    expected = sorted((size * (1 + i % 3) for i, size in enumerate(sizes)), reverse=True)[:top_count]
+    assert [wasted for wasted, _, _ in stats.top_groups()] == expected
+
+
+def test_summary_lines_contain_totals():
+    stats = RunStats()
+    stats.files_scanned = 10
+    stats.add_hashed(1024, 4)
+    stats.add_group("h", make_group(1024, 3))
+    text = "\n".join(stats.summary_lines())
+    assert "Просканировано файлов: 10" in text
+    assert "4.00KB" in text
+    assert "можно освободить: 2.00KB" in text
@@ -0,0 +1,53 @@
+import os
+import pytest
+from unittest.mock import patch
+from find_duplicates.modules import tuning
+from find_duplicates.modules.tuning import (load_profile, save_profile, probe_chunk_size, tune_chunk_sizes,
+                                            chunk_size_for, DEFAULT_CHUNK_SIZE)
+
+
+@pytest.fixture
+def profile_path(tmp_path):
+    return str(tmp_path / "profile" / "chunks.json")
+
+
+def test_profile_roundtrip(profile_path):
+    """
+    Профиль сохраняется и читается обратно, каталог создаётся при необходимости.
+    """
+    save_profile({"7": 65536}, profile_path)
+    assert load_profile(profile_path) == {"7": 65536}
+
+
+def test_load_missing_profile(profile_path):
+    assert load_profile(profile_path) == {}
+
+
+def test_probe_returns_candidate(tmp_path):
+    """
+    Замер возвращает один из проверяемых размеров блока.
+    """
+    path_ = tmp_path / "probe.bin"
+    path_.write_bytes(os.urandom(256 * 1024))
+    assert probe_chunk_size(str(path_), candidates=(4096, 65536), probe_bytes=128 * 1024) in (4096, 65536)
+
+
+def test_tune_probes_once_then_uses_profile(tmp_path, profile_path):
+    """
+    Первое обращение к устройству выполняет замер, повторное берёт результат из профиля.
+    """
+    a, b = tmp_path / "a.bin", tmp_path / "b.bin"
+    a.write_bytes(b"x" * 100)
+    b.write_bytes(b"y" * 100)
+    grouped = {100: [str(a), str(b)]}
+    dev = os.stat(a).st_dev
+    with patch.object(tuning, "MIN_PROBE_FILE_SIZE", 1), \
+            patch.object(tuning, "probe_chunk_size", return_value=262144) as probe_mock:
+        assert tune_chunk_sizes(grouped, profile_path=profile_path) == {dev: 262144}
+        assert tune_chunk_sizes(grouped, profile_path=profile_path) == {dev: 262144}
+    assert probe_mock.call_count == 1
+    assert chunk_size_for(str(a), {dev: 262144}) == 262144
+
+
+def test_chunk_size_for_default(tmp_path):
+    assert chunk_size_for(str(tmp_path / "missing.bin")) == DEFAULT_CHUNK_SIZE
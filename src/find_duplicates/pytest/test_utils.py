@@ -14,7 +14,8 @@ from find_duplicates.modules.utils import (
     check_file_readable,
     parse_arguments,
     handle_error,
-    human_readable_size
+    human_readable_size,
+    parse_size
 )
 
 
@@ -171,6 +172,54 @@ def test_parse_arguments_valid(monkeypatch):
     assert args.output == "results.csv"
     assert args.log_level == "DEBUG"
     assert args.skip_inaccessible is True
+    assert args.keep_page_cache is False
+
+@pytest.mark.parametrize("value, expected", [
+    ("4096", 4096),
+    ("64K", 64 * 1024),
+    ("4MiB", 4 * 1024 * 1024),
+    ("1G", 1024 ** 3),
+])
+def test_parse_size(value, expected):
+    assert parse_size(value) == expected
+
+
+def test_parse_arguments_requires_roots(monkeypatch):
+    """
+    Без --directory и --files-from разбор аргументов завершается ошибкой.
+    """
+    monkeypatch.setattr(sys, "argv", ["prog", "--output", "out.csv"])
+    with pytest.raises(SystemExit):
+        parse_arguments()
+
+
+def test_parse_arguments_chunk_size_auto(monkeypatch):
+    """
+    --chunk-size принимает 'auto' или размер с суффиксом.
+    """
+    monkeypatch.setattr(sys, "argv", ["prog", "--directory", "/tmp", "--chunk-size", "auto", "--partial-size", "1M"])
+    args = parse_arguments()
+    assert args.chunk_size == "auto"
+    assert args.partial_size == 1024 * 1024
+
+
+def test_parse_arguments_min_size(monkeypatch):
+    """
+    --min-size по умолчанию 0 и принимает суффиксы размера.
+    """
+    monkeypatch.setattr(sys, "argv", ["prog", "--directory", "/tmp", "--min-size", "1"])
+    assert parse_arguments().min_size == 1
+
+
+@pytest.mark.parametrize("output_format, expected", [("jsonl", "duplicates.jsonl"), ("sqlite", "duplicates.sqlite"),
+                                                      ("tree", "-")])
+def test_parse_arguments_default_output(monkeypatch, output_format, expected):
+    """
+    Имя выходного файла по умолчанию зависит от --format.
+    """
+    monkeypatch.setattr(sys, "argv", ["prog", "--directory", "/tmp", "--format", output_format])
+    assert parse_arguments().output == expected
+
 
 def test_parse_arguments_missing_required(monkeypatch):
     """
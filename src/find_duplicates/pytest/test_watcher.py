@@ -0,0 +1,52 @@
+import os
+import sys
+import threading
+import pytest
+from find_duplicates.modules.watcher import DuplicateTracker, watch, IN_CLOSE_WRITE
+
+
+def test_tracker_size_change_moves_file_between_groups(tmp_path):
+    """
+    При изменении размера файл переходит в другую группу, и пересчитываются обе.
+    """
+    (tmp_path / "a.txt").write_text("aaaa", encoding="utf-8")
+    (tmp_path / "b.txt").write_text("aaaa", encoding="utf-8")
+    tracker = DuplicateTracker(str(tmp_path), find_options={"hash_type": "md5"})
+    tracker.rescan()
+    tracker.refresh()
+    assert len(tracker.duplicates) == 1
+
+    (tmp_path / "b.txt").write_text("aaaaaa", encoding="utf-8")
+    tracker.handle_event(IN_CLOSE_WRITE, str(tmp_path / "b.txt"))
+    assert tracker.dirty == {4, 6}
+    tracker.refresh()
+    assert tracker.duplicates == {}
+    tracker.cache.close()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify доступен только в Linux")
+def test_watch_reports_new_duplicate(tmp_path):
+    """
+    Режим наблюдения находит дубликат, появившийся после начального сканирования.
+    """
+    (tmp_path / "a.txt").write_text("same", encoding="utf-8")
+    tracker = DuplicateTracker(str(tmp_path), find_options={"hash_type": "md5"})
+    stop_event = threading.Event()
+    updates = []
+
+    def on_update(duplicates):
+        updates.append(duplicates)
+        if len(updates) == 1:
+            (tmp_path / "b.txt").write_text("same", encoding="utf-8")
+        else:
+            stop_event.set()
+
+    thread = threading.Thread(target=watch, args=(tracker, on_update), kwargs={"interval": 0.1,
+                                                                               "stop_event": stop_event})
+    thread.start()
+    thread.join(timeout=10)
+    stop_event.set()
+    tracker.cache.close()
+    assert updates[0] == {}
+    assert [sorted(os.path.basename(item["path"]) for item in group) for group in updates[-1].values()] == \
+        [["a.txt", "b.txt"]]
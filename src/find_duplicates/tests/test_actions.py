@@ -0,0 +1,256 @@
+# Файл: tests/test_actions.py
+import os
+import shutil
+import tempfile
+import unittest
+import subprocess
+from unittest.mock import patch
+from parameterized import parameterized
+from find_duplicates.modules import actions
+from find_duplicates.modules.actions import (Deduplicator, choose_keeper, move_destination, dedupe_ranges,
+                                             DEDUPE_RANGE, DEDUPE_RANGE_INFO, FILE_DEDUPE_RANGE_SAME,
+                                             FILE_DEDUPE_RANGE_DIFFERS)
+from find_duplicates.modules.utils import get_file_info
+from find_duplicates.modules.comparer import iter_duplicates
+
+
+class TestChooseKeeper(unittest.TestCase):
+    def setUp(self):
+        self.files = [
+            {"path": "/data/long/path/b.txt", "size": 1, "mtime_ns": 100},
+            {"path": "/data/a.txt", "size": 1, "mtime_ns": 300},
+            {"path": "/backup/c.txt", "size": 1, "mtime_ns": 200},
+        ]
+
+    @parameterized.expand([
+        ("oldest", [], "/data/long/path/b.txt"),
+        ("newest", [], "/data/a.txt"),
+        ("shortest", [], "/data/a.txt"),
+        ("oldest", ["/backup"], "/backup/c.txt"),
+        ("newest", ["/nowhere", "/data/long"], "/data/long/path/b.txt"),
+    ])
+    def test_policy(self, keep, priority, expected):
+        keeper, others = choose_keeper(self.files, keep, priority)
+        self.assertEqual(keeper["path"], expected)
+        self.assertEqual(len(others), 2)
+
+
+class TestDeduplicator(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.group = [get_file_info(self.create(name, b"duplicate" * 100)) for name in ("a.bin", "b.bin", "c.bin")]
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def create(self, name, content):
+        path = os.path.join(self.temp_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+
+    def run_action(self, action, **options):
+        deduplicator = Deduplicator(action, keep="shortest", batch_size=2, **options)
+        groups = list(deduplicator.process([("h", self.group)]))
+        self.assertEqual(groups, [("h", self.group)])
+        return deduplicator.summary
+
+    def test_hardlink(self):
+        summary = self.run_action("hardlink")
+        inodes = {os.stat(info["path"]).st_ino for info in self.group}
+        self.assertEqual(len(inodes), 1)
+        self.assertEqual((summary.files, summary.reclaimed, summary.errors), (2, 1800, 0))
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ["a.bin", "b.bin", "c.bin"])
+
+    def test_hardlink_twice_skips_linked(self):
+        self.run_action("hardlink")
+        self.group = [get_file_info(info["path"]) for info in self.group]
+        summary = self.run_action("hardlink")
+        self.assertEqual((summary.files, summary.skipped), (0, 2))
+
+    def test_delete(self):
+        summary = self.run_action("delete")
+        self.assertEqual(os.listdir(self.temp_dir), ["a.bin"])
+        self.assertEqual(summary.reclaimed, 1800)
+
+    def test_move(self):
+        target = os.path.join(self.temp_dir, "moved")
+        self.run_action("move", move_to=target)
+        moved = move_destination(self.group[1]["path"], target)
+        self.assertTrue(os.path.isfile(moved))
+        self.assertFalse(os.path.exists(self.group[1]["path"]))
+        self.assertTrue(os.path.exists(self.group[0]["path"]))
+
+    def test_dry_run_changes_nothing(self):
+        summary = self.run_action("delete", dry_run=True)
+        self.assertTrue(all(os.path.exists(info["path"]) for info in self.group))
+        self.assertEqual((summary.files, summary.reclaimed), (2, 1800))
+
+    def test_changed_file_is_skipped(self):
+        with open(self.group[2]["path"], "ab") as f:
+            f.write(b"!")
+        summary = self.run_action("delete")
+        self.assertTrue(os.path.exists(self.group[2]["path"]))
+        self.assertFalse(os.path.exists(self.group[1]["path"]))
+        self.assertEqual((summary.files, summary.skipped), (1, 1))
+
+    def test_reflink_failure_keeps_file(self):
+        """
+        Если ФС не поддерживает reflink, файл остаётся нетронутым, временный файл удаляется.
+        """
+        summary = self.run_action("reflink")
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ["a.bin", "b.bin", "c.bin"])
+        self.assertEqual(summary.files + summary.errors, 2)
+        for info in self.group:
+            with open(info["path"], "rb") as f:
+                self.assertEqual(f.read(), b"duplicate" * 100)
+
+    def test_move_requires_destination(self):
+        with self.assertRaises(ValueError):
+            Deduplicator("move")
+
+    @parameterized.expand([
+        ("large", 100000, "find_duplicates.modules.comparer.compute_hash"),
+        ("small", 1000, "find_duplicates.modules.hasher.new_hash"),
+    ])
+    def test_hash_collision_acts_within_identical_files(self, _, size, target):
+        """
+        При коллизии хэша файлы с разным содержимым не объединяются в одну группу действия.
+        """
+        paths = {name: self.create(os.path.join("collision", name), content * size)
+                 for name, content in (("a1", b"A"), ("a2", b"A"), ("b1", b"B"), ("b2", b"B"))}
+
+        class CollidingHash:
+            def update(self, data):
+                pass
+
+            def hexdigest(self):
+                return "collision"
+
+        fake = (lambda *args, **kwargs: "collision") if target.endswith("compute_hash") else \
+            (lambda *args, **kwargs: CollidingHash())
+        deduplicator = Deduplicator("delete", keep="shortest")
+        with patch(target, side_effect=fake):
+            groups = list(deduplicator.process(iter_duplicates({size: sorted(paths.values())}, "md5")))
+        self.assertEqual([file_hash for file_hash, _ in groups], ["collision", "collision"])
+        self.assertEqual(deduplicator.summary.files, 2)
+        for content in (b"A", b"B"):
+            kept = [path for name, path in paths.items()
+                    if name.startswith(content.decode().lower()) and os.path.exists(path)]
+            self.assertEqual(len(kept), 1)
+            with open(kept[0], "rb") as f:
+                self.assertEqual(f.read(), content * size)
+
+
+def fake_dedupe_ioctl(calls, differs_fd=None):
+    """
+    Имитирует FIDEDUPERANGE: объединяет весь диапазон, кроме получателя differs_fd.
+    """
+    def ioctl(src_fd, request, buffer):
+        offset, length, count, _, _ = DEDUPE_RANGE.unpack_from(buffer, 0)
+        calls.append((offset, length, count))
+        for i in range(count):
+            position = DEDUPE_RANGE.size + i * DEDUPE_RANGE_INFO.size
+            dest_fd, dest_offset, _, _, _ = DEDUPE_RANGE_INFO.unpack_from(buffer, position)
+            status = FILE_DEDUPE_RANGE_DIFFERS if dest_fd == differs_fd else FILE_DEDUPE_RANGE_SAME
+            DEDUPE_RANGE_INFO.pack_into(buffer, position, dest_fd, dest_offset,
+                                        0 if status else length, status, 0)
+        return 0
+    return ioctl
+
+
+class TestDedupeRanges(unittest.TestCase):
+    def test_batches_ranges_and_destinations(self):
+        calls = []
+        with patch.object(actions.fcntl, "ioctl", side_effect=fake_dedupe_ioctl(calls, differs_fd=12)):
+            results = dedupe_ranges(3, [10, 11, 12], 25, chunk=10, max_dests=2)
+        self.assertEqual(results[0], [25, None])
+        self.assertEqual(results[1], [25, None])
+        self.assertEqual(results[2][0], 0)
+        self.assertIn("отличается", results[2][1])
+        # Первый диапазон: два запроса (2 + 1 получатель), далее отличающийся файл исключён
+        self.assertEqual(calls, [(0, 10, 2), (0, 10, 1), (10, 10, 2), (20, 5, 2)])
+
+    def test_negative_status_is_error(self):
+        def ioctl(src_fd, request, buffer):
+            DEDUPE_RANGE_INFO.pack_into(buffer, DEDUPE_RANGE.size, 5, 0, 0, -22, 0)
+        with patch.object(actions.fcntl, "ioctl", side_effect=ioctl):
+            self.assertEqual(dedupe_ranges(3, [5], 100), [[0, os.strerror(22)]])
+
+
+class TestDedupeAction(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.group = []
+        for name in ("a.bin", "b.bin"):
+            path = os.path.join(self.temp_dir, name)
+            with open(path, "wb") as f:
+                f.write(os.urandom(1) * 8192)
+            self.group.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_dedupe_reports_per_file(self):
+        group = [get_file_info(path) for path in self.group]
+        with patch.object(actions.fcntl, "ioctl", side_effect=fake_dedupe_ioctl([])):
+            deduplicator = Deduplicator("dedupe")
+            list(deduplicator.process([("h", group)]))
+        self.assertEqual((deduplicator.summary.files, deduplicator.summary.reclaimed), (1, 8192))
+
+    def test_dedupe_unsupported_filesystem(self):
+        """
+        На ФС без поддержки FIDEDUPERANGE файлы не меняются, а ошибка учитывается в итогах.
+        """
+        group = [get_file_info(path) for path in self.group]
+        error = OSError(95, "Operation not supported")
+        with patch.object(actions.fcntl, "ioctl", side_effect=error):
+            deduplicator = Deduplicator("dedupe")
+            list(deduplicator.process([("h", group)]))
+        self.assertEqual((deduplicator.summary.files, deduplicator.summary.errors), (0, 1))
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ["a.bin", "b.bin"])
+
+
+@unittest.skipUnless(os.geteuid() == 0 and shutil.which("mkfs.btrfs"), "нужны root и mkfs.btrfs")
+class TestDedupeLoopback(unittest.TestCase):
+    """
+    FIDEDUPERANGE на настоящей btrfs в образе, смонтированном через loop-устройство.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.image = os.path.join(self.temp_dir, "btrfs.img")
+        self.mount_point = os.path.join(self.temp_dir, "mnt")
+        os.mkdir(self.mount_point)
+        with open(self.image, "wb") as f:
+            f.truncate(256 * 1024 * 1024)
+        subprocess.run(["mkfs.btrfs", "-q", self.image], check=True)
+        result = subprocess.run(["mount", "-o", "loop", self.image, self.mount_point])
+        if result.returncode != 0:
+            shutil.rmtree(self.temp_dir)
+            self.skipTest("не удалось смонтировать образ")
+
+    def tearDown(self):
+        subprocess.run(["umount", self.mount_point])
+        shutil.rmtree(self.temp_dir)
+
+    def test_dedupe_on_btrfs(self):
+        data = os.urandom(1024 * 1024) * 3
+        paths = []
+        for name in ("a.bin", "b.bin", "c.bin"):
+            path = os.path.join(self.mount_point, name)
+            with open(path, "wb") as f:
+                f.write(data)
+                os.fsync(f.fileno())
+            paths.append(path)
+        deduplicator = Deduplicator("dedupe")
+        list(deduplicator.process([("h", [get_file_info(path) for path in paths])]))
+        self.assertEqual((deduplicator.summary.files, deduplicator.summary.errors), (2, 0))
+        self.assertEqual(deduplicator.summary.reclaimed, 2 * len(data))
+        for path in paths:
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), data)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+# Файл: tests/test_api.py
+import os
+import unittest
+import tempfile
+import shutil
+from unittest.mock import patch
+from parameterized import parameterized
+import find_duplicates
+from find_duplicates.modules.api import Finder, find
+from find_duplicates.modules.cache import HashCache
+from find_duplicates.modules.stats import RunStats
+
+
+class TestFinder(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.sub_dir = os.path.join(self.test_dir, "sub")
+        os.mkdir(self.sub_dir)
+        self.write("a.txt", b"same content")
+        self.write("b.txt", b"same content")
+        self.write("c.txt", b"other content")
+        self.write(os.path.join("sub", "big1.bin"), b"x" * 100000)
+        self.write(os.path.join("sub", "big2.bin"), b"x" * 100000)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, name, data):
+        path = os.path.join(self.test_dir, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def paths(self, groups):
+        return sorted(sorted(os.path.basename(info["path"]) for info in files) for _, files in groups)
+
+    def test_package_exports(self):
+        self.assertIs(find_duplicates.find, find)
+        self.assertIs(find_duplicates.Finder, Finder)
+
+    def test_find_streams_groups(self):
+        groups = find(self.test_dir)
+        self.assertFalse(isinstance(groups, (list, dict)))
+        self.assertEqual(self.paths(groups), [["a.txt", "b.txt"], ["big1.bin", "big2.bin"]])
+
+    def test_overlapping_roots_counted_once(self):
+        groups = list(find([self.test_dir, self.sub_dir]))
+        self.assertEqual(self.paths(groups), [["a.txt", "b.txt"], ["big1.bin", "big2.bin"]])
+
+    @parameterized.expand([
+        ("min_size", {"min_size": 1000}, [["big1.bin", "big2.bin"]]),
+        ("include", {"include": ["*.txt"]}, [["a.txt", "b.txt"]]),
+        ("exclude", {"exclude": ["sub"]}, [["a.txt", "b.txt"]]),
+        ("no_verify", {"verify": False, "hash_type": "sha256"}, [["a.txt", "b.txt"], ["big1.bin", "big2.bin"]]),
+    ])
+    def test_options(self, _, options, expected):
+        self.assertEqual(self.paths(find(self.test_dir, **options)), expected)
+
+    def test_stages(self):
+        stats = RunStats()
+        with Finder(stats=stats) as finder:
+            files = finder.scan(self.test_dir)
+            grouped = finder.group(files)
+            groups = list(finder.duplicates(grouped))
+        self.assertEqual(len(files), 5)
+        self.assertEqual(sorted(grouped), [12, 100000])
+        self.assertEqual(len(groups), 2)
+        self.assertEqual(stats.files_scanned, 5)
+        self.assertEqual(stats.duplicate_groups, 2)
+
+    def test_cache_reused_between_calls(self):
+        with Finder(small_file_threshold=0) as finder:
+            self.assertEqual(len(list(finder.find(self.test_dir))), 2)
+            with patch("find_duplicates.modules.comparer.compute_hash") as compute_hash:
+                self.assertEqual(len(list(finder.find(self.test_dir))), 2)
+            compute_hash.assert_not_called()
+
+    def test_executor_reused_and_closed(self):
+        finder = Finder()
+        list(finder.find(self.test_dir))
+        executor = finder.executor
+        list(finder.find(self.test_dir))
+        self.assertIs(finder.executor, executor)
+        finder.close()
+        self.assertIsNone(finder._executor)
+
+    def test_external_cache_not_closed(self):
+        cache_path = os.path.join(self.test_dir, "hashes.db")
+        cache = HashCache(cache_path)
+        try:
+            with Finder(cache=cache) as finder:
+                list(finder.find(self.sub_dir))
+            cache.commit()  # кэш остаётся открытым
+        finally:
+            cache.close()
+
+    def test_unknown_option(self):
+        with self.assertRaises(TypeError):
+            find(self.test_dir, unknown=True)
+
+    def test_unknown_hash_type(self):
+        with self.assertRaises(ValueError):
+            Finder(hash_type="crc")
+
+    def test_missing_directory(self):
+        with self.assertRaises(NotADirectoryError):
+            list(find(os.path.join(self.test_dir, "missing")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+# Файл: tests/test_cache.py
+import os
+import unittest
+import tempfile
+import shutil
+from find_duplicates.modules.cache import HashCache, open_cache
+
+
+class TestHashCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = HashCache(os.path.join(self.temp_dir, "cache", "hashes.sqlite"))
+        self.file = os.path.join(self.temp_dir, "data.bin")
+        with open(self.file, "wb") as f:
+            f.write(b"content")
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_put_and_get(self):
+        self.cache.put(self.file, "blake3", "abc", [b"1234", b"5678"])
+        entry = self.cache.get(self.file, "blake3")
+        self.assertEqual(entry.digest, "abc")
+        self.assertEqual(entry.chunks, [b"1234", b"5678"])
+        self.assertIsNone(self.cache.get(self.file, "md5"))
+
+    def test_modified_file_invalidates_entry(self):
+        self.cache.put(self.file, "blake3", "abc")
+        st = os.stat(self.file)
+        os.utime(self.file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        self.assertIsNone(self.cache.get(self.file, "blake3"))
+
+    def test_persisted_between_instances(self):
+        self.cache.put(self.file, "blake3", "abc")
+        self.cache.close()
+        self.cache = HashCache(self.cache.path)
+        self.assertEqual(self.cache.get(self.file, "blake3").digest, "abc")
+
+    def test_open_cache_corrupted(self):
+        path_ = os.path.join(self.temp_dir, "broken.sqlite")
+        with open(path_, "wb") as f:
+            f.write(b"not a database" * 100)
+        self.assertIsNone(open_cache(path_))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+# Файл: tests/test_checkpoint.py
+import os
+import unittest
+import tempfile
+import shutil
+from find_duplicates.modules.checkpoint import Checkpoint
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "run.checkpoint")
+        self.run_key = {"directory": "/data", "hash_type": "blake3"}
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_stages_survive_reopen(self):
+        with Checkpoint(self.path, self.run_key) as checkpoint:
+            checkpoint.reset()
+            self.assertIsNone(checkpoint.load_files())
+            checkpoint.save_files(["/data/a", "/data/b", "/data/c"])
+            checkpoint.save_groups({10: ["/data/a", "/data/b"], 20: ["/data/c", "/data/d"]})
+            checkpoint.record_group(10, [("h1", [{"path": "/data/a", "size": 10}, {"path": "/data/b", "size": 10}])])
+
+        with Checkpoint(self.path, self.run_key) as checkpoint:
+            self.assertTrue(checkpoint.resume())
+            self.assertEqual(checkpoint.load_files(), ["/data/a", "/data/b", "/data/c"])
+            self.assertEqual(checkpoint.load_groups(), {10: ["/data/a", "/data/b"], 20: ["/data/c", "/data/d"]})
+            self.assertEqual(list(checkpoint.completed()), [10])
+
+    def test_other_parameters_reset(self):
+        with Checkpoint(self.path, self.run_key) as checkpoint:
+            checkpoint.reset()
+            checkpoint.save_files(["/data/a"])
+        with Checkpoint(self.path, dict(self.run_key, hash_type="md5")) as checkpoint:
+            self.assertFalse(checkpoint.resume())
+            self.assertIsNone(checkpoint.load_files())
+
+    def test_remove(self):
+        checkpoint = Checkpoint(self.path, self.run_key)
+        checkpoint.reset()
+        checkpoint.remove()
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,7 +3,14 @@ import os
 import unittest
 import tempfile
 import shutil
-from find_duplicates.modules.comparer import compare_files, find_potential_duplicates
+import hashlib
+from unittest.mock import patch
+from find_duplicates.modules.comparer import (compare_files, find_potential_duplicates, group_small_files,
+                                              group_by_chunk_digests, iter_duplicates)
+from find_duplicates.modules.cache import HashCache
+from find_duplicates.modules.hasher import read_small_files_batch, iter_small_files
+from find_duplicates.modules.actions import verify_unchanged, FileChanged
+from concurrent.futures import ThreadPoolExecutor
 from find_duplicates.modules.grouper import group_files_by_size
 
 
@@ -59,6 +66,50 @@ class TestCompareFiles(unittest.TestCase):
         big2 = create_file(self.temp_dir, "big2.txt", data)
         self.assertTrue(compare_files(big1, big2))
 
+    def test_mmap_compare(self):
+        data = os.urandom(2 * 1024 * 1024 + 3)
+        paths = []
+        for name, tail in (("m1.bin", b"x"), ("m2.bin", b"x"), ("m3.bin", b"y")):
+            path_ = os.path.join(self.temp_dir, name)
+            with open(path_, "wb") as f:
+                f.write(data + tail)
+            paths.append(path_)
+        self.assertTrue(compare_files(paths[0], paths[1], chunk_size=1024 * 1024, mmap_threshold=1))
+        self.assertFalse(compare_files(paths[0], paths[2], chunk_size=1024 * 1024, mmap_threshold=1))
+
+    def test_direct_io_compare(self):
+        data = os.urandom(3 * 4096 + 11)
+        paths = []
+        for name, tail in (("d1.bin", b"x"), ("d2.bin", b"x"), ("d3.bin", b"y")):
+            path_ = os.path.join(self.temp_dir, name)
+            with open(path_, "wb") as f:
+                f.write(data + tail)
+            paths.append(path_)
+        self.assertTrue(compare_files(paths[0], paths[1], chunk_size=8192, direct_io=True))
+        self.assertFalse(compare_files(paths[0], paths[2], chunk_size=8192, direct_io=True))
+
+    def test_sparse_compare(self):
+        size = 6 * 1024 * 1024
+
+        def make(name, payload, offset):
+            path_ = os.path.join(self.temp_dir, name)
+            with open(path_, "wb") as f:
+                f.truncate(size)
+                f.seek(offset)
+                f.write(payload)
+            return path_
+
+        sparse1 = make("s1.img", b"payload", 3 * 1024 * 1024)
+        sparse2 = make("s2.img", b"payload", 3 * 1024 * 1024)
+        other = make("s3.img", b"payload", 4 * 1024 * 1024)
+        dense = os.path.join(self.temp_dir, "dense.img")
+        with open(sparse1, "rb") as src, open(dense, "wb") as dst:
+            dst.write(src.read())
+        self.assertTrue(compare_files(sparse1, sparse2, chunk_size=1024 * 1024))
+        self.assertTrue(compare_files(sparse1, dense, chunk_size=1024 * 1024))
+        self.assertFalse(compare_files(sparse1, other, chunk_size=1024 * 1024))
+        self.assertFalse(compare_files(dense, other, chunk_size=1024 * 1024))
+
     def test_nonexistent_file(self):
         f1 = create_file(self.temp_dir, "exists.txt", "abc")
         missing = os.path.join(self.temp_dir, "missing.txt")
@@ -177,6 +228,74 @@ class TestFindPotentialDuplicates(unittest.TestCase):
         paths = {item["path"] for item in items}
         self.assertEqual(paths, {f1, f2})
 
+    def test_prehash_duplicates(self):
+        dup1 = self.create_small_file("p1.txt", "Duplicate")
+        dup2 = self.create_small_file("p2.txt", "Duplicate")
+        other = self.create_small_file("p3.txt", "Different")
+        grouped = group_files_by_size([dup1, dup2, other])
+        with_prehash = find_potential_duplicates(grouped, "md5", prehash=True)
+        self.assertEqual(with_prehash, find_potential_duplicates(grouped, "md5"))
+        paths = {item["path"] for items in with_prehash.values() for item in items}
+        self.assertEqual(paths, {dup1, dup2})
+
+    def test_partial_content_filter(self):
+        dup1 = self.create_small_file("q1.txt", "HEAD-same-TAIL")
+        dup2 = self.create_small_file("q2.txt", "HEAD-same-TAIL")
+        other = self.create_small_file("q3.txt", "HEAD-diff-TAIX")
+        grouped = group_files_by_size([dup1, dup2, other])
+        dups = find_potential_duplicates(grouped, "md5", partial_size=4, chunk_size=4)
+        paths = {item["path"] for items in dups.values() for item in items}
+        self.assertEqual(paths, {dup1, dup2})
+
+    def test_small_files_single_read(self):
+        dup1 = self.create_small_file("s1.txt", "Small dup")
+        dup2 = self.create_small_file("s2.txt", "Small dup")
+        other = self.create_small_file("s3.txt", "Small oth")
+        grouped = group_files_by_size([dup1, dup2, other])
+        fast = find_potential_duplicates(grouped, "md5")
+        slow = find_potential_duplicates(grouped, "md5", small_file_threshold=0)
+        self.assertEqual(fast, slow)
+        direct = group_small_files([dup1, dup2, other, os.path.join(self.temp_dir, "missing.txt")], "md5")
+        self.assertEqual(direct, fast)
+
+    def test_empty_files_not_opened(self):
+        empties = [self.create_small_file(f"empty{i}.txt", "") for i in range(3)]
+        grouped = group_files_by_size(empties)
+        with patch("find_duplicates.modules.comparer.iter_small_files") as small_mock, \
+                patch("find_duplicates.modules.comparer.compute_hash") as hash_mock:
+            dups = find_potential_duplicates(grouped, "md5")
+        small_mock.assert_not_called()
+        hash_mock.assert_not_called()
+        self.assertEqual(list(dups.keys()), [hashlib.md5(b"").hexdigest()])
+        self.assertEqual({item["path"] for item in dups[hashlib.md5(b"").hexdigest()]}, set(empties))
+        for item in dups[hashlib.md5(b"").hexdigest()]:
+            self.assertEqual(item["size"], 0)
+            self.assertEqual(item["mtime_ns"], os.stat(item["path"]).st_mtime_ns)
+
+    def test_merkle_stops_at_first_differing_chunk(self):
+        data = os.urandom(64 * 1024)
+        same1 = os.path.join(self.temp_dir, "same1.bin")
+        same2 = os.path.join(self.temp_dir, "same2.bin")
+        early = os.path.join(self.temp_dir, "early.bin")
+        for path_, content in ((same1, data), (same2, data), (early, bytes([data[0] ^ 1]) + data[1:])):
+            with open(path_, "wb") as f:
+                f.write(content)
+        cache = HashCache(os.path.join(self.temp_dir, "hashes.sqlite"))
+        try:
+            groups = group_by_chunk_digests([same1, same2, early], len(data), "sha256", chunk_size=4096, cache=cache)
+            self.assertEqual([sorted(group) for group in groups.values()], [sorted([same1, same2])])
+            key = "merkle:sha256:4096"
+            self.assertEqual(len(cache.get(early, key).chunks), 1)
+            self.assertIsNone(cache.get(early, key).digest)
+            self.assertEqual(cache.get(same1, key).digest, list(groups)[0])
+
+            with patch("find_duplicates.modules.comparer.read_chunk_digests") as read_mock:
+                again = group_by_chunk_digests([same1, same2], len(data), "sha256", chunk_size=4096, cache=cache)
+            read_mock.assert_not_called()
+            self.assertEqual(list(again), list(groups))
+        finally:
+            cache.close()
+
     def test_duplicates_stability(self):
         f1 = self.create_small_file("a.txt", "DupData")
         f2 = self.create_small_file("b.txt", "DupData")
@@ -185,5 +304,101 @@ class TestFindPotentialDuplicates(unittest.TestCase):
         d2 = find_potential_duplicates(grouped, "md5")
         self.assertEqual(d1, d2)
 
+    def test_iter_duplicates_yields_groups_lazily(self):
+        """
+        iter_duplicates отдаёт группу до обработки следующего размера и вызывает on_group_done по каждому размеру.
+        """
+        a1 = self.create_small_file("a1.txt", "AAAA")
+        a2 = self.create_small_file("a2.txt", "AAAA")
+        b1 = self.create_small_file("b1.txt", "BBBBBBBB")
+        b2 = self.create_small_file("b2.txt", "BBBBBBBB")
+        done = []
+        groups = iter_duplicates({4: [a1, a2], 8: [b1, b2]}, "md5",
+                                 on_group_done=lambda size, group: done.append(size))
+        file_hash, files = next(groups)
+        self.assertEqual(sorted(item["path"] for item in files), [a1, a2])
+        self.assertEqual(done, [])
+        rest = list(groups)
+        self.assertEqual(len(rest), 1)
+        self.assertEqual(done, [4, 8])
+        expected = find_potential_duplicates({4: [a1, a2], 8: [b1, b2]}, "md5")
+        self.assertEqual(dict([(file_hash, files)] + rest), expected)
+
+    def test_small_files_batched_across_groups(self):
+        """
+        Небольшие файлы разных групп читаются общими пакетами одного пула.
+        """
+        grouped = {}
+        for size in (3, 4, 5):
+            grouped[size] = [self.create_small_file(f"s{size}_{i}.txt", "S" * size) for i in range(2)]
+        with patch("find_duplicates.modules.hasher.read_small_files_batch",
+                   wraps=read_small_files_batch) as batch_mock, \
+                patch("find_duplicates.modules.hasher.ThreadPoolExecutor", wraps=ThreadPoolExecutor) as pool_mock:
+            groups = list(iter_duplicates(grouped, "md5"))
+        self.assertEqual(len(groups), 3)
+        self.assertEqual(pool_mock.call_count, 1)
+        self.assertEqual(batch_mock.call_count, 1)
+        self.assertEqual(len(batch_mock.call_args.args[0]), 6)
+
+    def test_pages_dropped_after_group(self):
+        """
+        Внутри группы файлы читаются без освобождения страниц, а после группы освобождаются
+        только те, что не были в кэше до поиска.
+        """
+        paths = [self.create_small_file(f"p{i}.bin", "P" * 100000) for i in range(3)]
+        with patch("find_duplicates.modules.comparer.compare_files", wraps=compare_files) as compare_mock, \
+                patch("find_duplicates.modules.comparer.is_page_cached", side_effect=lambda path: path == paths[0]), \
+                patch("find_duplicates.modules.comparer.drop_page_cache") as drop_mock:
+            groups = list(iter_duplicates({100000: paths}, "md5"))
+        self.assertEqual(len(groups[0][1]), 3)
+        self.assertTrue(all(not call.kwargs["drop_cache"] for call in compare_mock.call_args_list))
+        self.assertEqual(sorted(call.args[0] for call in drop_mock.call_args_list), sorted(paths[1:]))
+
+    def test_pages_kept_with_keep_page_cache(self):
+        paths = [self.create_small_file(f"k{i}.bin", "K" * 100000) for i in range(2)]
+        with patch("find_duplicates.modules.comparer.drop_page_cache") as drop_mock:
+            list(iter_duplicates({100000: paths}, "md5", drop_cache=False))
+        drop_mock.assert_not_called()
+
+    def test_file_info_taken_before_read(self):
+        """
+        Размер и mtime в записи группы сняты до чтения: изменение файла во время сравнения
+        обнаруживается проверкой перед действием.
+        """
+        big = [self.create_small_file(f"v{i}.bin", "V" * 100000) for i in range(2)]
+        small = [self.create_small_file(f"w{i}.txt", "W" * 10) for i in range(2)]
+
+        def touch(path_):
+            st = os.stat(path_)
+            os.utime(path_, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+        def compare_and_touch(file1, file2, **kwargs):
+            result = compare_files(file1, file2, **kwargs)
+            touch(file2)
+            return result
+
+        def read_and_touch(filepaths, hash_type='blake3', **kwargs):
+            for result in iter_small_files(filepaths, hash_type, **kwargs):
+                touch(result[0])
+                yield result
+
+        with patch("find_duplicates.modules.comparer.compare_files", side_effect=compare_and_touch), \
+                patch("find_duplicates.modules.comparer.iter_small_files", side_effect=read_and_touch):
+            groups = dict(iter_duplicates({100000: big, 10: small}, "md5", drop_cache=False))
+        records = {item["path"]: item for files in groups.values() for item in files}
+        self.assertEqual(sorted(records), sorted(big + small))
+        verify_unchanged(records[big[0]])
+        for path_ in [big[1]] + small:
+            with self.assertRaises(FileChanged):
+                verify_unchanged(records[path_])
+    def test_hash_errors_not_grouped(self):
+        """
+        Файлы, хэш которых не удалось вычислить, не образуют группу даже без побайтовой проверки.
+        """
+        paths = [self.create_small_file(f"e{i}.bin", "E" * 100000) for i in range(2)]
+        with patch("find_duplicates.modules.comparer.compute_hash", return_value="Error: Permission denied"):
+            self.assertEqual(list(iter_duplicates({100000: paths}, "md5", verify=False)), [])
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
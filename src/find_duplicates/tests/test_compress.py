@@ -0,0 +1,66 @@
+# Файл: tests/test_compress.py
+import os
+import csv
+import gzip
+import lzma
+import unittest
+import tempfile
+import shutil
+from unittest.mock import patch
+from parameterized import parameterized
+from find_duplicates.modules import compress
+from find_duplicates.modules.compress import resolve_compression, open_output
+from find_duplicates.modules.output import write_duplicates_to_csv
+
+
+class TestResolveCompression(unittest.TestCase):
+    @parameterized.expand([
+        ("out.csv", "auto", None),
+        ("out.csv.gz", "auto", "gzip"),
+        ("out.jsonl.XZ", "auto", "xz"),
+        ("out.csv.gz", "none", None),
+        ("out.csv", "xz", "xz"),
+    ])
+    def test_resolve(self, output_file, option, expected):
+        self.assertEqual(resolve_compression(output_file, option), expected)
+
+    def test_unknown_algorithm(self):
+        with self.assertRaises(ValueError):
+            resolve_compression("out.csv", "bzip2")
+
+    def test_zstd_without_package(self):
+        with patch.object(compress, "ZSTD_AVAILABLE", False):
+            with self.assertRaises(ValueError):
+                resolve_compression("out.csv.zst")
+
+
+class TestCompressedOutput(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.duplicates = {f"hash{i:04d}": [{"path": f"/data/{i}/a.txt", "size": i},
+                                           {"path": f"/data/{i}/b.txt", "size": i}] for i in range(2000)}
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    @parameterized.expand([("gz", gzip.open), ("xz", lzma.open)])
+    def test_csv_roundtrip(self, extension, opener):
+        output_file = os.path.join(self.temp_dir, f"out.csv.{extension}")
+        self.assertTrue(write_duplicates_to_csv(self.duplicates, output_file))
+        with opener(output_file, "rt", encoding="utf-8", newline="") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ["Группа", "Путь", "Размер"])
+        self.assertEqual(len(rows), 1 + 2 * len(self.duplicates))
+        self.assertEqual(rows[-1][1], "/data/1999/b.txt")
+
+    def test_background_error_is_raised(self):
+        output_file = os.path.join(self.temp_dir, "out.gz")
+        with patch.object(compress, "new_compressor") as compressor_mock:
+            compressor_mock.return_value.compress.side_effect = RuntimeError("сбой")
+            with self.assertRaises(OSError):
+                with open_output(output_file, "gzip") as f:
+                    f.write("данные")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,11 +2,16 @@ import os
 import sys
 import shutil
 import tempfile
+import subprocess
+import threading
 import unittest
 from unittest.mock import patch
+from parameterized import parameterized
 
 from find_duplicates.find_duplicates import main
 from find_duplicates.modules.utils import parse_arguments
+from find_duplicates.benchmarks.bench_startup import (SCRIPT, STARTUP_TARGET, HEAVY_MODULES, startup_time,
+                                                      import_times)
 
 
 class TestFindDuplicatesIntegration(unittest.TestCase):
@@ -69,13 +74,63 @@ class TestFindDuplicatesIntegration(unittest.TestCase):
         self.assertTrue(os.path.exists(self.output_csv))
         os.chmod(inac, 0o644)
 
+    def test_A6_resume_after_interrupt(self):
+        data_dir = os.path.join(self.test_dir, "data")
+        os.mkdir(data_dir)
+        for name, content in (("a1", "a" * 100), ("a2", "a" * 100), ("b1", "b" * 200), ("b2", "b" * 200)):
+            with open(os.path.join(data_dir, name), "w", encoding="utf-8") as f:
+                f.write(content)
+        checkpoint_file = os.path.join(self.test_dir, "run.checkpoint")
+        test_args = ["prog", "--directory", data_dir, "--output", self.output_csv, "--small-file-threshold", "0",
+                     "--hash-type", "md5", "--checkpoint-file", checkpoint_file]
+
+        from modules.checkpoint import Checkpoint
+        record_group = Checkpoint.record_group
+
+        def interrupt_after_first_group(checkpoint, size, group_duplicates):
+            record_group(checkpoint, size, group_duplicates)
+            raise KeyboardInterrupt
+
+        with patch.object(sys, "argv", test_args + ["--checkpoint"]), \
+                patch.object(Checkpoint, "record_group", interrupt_after_first_group):
+            with self.assertRaises(KeyboardInterrupt):
+                main()
+        self.assertTrue(os.path.exists(checkpoint_file))
+
+        from modules import comparer
+        with patch.object(sys, "argv", test_args + ["--resume"]), \
+                patch("modules.scanner.scan_directory", side_effect=AssertionError("повторное сканирование")), \
+                patch.object(comparer, "compute_hash", wraps=comparer.compute_hash) as hash_mock:
+            main()
+        self.assertEqual(hash_mock.call_count, 2)
+        self.assertFalse(os.path.exists(checkpoint_file))
+        with open(self.output_csv, encoding="utf-8") as f:
+            self.assertEqual(len(f.read().strip().splitlines()), 5)
+
+    def test_A7_action_hardlink(self):
+        data_dir = os.path.join(self.test_dir, "data")
+        os.mkdir(data_dir)
+        for name in ("one.txt", "two.txt"):
+            with open(os.path.join(data_dir, name), "w", encoding="utf-8") as f:
+                f.write("same content")
+        test_args = ["prog", "--directory", data_dir, "--output", self.output_csv, "--action", "hardlink"]
+        with patch.object(sys, "argv", test_args + ["--dry-run"]):
+            main()
+        self.assertEqual(os.stat(os.path.join(data_dir, "two.txt")).st_nlink, 1)
+        with patch.object(sys, "argv", test_args):
+            main()
+        self.assertEqual(os.stat(os.path.join(data_dir, "two.txt")).st_nlink, 2)
+        with open(self.output_csv, encoding="utf-8") as f:
+            self.assertIn("two.txt", f.read())
+
     # --------------------- B. Валидация директории ---------------------
     def test_B1_nonexistent_directory(self):
         non_exist = os.path.join(self.test_dir, "no_dir")
         output_file = os.path.join(self.test_dir, "out.csv")
         test_args = ["prog", "--directory", non_exist, "--output", output_file]
-        with patch.object(sys, "argv", test_args):
+        with patch.object(sys, "argv", test_args), self.assertRaises(SystemExit) as context:
             main()
+        self.assertEqual(context.exception.code, 1)
         # При ошибке проверки директории CSV не создаётся
         self.assertFalse(os.path.exists(output_file))
 
@@ -431,6 +486,108 @@ class TestFindDuplicatesIntegration(unittest.TestCase):
             content = f.read()
         self.assertTrue("Дубликаты не обнаружены" in content or content.strip() == "Группа,Путь,Размер")
 
+    def test_G6_multiple_roots_and_files_from(self):
+        # Дубликаты в разных корнях и в списке файлов находятся одним поиском; вложенный корень не удваивает файлы
+        for name in ("one", "two", "three"):
+            os.makedirs(os.path.join(self.test_dir, name, "nested"))
+        paths = [os.path.join(self.test_dir, *parts) for parts in
+                 (("one", "a.bin"), ("two", "b.bin"), ("one", "nested", "c.bin"), ("three", "d.bin"))]
+        for path in paths:
+            with open(path, "wb") as f:
+                f.write(b"cross-root")
+        files_list = os.path.join(self.test_dir, "files.lst")
+        with open(files_list, "wb") as f:
+            f.write(os.fsencode(paths[3]) + b"\0" + os.fsencode(paths[0]) + b"\0")
+
+        test_args = ["prog", "--directory", os.path.join(self.test_dir, "one"), os.path.join(self.test_dir, "two"),
+                     "--directory", os.path.join(self.test_dir, "one", "nested"), "--files-from", files_list,
+                     "--output", self.output_csv]
+        with patch.object(sys, "argv", test_args):
+            main()
+        with open(self.output_csv, "r", encoding="utf-8") as f:
+            rows = f.read().splitlines()[1:]
+        self.assertEqual(sorted(os.path.basename(row.split(",")[1]) for row in rows),
+                         ["a.bin", "b.bin", "c.bin", "d.bin"])
+
+    @unittest.skipUnless(hasattr(os, "mkfifo"), "FIFO недоступны на этой платформе")
+    def test_G7_files_from_fifo(self):
+        # Список файлов читается из FIFO (как при --files-from <(find ... -print0))
+        paths = [os.path.join(self.test_dir, name) for name in ("a.bin", "b.bin")]
+        for path in paths:
+            with open(path, "wb") as f:
+                f.write(b"from-fifo")
+        fifo = os.path.join(self.test_dir, "files.fifo")
+        os.mkfifo(fifo)
+
+        def write_list():
+            with open(fifo, "wb") as f:
+                f.write(b"\0".join(os.fsencode(path) for path in paths) + b"\0")
+
+        writer = threading.Thread(target=write_list)
+        writer.start()
+        empty_dir = os.path.join(self.test_dir, "empty")
+        os.mkdir(empty_dir)
+        test_args = ["prog", "--directory", empty_dir, "--files-from", fifo, "--output", self.output_csv]
+        try:
+            with patch.object(sys, "argv", test_args):
+                main()
+        finally:
+            writer.join(timeout=5)
+        with open(self.output_csv, "r", encoding="utf-8") as f:
+            rows = f.read().splitlines()[1:]
+        self.assertEqual(sorted(os.path.basename(row.split(",")[1]) for row in rows), ["a.bin", "b.bin"])
+
+    def test_G8_files_from_missing(self):
+        # Отсутствующий список файлов => ошибка и ненулевой код завершения
+        test_args = ["prog", "--directory", self.test_dir, "--files-from", os.path.join(self.test_dir, "missing.lst"),
+                     "--output", self.output_csv]
+        with patch.object(sys, "argv", test_args), self.assertRaises(SystemExit) as context:
+            main()
+        self.assertEqual(context.exception.code, 1)
+        self.assertFalse(os.path.exists(self.output_csv))
+
+    @parameterized.expand([
+        ("action", ["--action", "delete"]),
+        ("sort_output", ["--sort-output"]),
+        ("chunk_size_auto", ["--chunk-size", "auto"]),
+        ("files_from", ["--files-from", "-"]),
+    ])
+    def test_G9_watch_rejects_unsupported_options(self, _, options):
+        # Параметры, которые режим наблюдения не поддерживает, отклоняются до запуска наблюдения
+        test_args = ["prog", "--directory", self.test_dir, "--watch", "--output", self.output_csv] + options
+        with patch.object(sys, "argv", test_args), \
+                patch("find_duplicates.find_duplicates.run_watch") as watch_mock, \
+                self.assertRaises(SystemExit) as context:
+            main()
+        self.assertEqual(context.exception.code, 1)
+        watch_mock.assert_not_called()
+
+    def test_G11_watch_error_exits_nonzero(self):
+        # Ошибка записи или пересчёта в режиме наблюдения завершает его с ненулевым кодом без трассировки
+        test_args = ["prog", "--directory", self.test_dir, "--watch", "--output", self.output_csv]
+        with patch.object(sys, "argv", test_args), \
+                patch("modules.watcher.watch", side_effect=ValueError("ошибка записи")), \
+                self.assertLogs(level="ERROR") as logs, \
+                self.assertRaises(SystemExit) as context:
+            main()
+        self.assertEqual(context.exception.code, 1)
+        self.assertIn("ошибка записи", "\n".join(logs.output))
+
+    def test_G10_tree_to_closed_pipe(self):
+        # Вывод дерева в закрытый канал (`| head`) завершается без трассировки BrokenPipeError
+        for i in range(200):
+            with open(os.path.join(self.test_dir, f"dup{i}.txt"), "w", encoding="utf-8") as f:
+                f.write(f"content {i // 2}")
+        process = subprocess.Popen([sys.executable, SCRIPT, "--directory", self.test_dir, "--format", "tree",
+                                    "--output", "-", "--log-level", "ERROR"],
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        process.stdout.close()
+        stderr = process.stderr.read().decode()
+        process.stderr.close()
+        self.assertEqual(process.wait(timeout=30), 1)
+        self.assertNotIn("Traceback", stderr)
+        self.assertNotIn("BrokenPipeError", stderr)
+
     # --------------------- H. Спецсимволы ---------------------
     def test_H_special_characters(self):
         # Четыре файла (двойные кавычки, одинарная, пробелы, юникод) => если нет дубликатов,
@@ -462,5 +619,14 @@ class TestFindDuplicatesIntegration(unittest.TestCase):
         self.assertIn("Пример_файл🙂.txt", content)
 
 
+class TestStartup(unittest.TestCase):
+    def test_help_does_not_import_pipeline(self):
+        loaded = [name for name in HEAVY_MODULES if name in import_times()]
+        self.assertEqual(loaded, [])
+
+    def test_help_startup_time(self):
+        self.assertLess(startup_time(repeat=3), STARTUP_TARGET)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -48,6 +48,14 @@ class TestGrouper(unittest.TestCase):
         grouped = group_files_by_size([f1, f2])
         self.assertEqual(grouped, {})
 
+    def test_empty_files_grouped(self):
+        """
+        Пустые файлы образуют группу размера 0 (отсеиваются только сканером при --min-size 1).
+        """
+        e1 = create_file(self.temp_dir, "e1.txt", "")
+        e2 = create_file(self.temp_dir, "e2.txt", "")
+        self.assertEqual(group_files_by_size([e1, e2]), {0: [e1, e2]})
+
     def test_empty_input(self):
         """
         Передача пустого списка возвращает пустой словарь.
@@ -4,7 +4,8 @@ import tempfile
 import shutil
 import hashlib
 from parameterized import parameterized
-from find_duplicates.modules.hasher import compute_hash, compute_hash_parallel, get_partial_content
+from find_duplicates.modules.hasher import (compute_hash, compute_hash_parallel, get_partial_content, compute_fast_hash,
+                                            iter_small_files, read_chunk_digests, merkle_root)
 
 try:
     import blake3
@@ -159,6 +160,81 @@ class TestHasherAdditional(unittest.TestCase):
         expected = hashlib.sha256(data).hexdigest()
         self.assertEqual(result, expected)
 
+    def test_mmap_path_matches_read(self):
+        """
+        Хэш через mmap совпадает с хэшем при обычном чтении блоками.
+        """
+        file_path = os.path.join(self.test_dir, "mmap.bin")
+        data = os.urandom(3 * 1024 * 1024 + 7)
+        with open(file_path, "wb") as f:
+            f.write(data)
+        for hash_type in ("md5", "sha256", "blake3"):
+            read_hash = compute_hash(file_path, hash_type, chunk_size=1024 * 1024, mmap_threshold=None)
+            mmap_hash = compute_hash(file_path, hash_type, chunk_size=1024 * 1024, mmap_threshold=1)
+            self.assertEqual(read_hash, mmap_hash)
+        self.assertEqual(compute_hash(file_path, "sha256", mmap_threshold=1), hashlib.sha256(data).hexdigest())
+
+    @unittest.skipUnless(BLAKE3_AVAILABLE, "BLAKE3 not installed")
+    def test_parallel_blake3_large_files(self):
+        """
+        Многопоточный blake3 для файлов выше порога даёт тот же хэш, что и однопоточный.
+        """
+        big = os.path.join(self.test_dir, "big.bin")
+        small = os.path.join(self.test_dir, "small.bin")
+        data = os.urandom(2 * 1024 * 1024)
+        with open(big, "wb") as f:
+            f.write(data)
+        with open(small, "wb") as f:
+            f.write(b"small")
+        expected = blake3.blake3(data).hexdigest()
+        self.assertEqual(compute_hash(big, "blake3", parallel_threshold=1024 * 1024), expected)
+        results = compute_hash_parallel([big, small], "blake3", num_workers=2, parallel_threshold=1024 * 1024)
+        self.assertEqual(results[big], expected)
+        self.assertEqual(results[small], blake3.blake3(b"small").hexdigest())
+
+    def test_direct_io_hash(self):
+        """
+        Хэш при чтении с O_DIRECT совпадает с обычным.
+        """
+        file_path = os.path.join(self.test_dir, "direct.bin")
+        data = os.urandom(5 * 4096 + 123)
+        with open(file_path, "wb") as f:
+            f.write(data)
+        result = compute_hash(file_path, "sha256", chunk_size=8192, direct_io=True)
+        self.assertEqual(result, hashlib.sha256(data).hexdigest())
+
+    def test_fast_hash(self):
+        """
+        Быстрый хэш одинаков для одинакового содержимого и различается для разного.
+        """
+        paths = []
+        for name, content in (("fa.bin", b"same content"), ("fb.bin", b"same content"), ("fc.bin", b"other content")):
+            path_ = os.path.join(self.test_dir, name)
+            with open(path_, "wb") as f:
+                f.write(content)
+            paths.append(path_)
+        self.assertEqual(compute_fast_hash(paths[0]), compute_fast_hash(paths[1]))
+        self.assertNotEqual(compute_fast_hash(paths[0]), compute_fast_hash(paths[2]))
+        self.assertIn("Error: File not found", compute_fast_hash(os.path.join(self.test_dir, "missing.bin")))
+
+    def test_iter_small_files_batches(self):
+        """
+        Пакетное чтение небольших файлов сохраняет порядок и сообщает об ошибках.
+        """
+        paths = []
+        for i in range(7):
+            path_ = os.path.join(self.test_dir, f"small{i}.txt")
+            with open(path_, "wb") as f:
+                f.write(f"data{i}".encode())
+            paths.append(path_)
+        paths.append(os.path.join(self.test_dir, "missing.txt"))
+        results = list(iter_small_files(paths, "md5", batch_size=3, num_workers=2))
+        self.assertEqual([r[0] for r in results], paths)
+        self.assertEqual(results[0][1], hashlib.md5(b"data0").hexdigest())
+        self.assertEqual(results[0][2], b"data0")
+        self.assertIsNone(results[-1][2])
+        self.assertIn("Error: File not found", results[-1][1])
+
     def test_special_filename(self):
         """
         Тест с именем файла, содержащим спецсимволы и unicode.
@@ -171,6 +247,36 @@ class TestHasherAdditional(unittest.TestCase):
         result = compute_hash(file_path, "md5")
         self.assertEqual(result, expected)
 
+    def test_sparse_hash(self):
+        """
+        Хэш разреженного файла совпадает с хэшем того же содержимого, записанного целиком.
+        """
+        sparse = os.path.join(self.test_dir, "sparse.img")
+        with open(sparse, "wb") as f:
+            f.truncate(6 * 1024 * 1024)
+            f.seek(3 * 1024 * 1024)
+            f.write(b"payload")
+        with open(sparse, "rb") as f:
+            data = f.read()
+        self.assertEqual(compute_hash(sparse, "sha256", chunk_size=1024 * 1024), hashlib.sha256(data).hexdigest())
+
+    def test_chunk_digests(self):
+        """
+        Дайджесты блоков можно дочитывать по частям; корень Меркла зависит от содержимого.
+        """
+        file_path = os.path.join(self.test_dir, "chunks.bin")
+        data = os.urandom(10 * 1024 + 7)
+        with open(file_path, "wb") as f:
+            f.write(data)
+        full = read_chunk_digests(file_path, "sha256", chunk_size=1024)
+        self.assertEqual(len(full), 11)
+        self.assertEqual(full[0], hashlib.sha256(data[:1024]).digest())
+        head = read_chunk_digests(file_path, "sha256", chunk_size=1024, count=3)
+        tail = read_chunk_digests(file_path, "sha256", chunk_size=1024, start=3)
+        self.assertEqual(head + tail, full)
+        self.assertEqual(merkle_root(full, "sha256"), merkle_root(head + tail, "sha256"))
+        self.assertNotEqual(merkle_root(full, "sha256"), merkle_root(full[:-1], "sha256"))
+
     def test_nonascii_directory(self):
         """
         Файл в директории с non-ASCII именем.
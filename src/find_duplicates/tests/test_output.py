@@ -2,8 +2,13 @@
 import os
 import unittest
 import tempfile
+import json
 import shutil
-from find_duplicates.modules.output import write_duplicates_to_csv, print_tree_view, save_tree_to_txt
+import sqlite3
+from find_duplicates.modules import output
+from find_duplicates.modules.output import (write_duplicates_to_csv, print_tree_view, save_tree_to_txt, sort_groups,
+                                            write_duplicates_to_jsonl, write_duplicates_to_sqlite, write_duplicates,
+                                            top_groups, render_tree)
 from io import StringIO
 from unittest.mock import patch
 
@@ -116,6 +121,99 @@ class TestOutputCSV(unittest.TestCase):
             new_content = f.read()
             self.assertNotIn("OLD CONTENT", new_content)
 
+    def test_write_duplicates_from_iterator_streaming(self):
+        """
+        Группы из итератора записываются по мере поступления, без сортировки.
+        """
+        output_file = os.path.join(self.temp_dir, "stream.csv")
+
+        def groups():
+            yield "hashB", [{"path": "/b1", "size": 10}, {"path": "/b2", "size": 10}]
+            # Первая группа уже должна быть в файле, пока поиск продолжается
+            with open(output_file, "r", encoding="utf-8") as f:
+                self.assertIn("/b2", f.read())
+            yield "hashA", [{"path": "/a1", "size": 20}, {"path": "/a2", "size": 20}]
+
+        result = write_duplicates_to_csv(groups(), output_file, sort=False, flush_interval=0)
+        self.assertTrue(result)
+        with open(output_file, "r", encoding="utf-8") as f:
+            content = f.read()
+        self.assertLess(content.index("hashB"), content.index("hashA"))
+
+    def test_write_duplicates_from_iterator_sorted(self):
+        """
+        С сортировкой группы из итератора упорядочиваются по хэшу через временные файлы.
+        """
+        output_file = os.path.join(self.temp_dir, "sorted.csv")
+        hashes = ["h7", "h2", "h9", "h1", "h5", "h3", "h8"]
+        groups = ((h, [{"path": f"/{h}/1", "size": 1}, {"path": f"/{h}/2", "size": 1}]) for h in hashes)
+        self.assertTrue(write_duplicates_to_csv(groups, output_file, sort=True, run_size=2))
+        with open(output_file, "r", encoding="utf-8") as f:
+            group_ids = [line.split(",")[0] for line in f.read().splitlines()[1:] if not line.startswith(",")]
+        self.assertEqual(group_ids, sorted(hashes))
+
+    def test_sort_groups_keeps_files(self):
+        groups = [("b", [{"path": "/x", "size": None}]), ("a", [{"path": "/y", "size": 5}])]
+        self.assertEqual(list(sort_groups(iter(groups), run_size=1)),
+                         [("a", [{"path": "/y", "size": 5}]), ("b", [{"path": "/x", "size": None}])])
+
+
+class TestOutputSinks(unittest.TestCase):
+    """
+    Машиночитаемые форматы вывода: JSON Lines и SQLite.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.files = []
+        for name in ("a.bin", "b.bin"):
+            path = os.path.join(self.temp_dir, name)
+            with open(path, "wb") as f:
+                f.write(b"x" * 5000)
+            self.files.append(path)
+        self.duplicates = {"hash1": [{"path": path, "size": 5000} for path in self.files]}
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_jsonl_exact_sizes_and_metadata(self):
+        output_file = os.path.join(self.temp_dir, "out.jsonl")
+        self.assertTrue(write_duplicates_to_jsonl(self.duplicates, output_file))
+        with open(output_file, "r", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["hash"], "hash1")
+        self.assertEqual(records[0]["size"], 5000)
+        first = records[0]["files"][0]
+        st = os.stat(self.files[0])
+        self.assertEqual((first["path"], first["size"], first["inode"], first["mtime_ns"]),
+                         (self.files[0], 5000, st.st_ino, st.st_mtime_ns))
+
+    def test_jsonl_missing_file_metadata(self):
+        output_file = os.path.join(self.temp_dir, "out.jsonl")
+        write_duplicates_to_jsonl({"h": [{"path": "/нет/такого", "size": 1}]}, output_file)
+        with open(output_file, "r", encoding="utf-8") as f:
+            record = json.loads(f.readline())
+        self.assertIsNone(record["files"][0]["inode"])
+
+    def test_sqlite_tables(self):
+        output_file = os.path.join(self.temp_dir, "out.sqlite")
+        with open(output_file, "w") as f:
+            f.write("старое содержимое")
+        self.assertTrue(write_duplicates_to_sqlite(iter(self.duplicates.items()), output_file))
+        with sqlite3.connect(output_file) as connection:
+            groups = connection.execute("SELECT id, hash, size, file_count, wasted FROM groups").fetchall()
+            self.assertEqual(groups, [(1, "hash1", 5000, 2, 5000)])
+            paths = [row[0] for row in connection.execute("SELECT path FROM files WHERE group_id = 1 ORDER BY path")]
+            self.assertEqual(paths, sorted(self.files))
+            indexes = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+            self.assertTrue({"files_group", "files_path", "groups_hash"} <= indexes)
+
+    def test_write_duplicates_dispatch(self):
+        output_file = os.path.join(self.temp_dir, "out.csv")
+        self.assertTrue(write_duplicates(self.duplicates, output_file, "csv"))
+        with self.assertRaises(ValueError):
+            write_duplicates(self.duplicates, output_file, "xml")
 
 class TestOutputTree(unittest.TestCase):
     def test_print_tree_view(self):
@@ -148,6 +246,39 @@ class TestOutputTree(unittest.TestCase):
                 self.assertIn("Группа 1:", content)
                 self.assertIn("файл.txt", content)
 
+    def test_print_tree_view_no_color_when_not_tty(self):
+        duplicates = {"h": [{"path": "/a", "size": 2048}, {"path": "/b", "size": 2048}]}
+        stream = StringIO()
+        print_tree_view(duplicates, stream)
+        self.assertNotIn("\x1b[", stream.getvalue())
+        self.assertIn("  └── /b (2.00KB)", stream.getvalue())
+        colored = StringIO()
+        print_tree_view(duplicates, colored, color=True)
+        self.assertIn("\x1b[", colored.getvalue())
+
+    def test_render_tree_large_chunks(self):
+        groups = [(f"h{i}", [{"path": f"/{i}/a", "size": 1}, {"path": f"/{i}/b", "size": 1}]) for i in range(100)]
+        with patch.object(output, "TREE_BUFFER_SIZE", 500):
+            chunks = list(render_tree(groups))
+        self.assertLess(len(chunks), 20)
+        self.assertTrue(all(len(chunk) >= 500 for chunk in chunks[:-1]))
+        self.assertEqual("".join(chunks).count("Группа "), 100)
+
+    def test_top_groups_by_wasted_bytes(self):
+        duplicates = {
+            "small": [{"path": "/s1", "size": 10}, {"path": "/s2", "size": 10}, {"path": "/s3", "size": 10}],
+            "big": [{"path": "/b1", "size": 1000}, {"path": "/b2", "size": 1000}],
+            "mid": [{"path": f"/m{i}", "size": 100} for i in range(5)],
+        }
+        self.assertEqual([group_id for group_id, _ in top_groups(duplicates, 2)], ["big", "mid"])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            out_file = os.path.join(tmp_dir, "top.txt")
+            write_duplicates(iter(duplicates.items()), out_file, "tree", top=1)
+            with open(out_file, "r", encoding="utf-8") as f:
+                content = f.read()
+        self.assertIn("/b1", content)
+        self.assertNotIn("/m1", content)
+
     def test_save_tree_no_permission(self):
         with tempfile.TemporaryDirectory() as tmp_dir:
             locked_dir = os.path.join(tmp_dir, "locked")
@@ -0,0 +1,114 @@
+# Файл: tests/test_reader.py
+import os
+import errno
+import unittest
+import tempfile
+import shutil
+from unittest.mock import patch
+from find_duplicates.modules.reader import (get_buffer, iter_chunks, mapped_file, iter_view_chunks, views_equal,
+                                            sequential_access, open_file, is_direct, get_aligned_buffer,
+                                            DIRECT_IO_ALIGNMENT, SPARSE_SUPPORTED, is_sparse, data_regions,
+                                            iter_sparse_chunks, sparse_segments, is_zero)
+
+
+class TestReader(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def create_file(self, name, data):
+        path_ = os.path.join(self.temp_dir, name)
+        with open(path_, "wb") as f:
+            f.write(data)
+        return path_
+
+    def test_get_buffer_reused(self):
+        buf1 = get_buffer(1024)
+        buf2 = get_buffer(1024)
+        self.assertIs(buf1, buf2)
+        self.assertIsNot(get_buffer(1024, slot=1), buf1)
+        self.assertEqual(len(get_buffer(2048)), 2048)
+
+    def test_iter_chunks(self):
+        data = os.urandom(10 * 1000 + 5)
+        path_ = self.create_file("chunks.bin", data)
+        with open(path_, "rb") as f:
+            parts = [bytes(chunk) for chunk in iter_chunks(f, 1000)]
+        self.assertEqual(b"".join(parts), data)
+        self.assertEqual(len(parts[-1]), 5)
+
+    def test_mapped_file_chunks(self):
+        data = os.urandom(3000)
+        path_ = self.create_file("mapped.bin", data)
+        with open(path_, "rb") as f, mapped_file(f) as view:
+            parts = [bytes(chunk) for chunk in iter_view_chunks(view, 1024)]
+        self.assertEqual(b"".join(parts), data)
+
+    @unittest.skipUnless(hasattr(os, "posix_fadvise"), "posix_fadvise not supported")
+    def test_sequential_access_advice(self):
+        path_ = self.create_file("advice.bin", b"data")
+        for drop_cache, expected in ((True, [os.POSIX_FADV_SEQUENTIAL, os.POSIX_FADV_DONTNEED]),
+                                     (False, [os.POSIX_FADV_SEQUENTIAL])):
+            with patch("os.posix_fadvise") as fadvise_mock:
+                with open(path_, "rb") as f, sequential_access(f, drop_cache):
+                    self.assertEqual(f.read(), b"data")
+                self.assertEqual([c.args[3] for c in fadvise_mock.call_args_list], expected)
+
+    @unittest.skipUnless(hasattr(os, "O_DIRECT"), "O_DIRECT not supported")
+    def test_open_file_direct_io(self):
+        data = os.urandom(3 * DIRECT_IO_ALIGNMENT + 17)
+        path_ = self.create_file("direct.bin", data)
+        with open_file(path_, direct_io=True) as f:
+            parts = [bytes(chunk) for chunk in iter_chunks(f, 2 * DIRECT_IO_ALIGNMENT)]
+        self.assertEqual(b"".join(parts), data)
+
+    @unittest.skipUnless(hasattr(os, "O_DIRECT"), "O_DIRECT not supported")
+    def test_open_file_direct_io_fallback(self):
+        path_ = self.create_file("fallback.bin", b"data")
+        with patch("os.open", side_effect=OSError(errno.EINVAL, "Invalid argument")):
+            with open_file(path_, direct_io=True) as f:
+                self.assertFalse(is_direct(f))
+                self.assertEqual(f.read(), b"data")
+
+    def test_aligned_buffer_size(self):
+        self.assertEqual(len(get_aligned_buffer(100)), DIRECT_IO_ALIGNMENT)
+        self.assertEqual(len(get_aligned_buffer(DIRECT_IO_ALIGNMENT + 1)) % DIRECT_IO_ALIGNMENT, 0)
+
+    def test_views_equal(self):
+        self.assertTrue(views_equal(b"abcdefghij", bytearray(b"abcdefghij")))
+        self.assertFalse(views_equal(b"abcdefghij", b"abcdefghiX"))
+        self.assertFalse(views_equal(b"Xbcdefghij", b"abcdefghij"))
+        self.assertFalse(views_equal(b"abc", b"abcd"))
+        self.assertTrue(views_equal(b"", b""))
+
+    def test_sparse_segments(self):
+        segments = sparse_segments([(0, 10), (50, 60)], [(0, 10), (40, 70)], 100)
+        self.assertEqual(segments, [(0, 10, True, True), (10, 40, False, False), (40, 50, False, True),
+                                    (50, 60, True, True), (60, 70, False, True), (70, 100, False, False)])
+
+    def test_is_zero(self):
+        self.assertTrue(is_zero(bytes(1001)))
+        self.assertFalse(is_zero(bytes(1000) + b"\x01"))
+
+    @unittest.skipIf(not SPARSE_SUPPORTED, "SEEK_DATA/SEEK_HOLE не поддерживаются")
+    def test_iter_sparse_chunks(self):
+        size = 8 * 1024 * 1024
+        path_ = os.path.join(self.temp_dir, "sparse.bin")
+        with open(path_, "wb") as f:
+            f.truncate(size)
+            f.seek(4 * 1024 * 1024)
+            f.write(b"data")
+        with open(path_, "rb") as f:
+            if not is_sparse(os.fstat(f.fileno())):
+                self.skipTest("Файловая система не создаёт разреженные файлы")
+            regions = data_regions(f, size)
+            self.assertTrue(all(start <= 4 * 1024 * 1024 < end for start, end in regions))
+            content = b"".join(bytes(chunk) for chunk in iter_sparse_chunks(f, size, 1024 * 1024))
+        with open(path_, "rb") as f:
+            self.assertEqual(content, f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
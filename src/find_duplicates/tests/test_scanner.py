@@ -1,9 +1,13 @@
 import os
+import io
+import sys
 import unittest
 import tempfile
 import shutil
+from unittest.mock import patch
 from parameterized import parameterized
-from find_duplicates.modules.scanner import scan_directory, is_excluded
+from find_duplicates.modules.scanner import (scan_directory, is_excluded, read_file_list, merge_roots,
+                                             scan_directories, collect_files)
 
 
 class TestScannerBase(unittest.TestCase):
@@ -143,6 +147,21 @@ class TestScannerBase(unittest.TestCase):
         result = scan_directory(self.test_dir, include_hidden=True)
         self.assertTrue(any("nested.txt" in path for path in result))
 
+    def test_size_and_include_filters(self):
+        """
+        Фильтры --min-size, --max-size и --include применяются при обходе.
+        """
+        sub = os.path.join(self.test_dir, "sub")
+        os.mkdir(sub)
+        for name, size in [("small.iso", 10), ("big.iso", 1000), ("huge.iso", 5000), ("big.txt", 1000)]:
+            with open(os.path.join(sub, name), "wb") as f:
+                f.write(b"x" * size)
+
+        names = lambda paths: sorted(os.path.basename(p) for p in paths)
+        self.assertEqual(names(scan_directory(sub, min_size=100)), ["big.iso", "big.txt", "huge.iso"])
+        self.assertEqual(names(scan_directory(sub, max_size=1000)), ["big.iso", "big.txt", "small.iso"])
+        self.assertEqual(names(scan_directory(sub, include=["*.iso"], min_size=100, max_size=1000)), ["big.iso"])
+
     @unittest.skipIf(not hasattr(os, "symlink"), "Симлинки не поддерживаются")
     def test_symlink_handling(self):
         """
@@ -160,5 +179,72 @@ class TestScannerBase(unittest.TestCase):
         self.assertNotIn("link.txt", [os.path.basename(p) for p in result])
 
 
+class TestMultipleRoots(unittest.TestCase):
+    """
+    Несколько корневых директорий и список файлов (--files-from).
+    """
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for name in ("a", os.path.join("a", "sub"), "b"):
+            os.mkdir(os.path.join(self.test_dir, name))
+        for name in ("a/x.txt", "a/sub/y.txt", "b/z.txt", "list.txt", ".hidden.txt"):
+            with open(self.path(name), "w", encoding="utf-8") as f:
+                f.write("data")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def path(self, name):
+        return os.path.join(self.test_dir, *name.split("/"))
+
+    def names(self, files):
+        return sorted(os.path.relpath(p, self.test_dir).replace(os.sep, "/") for p in files)
+
+    def test_read_file_list_nul_separated(self):
+        list_path = self.path("files.lst")
+        names = ["a b.txt", "line\nbreak.txt", "юникод.txt"]
+        with open(list_path, "wb") as f:
+            f.write(b"\0".join(os.fsencode(name) for name in names) + b"\0")
+        with patch("find_duplicates.modules.scanner.FILE_LIST_BLOCK_SIZE", 4):
+            self.assertEqual(list(read_file_list(list_path)), names)
+
+    def test_read_file_list_stdin(self):
+        stdin = io.TextIOWrapper(io.BytesIO(b"/one\0/two"))
+        with patch.object(sys, "stdin", stdin):
+            self.assertEqual(list(read_file_list("-")), ["/one", "/two"])
+
+    @parameterized.expand([
+        ("nested", ["a", "a/sub", "b"], ["a", "b"]),
+        ("nested_first", ["a/sub", "a"], ["a"]),
+        ("repeated", ["b", "b", "a"], ["b", "a"]),
+        ("prefix_not_nested", ["a", "a2"], ["a", "a2"]),
+    ])
+    def test_merge_roots(self, _, roots, expected):
+        os.makedirs(self.path("a2"), exist_ok=True)
+        self.assertEqual(merge_roots([self.path(root) for root in roots]), [self.path(root) for root in expected])
+
+    @unittest.skipUnless(hasattr(os, "symlink"), "symlinks not supported")
+    def test_merge_roots_symlink(self):
+        os.symlink(self.path("a"), self.path("alink"))
+        self.assertEqual(merge_roots([self.path("a"), self.path("alink/sub")]), [self.path("a")])
+
+    def test_scan_directories_concurrent_matches_sequential(self):
+        roots = [self.path("a"), self.path("b")]
+        self.assertEqual(scan_directories(roots, num_workers=4), scan_directories(roots, num_workers=1))
+        self.assertEqual(self.names(scan_directories(roots)), ["a/sub/y.txt", "a/x.txt", "b/z.txt"])
+
+    def test_collect_files_deduplicates(self):
+        listed = [self.path("list.txt"), self.path("list.txt"), self.path("a/x.txt"), self.path(".hidden.txt"),
+                  self.path("missing.txt"), self.path("b")]
+        files = collect_files([self.path("a"), self.path("a/sub")], files_from=iter(listed))
+        self.assertEqual(self.names(files), ["a/sub/y.txt", "a/x.txt", "list.txt"])
+
+    def test_collect_files_applies_filters(self):
+        files = collect_files([], files_from=[self.path("list.txt"), self.path("a/x.txt")],
+                              exclude=["list*"], include_hidden=True)
+        self.assertEqual(self.names(files), ["a/x.txt"])
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,80 @@
+# Файл: tests/test_snapshot.py
+import os
+import unittest
+import tempfile
+import shutil
+from unittest.mock import patch
+from find_duplicates.modules.scanner import scan_directory
+from find_duplicates.modules.snapshot import ScanSnapshot, RACY_WINDOW_NS
+
+
+def age_directory(path_):
+    """
+    Сдвигает mtime директории в прошлое, чтобы снимок считал её надёжной.
+    """
+    st = os.stat(path_)
+    os.utime(path_, ns=(st.st_atime_ns, st.st_mtime_ns - 2 * RACY_WINDOW_NS))
+
+
+class TestScanSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.temp_dir, "root")
+        self.sub = os.path.join(self.root, "sub")
+        os.makedirs(self.sub)
+        for dir_path, name in ((self.root, "a.txt"), (self.sub, "b.txt")):
+            with open(os.path.join(dir_path, name), "w", encoding="utf-8") as f:
+                f.write(name)
+        age_directory(self.root)
+        age_directory(self.sub)
+        self.snapshot_path = os.path.join(self.temp_dir, "snapshot.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def scan(self):
+        with ScanSnapshot(self.snapshot_path) as snapshot:
+            result = scan_directory(self.root, snapshot=snapshot)
+            return sorted(os.path.basename(p) for p in result), snapshot.listed, snapshot.reused
+
+    def test_unchanged_directories_not_relisted(self):
+        self.assertEqual(self.scan(), (["a.txt", "b.txt"], 2, 0))
+        with patch("os.scandir", side_effect=AssertionError("scandir не должен вызываться")):
+            self.assertEqual(self.scan(), (["a.txt", "b.txt"], 0, 2))
+
+    def test_changed_directory_relisted(self):
+        self.scan()
+        with open(os.path.join(self.sub, "c.txt"), "w", encoding="utf-8") as f:
+            f.write("c")
+        self.assertEqual(self.scan(), (["a.txt", "b.txt", "c.txt"], 1, 1))
+
+    def test_removed_directory_forgotten(self):
+        self.scan()
+        shutil.rmtree(self.sub)
+        self.assertEqual(self.scan(), (["a.txt"], 1, 0))
+
+    def test_recently_modified_directory_not_trusted(self):
+        with open(os.path.join(self.sub, "new.txt"), "w", encoding="utf-8") as f:
+            f.write("new")
+        self.scan()
+        self.assertEqual(self.scan()[1:], (1, 1))
+
+    def test_cached_entries_skip_access_check(self):
+        self.scan()
+        with patch("os.access", side_effect=AssertionError("os.access не должен вызываться")):
+            self.assertEqual(self.scan(), (["a.txt", "b.txt"], 0, 2))
+
+    def test_cached_size_can_be_stale(self):
+        # Дописывание в файл не меняет mtime директории: фильтр размера видит размер из снимка
+        self.scan()
+        with open(os.path.join(self.root, "a.txt"), "a", encoding="utf-8") as f:
+            f.write("x" * 100)
+        with ScanSnapshot(self.snapshot_path) as snapshot:
+            cached = scan_directory(self.root, snapshot=snapshot, min_size=50)
+        self.assertEqual(cached, [])
+        fresh = scan_directory(self.root, min_size=50)
+        self.assertEqual([os.path.basename(p) for p in fresh], ["a.txt"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+# Файл: tests/test_stats.py
+import os
+import unittest
+import tempfile
+import shutil
+from parameterized import parameterized
+from find_duplicates.modules.stats import RunStats, wasted_bytes
+from find_duplicates.modules.comparer import find_potential_duplicates
+
+
+def group(size, count, prefix="f"):
+    return [{"path": f"/{prefix}{i}", "size": size} for i in range(count)]
+
+
+class TestRunStats(unittest.TestCase):
+    @parameterized.expand([
+        ("pair", group(100, 2), 100),
+        ("triple", group(100, 3), 200),
+        ("single", group(100, 1), 0),
+        ("unknown_size", group(None, 2), 0),
+    ])
+    def test_wasted_bytes(self, _, files, expected):
+        self.assertEqual(wasted_bytes(files), expected)
+
+    def test_top_groups_heap(self):
+        stats = RunStats(top_count=2)
+        for name, size, count in [("a", 10, 2), ("b", 1000, 2), ("c", 100, 5), ("d", 1, 10)]:
+            stats.add_group(name, group(size, count, name))
+        self.assertEqual([file_hash for _, file_hash, _ in stats.top_groups()], ["b", "c"])
+        self.assertEqual(stats.duplicate_groups, 4)
+        self.assertEqual(stats.duplicate_files, 19)
+        self.assertEqual(stats.reclaimable_bytes, 10 + 1000 + 400 + 9)
+
+    def test_top_disabled(self):
+        stats = RunStats(top_count=0)
+        stats.add_group("a", group(10, 2))
+        self.assertEqual(stats.top_groups(), [])
+
+    def test_stage_timing_accumulates(self):
+        stats = RunStats()
+        with stats.stage("сканирование"):
+            pass
+        with stats.stage("сканирование"):
+            pass
+        self.assertEqual(list(stats.stages), ["сканирование"])
+        self.assertTrue(any("Этап «сканирование»" in line for line in stats.summary_lines()))
+
+
+class TestStatsDuringComparison(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_find_potential_duplicates_counts(self):
+        paths = []
+        for name, content in [("a", "same!"), ("b", "same!"), ("c", "other")]:
+            path = os.path.join(self.temp_dir, name)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+            paths.append(path)
+        stats = RunStats()
+        duplicates = find_potential_duplicates({5: paths}, "md5", stats=stats)
+        self.assertEqual(len(duplicates), 1)
+        self.assertEqual((stats.hashed_files, stats.hashed_bytes), (3, 15))
+        self.assertEqual((stats.duplicate_groups, stats.reclaimable_bytes), (1, 5))
+
+
+if __name__ == "__main__":
+    unittest.main()
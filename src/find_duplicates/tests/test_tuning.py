@@ -0,0 +1,71 @@
+# Файл: tests/test_tuning.py
+import os
+import unittest
+import tempfile
+import shutil
+from unittest.mock import patch
+from find_duplicates.modules import tuning
+from find_duplicates.modules.tuning import (load_profile, save_profile, probe_chunk_size, tune_chunk_sizes,
+                                            chunk_size_for, DEFAULT_CHUNK_SIZE)
+
+
+class TestTuning(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.profile_path = os.path.join(self.temp_dir, "profile", "chunks.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def create_file(self, name, size):
+        path_ = os.path.join(self.temp_dir, name)
+        with open(path_, "wb") as f:
+            f.write(os.urandom(size))
+        return path_
+
+    def test_profile_roundtrip(self):
+        save_profile({"42": 1048576}, self.profile_path)
+        self.assertEqual(load_profile(self.profile_path), {"42": 1048576})
+
+    def test_load_missing_or_broken_profile(self):
+        self.assertEqual(load_profile(self.profile_path), {})
+        os.makedirs(os.path.dirname(self.profile_path))
+        with open(self.profile_path, "w", encoding="utf-8") as f:
+            f.write("not json")
+        self.assertEqual(load_profile(self.profile_path), {})
+
+    def test_probe_returns_candidate(self):
+        path_ = self.create_file("probe.bin", 256 * 1024)
+        best = probe_chunk_size(path_, candidates=(4096, 65536), probe_bytes=128 * 1024)
+        self.assertIn(best, (4096, 65536))
+
+    def test_tune_uses_profile(self):
+        a = self.create_file("a.bin", 100)
+        b = self.create_file("b.bin", 100)
+        dev = os.stat(a).st_dev
+        save_profile({str(dev): 65536}, self.profile_path)
+        with patch.object(tuning, "probe_chunk_size") as probe_mock:
+            result = tune_chunk_sizes({100: [a, b]}, profile_path=self.profile_path)
+        probe_mock.assert_not_called()
+        self.assertEqual(result, {dev: 65536})
+        self.assertEqual(chunk_size_for(a, result), 65536)
+
+    def test_tune_probes_and_saves(self):
+        a = self.create_file("a.bin", 100)
+        b = self.create_file("b.bin", 100)
+        dev = os.stat(a).st_dev
+        with patch.object(tuning, "MIN_PROBE_FILE_SIZE", 1), \
+                patch.object(tuning, "probe_chunk_size", return_value=262144) as probe_mock:
+            result = tune_chunk_sizes({100: [a, b]}, profile_path=self.profile_path)
+        probe_mock.assert_called_once()
+        self.assertEqual(result, {dev: 262144})
+        self.assertEqual(load_profile(self.profile_path), {str(dev): 262144})
+
+    def test_chunk_size_for_defaults(self):
+        missing = os.path.join(self.temp_dir, "missing.bin")
+        self.assertEqual(chunk_size_for(missing), DEFAULT_CHUNK_SIZE)
+        self.assertEqual(chunk_size_for(missing, {1: 4096}, default=8192), 8192)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 # Файл: tests/test_utils.py
 import os
 import sys
+import argparse
 import tempfile
 import shutil
 import unittest
@@ -16,7 +17,8 @@ from find_duplicates.modules.utils import (
     check_file_readable,
     parse_arguments,
     handle_error,
-    human_readable_size
+    human_readable_size,
+    parse_size
 )
 
 
@@ -134,11 +136,82 @@ class TestUtils(unittest.TestCase):
         with patch.object(sys, "argv", test_args):
             args = parse_arguments()
             self.assertEqual(args.directory, "/tmp")
+            self.assertEqual(args.directories, ["/tmp"])
             self.assertEqual(args.exclude, ["*.tmp"])
             self.assertEqual(args.hash_type, "md5")
             self.assertEqual(args.output, "results.csv")
             self.assertEqual(args.log_level, "DEBUG")
             self.assertTrue(args.skip_inaccessible)
+            self.assertFalse(args.keep_page_cache)
+
+    @parameterized.expand([
+        ("several", ["--directory", "/a", "/b"], ["/a", "/b"], None),
+        ("repeated", ["--directory", "/a", "--directory", "/b"], ["/a", "/b"], None),
+        ("files_from_only", ["--files-from", "-"], [], "-"),
+    ])
+    def test_parse_arguments_roots(self, _, roots_args, directories, files_from):
+        with patch.object(sys, "argv", ["prog"] + roots_args):
+            args = parse_arguments()
+        self.assertEqual(args.directories, directories)
+        self.assertEqual(args.directory, directories[0] if directories else None)
+        self.assertEqual(args.files_from, files_from)
+
+    def test_parse_size(self):
+        self.assertEqual(parse_size("4096"), 4096)
+        self.assertEqual(parse_size("64K"), 64 * 1024)
+        self.assertEqual(parse_size("4MiB"), 4 * 1024 * 1024)
+        self.assertEqual(parse_size("1G"), 1024 ** 3)
+        with self.assertRaises(Exception):
+            parse_size("abc")
+        for value in ("inf", "-inf", "nan", "1e400", "1e308T"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_size(value)
+
+    @parameterized.expand([("-1",), ("abc",)])
+    def test_parse_arguments_rejects_bad_summary_top(self, value):
+        test_args = ["prog", "--directory", "/tmp", "--summary-top", value]
+        with patch.object(sys, "argv", test_args), patch("sys.stderr"), self.assertRaises(SystemExit):
+            parse_arguments()
+
+    def test_parse_arguments_summary_top_zero(self):
+        with patch.object(sys, "argv", ["prog", "--directory", "/tmp", "--summary-top", "0"]):
+            self.assertEqual(parse_arguments().summary_top, 0)
+
+    def test_parse_arguments_chunk_sizes(self):
+        test_args = ["prog", "--directory", "/tmp", "--chunk-size", "1M", "--partial-size", "64K"]
+        with patch.object(sys, "argv", test_args):
+            args = parse_arguments()
+            self.assertEqual(args.chunk_size, 1024 * 1024)
+            self.assertEqual(args.partial_size, 64 * 1024)
+        with patch.object(sys, "argv", ["prog", "--directory", "/tmp", "--chunk-size", "auto"]):
+            self.assertEqual(parse_arguments().chunk_size, "auto")
+
+    def test_parse_arguments_min_size(self):
+        with patch.object(sys, "argv", ["prog", "--directory", "/tmp"]):
+            self.assertEqual(parse_arguments().min_size, 0)
+        with patch.object(sys, "argv", ["prog", "--directory", "/tmp", "--min-size", "1K"]):
+            self.assertEqual(parse_arguments().min_size, 1024)
+        with patch.object(sys, "argv", ["prog", "--directory", "/tmp", "--max-size", "1G", "--include", "*.iso"]):
+            args = parse_arguments()
+            self.assertEqual(args.max_size, 1024 ** 3)
+            self.assertEqual(args.include, ["*.iso"])
+        with patch.object(sys, "argv", ["prog", "--directory", "/tmp", "--merkle", "--cache"]):
+            args = parse_arguments()
+            self.assertTrue(args.merkle)
+            self.assertTrue(args.cache)
+            self.assertIsNone(args.cache_file)
+            self.assertFalse(args.snapshot)
+
+    def test_parse_arguments_output_format(self):
+        with patch.object(sys, "argv", ["prog", "--directory", "/tmp"]):
+            args = parse_arguments()
+            self.assertEqual((args.output_format, args.output, args.top), ("csv", "duplicates.csv", None))
+        with patch.object(sys, "argv", ["prog", "--directory", "/tmp", "--format", "tree", "--top", "5"]):
+            args = parse_arguments()
+            self.assertEqual((args.output, args.top), ("-", 5))
+        with patch.object(sys, "argv", ["prog", "--directory", "/tmp", "--top", "0"]):
+            with self.assertRaises(SystemExit):
+                parse_arguments()
 
     def test_parse_arguments_missing_required(self):
         test_args = ["prog", "--exclude", "*.tmp"]
@@ -0,0 +1,90 @@
+# Файл: tests/test_watcher.py
+import os
+import sys
+import unittest
+import tempfile
+import shutil
+from find_duplicates.modules.watcher import (DuplicateTracker, Inotify, IN_CLOSE_WRITE, IN_DELETE, IN_CREATE,
+                                             IN_ISDIR, IN_MOVED_FROM, IN_MOVED_TO)
+
+
+def create_file(dir_path, name, content):
+    path_ = os.path.join(dir_path, name)
+    with open(path_, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path_
+
+
+def duplicate_sets(duplicates):
+    return sorted(sorted(os.path.basename(item["path"]) for item in group) for group in duplicates.values())
+
+
+class TestDuplicateTracker(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.tracker = DuplicateTracker(self.temp_dir, find_options={"hash_type": "md5"})
+
+    def tearDown(self):
+        self.tracker.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_initial_scan_and_updates(self):
+        create_file(self.temp_dir, "a.txt", "same")
+        create_file(self.temp_dir, "b.txt", "same")
+        self.tracker.rescan()
+        self.assertTrue(self.tracker.refresh())
+        self.assertEqual(duplicate_sets(self.tracker.duplicates), [["a.txt", "b.txt"]])
+        self.assertFalse(self.tracker.refresh())
+
+        c = create_file(self.temp_dir, "c.txt", "same")
+        self.tracker.handle_event(IN_CLOSE_WRITE, c)
+        self.tracker.refresh()
+        self.assertEqual(duplicate_sets(self.tracker.duplicates), [["a.txt", "b.txt", "c.txt"]])
+
+        create_file(self.temp_dir, "a.txt", "different content")
+        self.tracker.handle_event(IN_CLOSE_WRITE, os.path.join(self.temp_dir, "a.txt"))
+        os.remove(c)
+        self.tracker.handle_event(IN_DELETE, c)
+        self.tracker.refresh()
+        self.assertEqual(self.tracker.duplicates, {})
+
+    def test_directory_events(self):
+        sub = os.path.join(self.temp_dir, "sub")
+        os.mkdir(sub)
+        create_file(sub, "x.txt", "data")
+        create_file(sub, "y.txt", "data")
+        self.tracker.handle_event(IN_CREATE | IN_ISDIR, sub)
+        self.tracker.refresh()
+        self.assertEqual(duplicate_sets(self.tracker.duplicates), [["x.txt", "y.txt"]])
+
+        self.tracker.handle_event(IN_MOVED_FROM | IN_ISDIR, sub)
+        self.tracker.refresh()
+        self.assertEqual(self.tracker.duplicates, {})
+
+    def test_filters_applied_to_events(self):
+        tracker = DuplicateTracker(self.temp_dir, scan_options={"exclude": ["*.tmp"]},
+                                   find_options={"hash_type": "md5"}, cache=self.tracker.cache)
+        for name in ("a.tmp", "b.tmp", ".hidden"):
+            tracker.handle_event(IN_MOVED_TO, create_file(self.temp_dir, name, "same"))
+        self.assertEqual(tracker.sizes, {})
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify доступен только в Linux")
+class TestInotify(unittest.TestCase):
+    def test_events(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            with Inotify() as inotify:
+                inotify.add_tree(temp_dir)
+                path_ = create_file(temp_dir, "new.txt", "data")
+                events = inotify.read_events(timeout=2)
+                self.assertIn((IN_CLOSE_WRITE, path_), [(mask & IN_CLOSE_WRITE, p) for mask, p in events])
+                os.remove(path_)
+                events = inotify.read_events(timeout=2)
+                self.assertTrue(any(mask & IN_DELETE and p == path_ for mask, p in events))
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()